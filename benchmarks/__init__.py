@@ -0,0 +1 @@
+"""Benchmarks for the Duke Energy Gateway integration."""
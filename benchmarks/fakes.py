@@ -0,0 +1,118 @@
+"""Local stand-ins for the Duke Energy API and real-time stream used by the benchmarks."""
+import asyncio
+import json
+import math
+from datetime import datetime
+
+from custom_components.duke_energy_gateway.api import CircuitBreaker
+from pyduke_energy.realtime import DukeEnergyRealtime
+from pyduke_energy.types import GatewayStatus
+from pyduke_energy.types import MeterInfo
+from pyduke_energy.types import UsageMeasurement
+
+GATEWAY_ID = "bench-gateway"
+
+METER = MeterInfo(
+    {
+        "meterType": "ELECTRIC",
+        "serialNum": "bench-meter",
+        "agreementActiveDate": "2021-01-01",
+        "isCertifiedSmartMeter": True,
+    }
+)
+GATEWAY = GatewayStatus(
+    {
+        "_id": GATEWAY_ID,
+        "serviceDt": "2021-01-01T00:00:00+00:00",
+        "connected": True,
+        "connectTm": "2021-01-01T00:00:00+00:00",
+    }
+)
+
+
+def synthetic_usage(timestamp: int) -> float:
+    """Minute usage in Wh following a rough daily load curve."""
+    hour = (timestamp % 86400) / 3600
+    return round(8 + 6 * (1 + math.sin((hour - 9) / 24 * 2 * math.pi)), 3)
+
+
+class FakeDukeEnergyClient:
+    """Serves synthetic minute usage the way the gateway usage API does (in whole hours)."""
+
+    def __init__(self, day_start: datetime, minutes: int, latency: float = 0):
+        self.day_start = int(day_start.timestamp())
+        self.minutes = minutes  # minutes of data published so far today
+        self.latency = latency  # simulated API round trip in seconds
+        self.requests = 0
+        self.measurements_returned = 0
+        # Checked by the coordinator when a poll fails, like the API wrapper's
+        self.breaker = CircuitBreaker()
+
+    def publish(self, minutes: int = 1):
+        """Make more minutes of data available, as the gateway does over time."""
+        self.minutes = min(self.minutes + minutes, 24 * 60)
+
+    async def get_gateway_usage(
+        self, range_start: datetime, range_end: datetime, background: bool = False
+    ):
+        """Get the published usage in the (hour aligned) range."""
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        start = int(range_start.timestamp()) // 3600 * 3600
+        end = int(range_end.timestamp())
+        published_end = self.day_start + self.minutes * 60
+        measurements = [
+            UsageMeasurement({"t": t * 1000, "dr": synthetic_usage(t), "i": 0})
+            for t in range(max(start, self.day_start), min(end, published_end), 60)
+        ]
+        self.measurements_returned += len(measurements)
+        return measurements
+
+    def select_meter(self, _meter: MeterInfo):
+        """Nothing to select."""
+
+
+class FakeMqttMessage:
+    """Minimal stand-in for paho's MQTTMessage."""
+
+    def __init__(self, payload: bytes):
+        self.topic = f"DESH/{GATEWAY_ID}/out/sm/1/live"
+        self.payload = payload
+
+
+class FakeDukeEnergyRealtime:
+    """Real-time client that never connects; messages are fed in by the replayer instead."""
+
+    msg_to_usage_measurement = staticmethod(DukeEnergyRealtime.msg_to_usage_measurement)
+
+    def __init__(self, _client=None):
+        self.on_message = None
+
+    async def connect_and_subscribe_forever(self):
+        """Stay "connected" until cancelled."""
+        await asyncio.Event().wait()
+
+
+def generate_messages(count: int, start: datetime) -> "list[FakeMqttMessage]":
+    """Generate real-time messages, one second apart, with a unique wattage each."""
+    start_ms = int(start.timestamp() * 1000)
+    return [
+        FakeMqttMessage(
+            json.dumps(
+                {"gw": GATEWAY_ID, "t": start_ms + i * 1000, "da": {"i": i + 1}}
+            ).encode("utf8")
+        )
+        for i in range(count)
+    ]
+
+
+def load_messages(path: str) -> "list[FakeMqttMessage]":
+    """Load recorded real-time payloads, one JSON payload per line."""
+    with open(path, encoding="utf8") as file:
+        return [
+            FakeMqttMessage(line.strip().encode("utf8"))
+            for line in file
+            if line.strip()
+        ]
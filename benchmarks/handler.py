@@ -0,0 +1,209 @@
+"""Benchmark the per-message cost of the real-time message handler and dispatch path.
+
+Unlike benchmarks.run, no sensors are attached, so this measures the integration's own overhead per
+message rather than Home Assistant's state writes. Run from the repository root, e.g.:
+
+    python -m benchmarks.handler --messages 100000 --gateways 3 --interval 5
+
+With --baseline, the messages go through a copy of the handler from before measurements were
+dispatched directly, which parsed every message with pyduke-energy and sent it through Home
+Assistant's dispatcher, to compare against. In the dev container, best of 5 with 50k messages:
+
+    unthrottled           baseline 85.8, current 8.7 us/msg
+    --interval 5          baseline 5.1, current 2.9 us/msg
+    --interval 5 --mode aggregate   baseline 6.4, current 4.2 us/msg
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime
+from datetime import timedelta
+
+from custom_components.duke_energy_gateway.const import REALTIME_MODE_AGGREGATE
+from custom_components.duke_energy_gateway.const import REALTIME_MODE_RAW
+from custom_components.duke_energy_gateway.const import REALTIME_MODE_SAMPLE
+from custom_components.duke_energy_gateway.coordinator import (
+    DukeEnergyGatewayUsageDataUpdateCoordinator,
+)
+from custom_components.duke_energy_gateway.storage import get_store
+from homeassistant.core import callback
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.dispatcher import dispatcher_send
+from homeassistant.util import dt
+
+from .fakes import FakeDukeEnergyClient
+from .fakes import FakeDukeEnergyRealtime
+from .fakes import GATEWAY
+from .fakes import generate_messages
+from .fakes import METER
+
+
+class _BaselineHandler:
+    """The real-time message handler as it was before measurements were dispatched directly.
+
+    Every message was parsed into a measurement by pyduke-energy, throttled on the wall clock, and
+    sent through Home Assistant's dispatcher, which hops onto the event loop for each subscriber.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: DukeEnergyGatewayUsageDataUpdateCoordinator,
+        interval: timedelta,
+        mode: str,
+        signal: str,
+    ):
+        self.hass = hass
+        self.coordinator = coordinator
+        self.interval = interval
+        self.aggregate = mode == REALTIME_MODE_AGGREGATE
+        self.signal = signal
+        self.next_send: datetime = None
+        self.usages: "list[float]" = []
+
+    def on_message(self, msg):
+        """Handle a message the way the coordinator used to."""
+        metrics = self.coordinator.metrics
+        metrics.realtime_messages_received += 1
+        measurement = FakeDukeEnergyRealtime.msg_to_usage_measurement(msg)
+        if not measurement:
+            metrics.realtime_parse_errors += 1
+            return
+        self.coordinator.realtime_energy.add(measurement.timestamp, measurement.usage)
+        if self.aggregate:
+            self.usages.append(measurement.usage)
+        if self.next_send is None or datetime.utcnow() >= self.next_send:
+            self.next_send = datetime.utcnow() + self.interval
+            if self.aggregate:
+                measurement = sum(self.usages) / len(self.usages)
+                self.usages = []
+            dispatcher_send(self.hass, self.signal, measurement)
+            metrics.realtime_messages_dispatched += 1
+        else:
+            metrics.realtime_messages_throttled += 1
+
+
+async def async_main(args: argparse.Namespace) -> dict:
+    """Feed messages to one coordinator per gateway, interleaved, and time the handlers."""
+    hass = HomeAssistant()
+    hass.config.config_dir = tempfile.mkdtemp()
+
+    dispatched = 0
+
+    def on_measurement(_measurement):
+        nonlocal dispatched
+        dispatched += 1
+
+    coordinators = []
+    baseline_handlers = []
+    for i in range(args.gateways):
+        client = FakeDukeEnergyClient(dt.start_of_local_day(), 0)
+        coordinator = DukeEnergyGatewayUsageDataUpdateCoordinator(
+            hass,
+            client=client,
+            realtime=FakeDukeEnergyRealtime(client),
+            realtime_interval=timedelta(seconds=args.interval),
+            realtime_mode=args.mode,
+            store=get_store(hass, f"benchmark_{i}"),
+            meter=METER,
+            gateway=GATEWAY,
+        )
+        if args.baseline:
+            signal = f"benchmark_baseline_{i}"
+            baseline = _BaselineHandler(
+                hass,
+                coordinator,
+                timedelta(seconds=args.interval),
+                args.mode,
+                signal,
+            )
+            async_dispatcher_connect(hass, signal, callback(on_measurement))
+            baseline_handlers.append(baseline.on_message)
+        else:
+            coordinator.async_realtime_subscribe("benchmark", on_measurement)
+            for j in range(args.raw_subscribers):
+                coordinator.async_realtime_subscribe(
+                    f"benchmark_raw_{j}", on_measurement, mode=REALTIME_MODE_RAW
+                )
+        coordinators.append(coordinator)
+    # The stream's message handler is attached when the supervisor task starts
+    await asyncio.sleep(0)
+    handlers = baseline_handlers or [
+        coordinator.realtime.on_message for coordinator in coordinators
+    ]
+
+    messages = generate_messages(args.messages, dt.utcnow())
+    total = args.messages * args.gateways
+    wall_times = []
+    cpu_times = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        for message in messages:
+            for handler in handlers:
+                handler(message)
+        await hass.async_block_till_done()
+        cpu_times.append(time.process_time() - cpu_start)
+        wall_times.append(time.perf_counter() - start)
+
+    for coordinator in coordinators:
+        coordinator.realtime_cancel()
+    await hass.async_stop(force=True)
+
+    return {
+        "messages": total,
+        "dispatched": dispatched // args.repeat,
+        "us_per_message_best": min(wall_times) / total * 1_000_000,
+        "us_per_message_mean": sum(wall_times) / len(wall_times) / total * 1_000_000,
+        "cpu_us_per_message_best": min(cpu_times) / total * 1_000_000,
+    }
+
+
+def main(argv: "list[str]" = None):
+    """Parse arguments, run the benchmark and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--messages", type=int, default=100_000, help="messages per gateway"
+    )
+    parser.add_argument("--gateways", type=int, default=1)
+    parser.add_argument(
+        "--interval", type=float, default=0, help="real-time throttling interval (s)"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=[REALTIME_MODE_SAMPLE, REALTIME_MODE_AGGREGATE],
+        default=REALTIME_MODE_SAMPLE,
+    )
+    parser.add_argument(
+        "--raw-subscribers",
+        type=int,
+        default=0,
+        help="extra subscribers per gateway that get every message",
+    )
+    parser.add_argument(
+        "--baseline",
+        action="store_true",
+        help="use the handler from before measurements were dispatched directly",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="output results as JSON")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(async_main(args))
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        for key, value in results.items():
+            print(
+                f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}"
+            )
+
+
+if __name__ == "__main__":
+    main()
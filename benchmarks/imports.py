@@ -0,0 +1,126 @@
+"""Benchmark the integration's import time, on the event loop and deferred to the executor.
+
+Each run imports the integration in a fresh interpreter, after the Home Assistant modules it uses,
+which Home Assistant has already imported by the time it loads an integration. It reports how long
+importing the integration and its config flow takes (which Home Assistant does on the event loop),
+how long the modules deferred until an entry is set up and until the real-time stream starts take,
+and which of pyduke-energy's modules were imported before they were needed. Run from the repository
+root (Home Assistant and pyduke-energy must be installed), e.g.:
+
+    python -m benchmarks.imports --repeat 10
+"""
+import argparse
+import importlib
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PACKAGE = "custom_components.duke_energy_gateway"
+
+# Home Assistant modules the integration imports, which are already loaded when it is
+HOMEASSISTANT_MODULES = (
+    "homeassistant.components.recorder",
+    "homeassistant.components.http",  # after the recorder, which imports it the way Home Assistant does
+    "homeassistant.components.sensor",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.aiohttp_client",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.event",
+    "homeassistant.helpers.storage",
+    "homeassistant.helpers.update_coordinator",
+)
+
+# Modules that should only be imported when they are needed
+WATCHED_MODULES = (
+    "dateutil.parser",
+    "paho.mqtt.client",
+    "pyduke_energy.client",
+    "pyduke_energy.realtime",
+    "pyduke_energy.types",
+)
+
+
+def _timed_import(*names: str) -> float:
+    """Import modules, returning how long it took in ms."""
+    start = time.perf_counter()
+    for name in names:
+        importlib.import_module(name)
+    return (time.perf_counter() - start) * 1000
+
+
+def run_child() -> dict:
+    """Time each stage of importing the integration, in this (fresh) interpreter."""
+    for name in HOMEASSISTANT_MODULES:
+        importlib.import_module(name)
+
+    results = {
+        "integration_ms": _timed_import(PACKAGE),
+        "config_flow_ms": _timed_import(f"{PACKAGE}.config_flow"),
+    }
+    loader = sys.modules[f"{PACKAGE}.loader"]
+    results["on_event_loop_ms"] = results["integration_ms"] + results["config_flow_ms"]
+    results["imported_early"] = [
+        name for name in WATCHED_MODULES if name in sys.modules
+    ]
+    results["entry_setup_ms"] = _timed_import(*loader.API_MODULES)
+    results["sensor_platform_ms"] = _timed_import(f"{PACKAGE}.sensor")
+    results["realtime_ms"] = _timed_import(loader.REALTIME_MODULE)
+    results["total_ms"] = (
+        results["on_event_loop_ms"]
+        + results["entry_setup_ms"]
+        + results["sensor_platform_ms"]
+        + results["realtime_ms"]
+    )
+    return results
+
+
+def _run_child(env: dict) -> dict:
+    output = subprocess.run(
+        [sys.executable, "-m", "benchmarks.imports", "--child"],
+        capture_output=True,
+        check=True,
+        env=env,
+        text=True,
+    ).stdout
+    return json.loads(output)
+
+
+def main(argv: "list[str]" = None):
+    """Parse arguments, run the benchmark and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10, help="fresh interpreters")
+    parser.add_argument("--json", action="store_true", help="output results as JSON")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        json.dump(run_child(), sys.stdout)
+        return
+
+    with tempfile.TemporaryDirectory() as pycache:
+        # Installed modules are imported from bytecode, so compile to a scratch cache in a first run
+        env = dict(os.environ, PYTHONPYCACHEPREFIX=pycache)
+        env.pop("PYTHONDONTWRITEBYTECODE", None)
+        runs = [_run_child(env) for _ in range(args.repeat + 1)][1:]
+
+    results = {
+        key: statistics.median(run[key] for run in runs)
+        for key in runs[0]
+        if key != "imported_early"
+    }
+    results["imported_early"] = runs[0]["imported_early"]
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+    for key, value in results.items():
+        print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
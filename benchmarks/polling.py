@@ -0,0 +1,109 @@
+"""Simulate a day of usage polling against a gateway that publishes its data in delayed bursts.
+
+Compares the adaptive poll interval to polling at a fixed interval, reporting the number of API
+calls and how long published data waited before a poll fetched it. Run from the repository root:
+
+    python -m benchmarks.polling --cadence 300 --lag 180 --jitter 30
+"""
+import argparse
+import json
+import random
+import sys
+
+from custom_components.duke_energy_gateway.const import (
+    CONF_POLL_INTERVAL_MAX_DEFAULT_SEC,
+)
+from custom_components.duke_energy_gateway.const import (
+    CONF_POLL_INTERVAL_MIN_DEFAULT_SEC,
+)
+from custom_components.duke_energy_gateway.polling import AdaptivePollInterval
+
+DAY_SEC = 24 * 60 * 60
+
+
+def publication_schedule(args: argparse.Namespace) -> "list[tuple[float, int]]":
+    """Get (published at, latest minute published) for each burst of the simulated day."""
+    rng = random.Random(args.seed)
+    bursts = []
+    for end in range(args.cadence, DAY_SEC + 1, args.cadence):
+        if rng.random() < args.outage:
+            continue  # the gateway skipped this burst, so the next one covers it
+        published = end + args.lag + rng.uniform(-args.jitter, args.jitter)
+        bursts.append((max(published, bursts[-1][0] if bursts else 0), end - 60))
+    return bursts
+
+
+def simulate(bursts: "list[tuple[float, int]]", next_interval) -> dict:
+    """Poll through the day, calling next_interval(now, latest minute seen) for each poll's delay."""
+    now = 0.0
+    burst = 0
+    latest = None
+    calls = 0
+    waits = []
+    while now < DAY_SEC + 3600:
+        calls += 1
+        while burst < len(bursts) and bursts[burst][0] <= now:
+            waits.append(now - bursts[burst][0])
+            latest = bursts[burst][1]
+            burst += 1
+        now += next_interval(now, latest)
+
+    waits.sort()
+    return {
+        "api_calls": calls,
+        "polls_per_burst": calls / len(bursts),
+        "wait_mean_sec": sum(waits) / len(waits),
+        "wait_p95_sec": waits[int(len(waits) * 0.95)],
+        "wait_max_sec": waits[-1],
+    }
+
+
+def main(argv: "list[str]" = None):
+    """Parse arguments, run the simulation and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--cadence", type=int, default=300, help="seconds between bursts"
+    )
+    parser.add_argument(
+        "--lag", type=int, default=180, help="seconds from a burst's end to publishing"
+    )
+    parser.add_argument(
+        "--jitter", type=int, default=30, help="random +/- seconds on the lag"
+    )
+    parser.add_argument(
+        "--outage", type=float, default=0.02, help="chance that a burst is skipped"
+    )
+    parser.add_argument(
+        "--fixed", type=int, default=60, help="fixed poll interval to compare to"
+    )
+    parser.add_argument("--min", type=int, default=CONF_POLL_INTERVAL_MIN_DEFAULT_SEC)
+    parser.add_argument("--max", type=int, default=CONF_POLL_INTERVAL_MAX_DEFAULT_SEC)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--json", action="store_true", help="output results as JSON")
+    args = parser.parse_args(argv)
+
+    bursts = publication_schedule(args)
+    polling = AdaptivePollInterval(args.min, args.max)
+    results = {
+        "fixed": simulate(bursts, lambda _now, _latest: args.fixed),
+        "adaptive": simulate(bursts, polling.record_poll),
+    }
+    results["adaptive"]["lag_sec"] = polling.lag_sec
+    results["adaptive"]["cadence_sec"] = polling.cadence_sec
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+    for name, result in results.items():
+        print(f"{name}:")
+        for key, value in result.items():
+            print(
+                f"  {key}: {value:.1f}"
+                if isinstance(value, float)
+                else f"  {key}: {value}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,330 @@
+"""Benchmark the coordinator and sensors against a fake Duke Energy API and real-time stream.
+
+Run from the repository root (Home Assistant and pyduke-energy must be installed), e.g.:
+
+    python -m benchmarks.run --minutes 1440 --polls 60 --rate 100 --duration 10
+"""
+import argparse
+import asyncio
+import json
+import logging
+import resource
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+from collections import defaultdict
+from collections import deque
+from datetime import timedelta
+
+from custom_components.duke_energy_gateway import sensor
+from custom_components.duke_energy_gateway.const import DOMAIN
+from custom_components.duke_energy_gateway.const import REALTIME_MODE_AGGREGATE
+from custom_components.duke_energy_gateway.const import REALTIME_MODE_SAMPLE
+from custom_components.duke_energy_gateway.coordinator import (
+    DukeEnergyGatewayUsageDataUpdateCoordinator,
+)
+from custom_components.duke_energy_gateway.storage import get_store
+from homeassistant.const import EVENT_STATE_CHANGED
+from homeassistant.core import Event
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry
+from homeassistant.helpers import entity
+from homeassistant.helpers import entity_registry
+from homeassistant.helpers.entity_component import EntityComponent
+from homeassistant.util import dt
+
+from .fakes import FakeDukeEnergyClient
+from .fakes import FakeDukeEnergyRealtime
+from .fakes import GATEWAY
+from .fakes import generate_messages
+from .fakes import load_messages
+from .fakes import METER
+
+ENTRY_ID = "benchmark"
+REALTIME_ENTITY_ID = "sensor.duke_energy_current_usage_w"
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class _BenchConfigEntry:
+    """Just enough of a config entry for the sensor platform."""
+
+    entry_id = ENTRY_ID
+    data: dict = {}
+    options: dict = {}
+
+
+class _StateWriteCounter:
+    """Counts state writes per entity and matches real-time states to when they were sent."""
+
+    def __init__(self):
+        self.writes = Counter()
+        self.sent_at: "defaultdict[float, deque]" = defaultdict(deque)
+        self.latencies: "list[float]" = []
+
+    def reset(self):
+        """Start counting a new phase."""
+        self.writes.clear()
+        self.sent_at.clear()
+        self.latencies = []
+
+    def on_state_changed(self, event: Event):
+        """Count the write, and record the latency if it is a real-time measurement we sent."""
+        received_at = time.perf_counter()
+        entity_id = event.data["entity_id"]
+        self.writes[entity_id] += 1
+
+        new_state = event.data.get("new_state")
+        if entity_id != REALTIME_ENTITY_ID or new_state is None:
+            return
+        try:
+            sent = self.sent_at.get(float(new_state.state))
+        except ValueError:
+            return
+        if sent:
+            self.latencies.append(received_at - sent.popleft())
+
+
+def _summarize(values: "list[float]", scale: float = 1000) -> dict:
+    """Summarize durations (in seconds) as milliseconds by default."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+    return {
+        "count": len(values),
+        "mean": statistics.fmean(values) * scale,
+        "p50": ordered[len(ordered) // 2] * scale,
+        "p95": ordered[int(len(ordered) * 0.95)] * scale,
+        "p99": ordered[int(len(ordered) * 0.99)] * scale,
+        "max": ordered[-1] * scale,
+    }
+
+
+def _memory() -> dict:
+    """Current and peak memory use."""
+    memory = {"max_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}
+    if tracemalloc.is_tracing():
+        current, peak = tracemalloc.get_traced_memory()
+        memory["traced_current_kb"] = current // 1024
+        memory["traced_peak_kb"] = peak // 1024
+    return memory
+
+
+async def async_setup_benchmark(hass: HomeAssistant, args: argparse.Namespace):
+    """Set up the coordinator and sensors against the fakes."""
+    entity.async_setup(hass)
+    await device_registry.async_load(hass)
+    await entity_registry.async_load(hass)
+
+    client = FakeDukeEnergyClient(
+        dt.start_of_local_day(), args.minutes, args.api_latency / 1000
+    )
+    realtime = FakeDukeEnergyRealtime(client)
+    coordinator = DukeEnergyGatewayUsageDataUpdateCoordinator(
+        hass,
+        client=client,
+        realtime=realtime,
+        realtime_interval=timedelta(seconds=args.interval),
+        realtime_mode=args.mode,
+        store=get_store(hass, ENTRY_ID),
+        meter=METER,
+        gateway=GATEWAY,
+    )
+    coordinator.apply_realtime_deadband(
+        args.deadband, args.deadband_percent, args.heartbeat
+    )
+    hass.data[DOMAIN] = {
+        ENTRY_ID: {"coordinator": coordinator, "meter": METER, "gateway": GATEWAY}
+    }
+
+    entities = []
+    await sensor.async_setup_entry(hass, _BenchConfigEntry(), entities.extend)
+    component = EntityComponent(_LOGGER, "sensor", hass)
+    await component.async_add_entities(entities)
+    await hass.async_block_till_done()
+
+    return coordinator, client, realtime
+
+
+async def async_bench_polls(
+    hass: HomeAssistant,
+    coordinator: DukeEnergyGatewayUsageDataUpdateCoordinator,
+    client: FakeDukeEnergyClient,
+    counter: _StateWriteCounter,
+    polls: int,
+) -> dict:
+    """Time the first (full day) poll, then incremental polls with a new minute published each time."""
+    counter.reset()
+    start = time.perf_counter()
+    await coordinator.async_refresh()
+    initial = time.perf_counter() - start
+    initial_returned = client.measurements_returned
+
+    durations = []
+    for _ in range(polls):
+        client.publish()
+        start = time.perf_counter()
+        await coordinator.async_refresh()
+        durations.append(time.perf_counter() - start)
+    await hass.async_block_till_done()
+
+    return {
+        "initial_poll_ms": initial * 1000,
+        "initial_measurements": initial_returned,
+        "incremental_poll": _summarize(durations),
+        "incremental_measurements_per_poll": (
+            (client.measurements_returned - initial_returned) / polls if polls else 0
+        ),
+        "api_requests": client.requests,
+        "state_writes": dict(counter.writes),
+        "memory": _memory(),
+    }
+
+
+async def async_bench_realtime(
+    hass: HomeAssistant,
+    realtime: FakeDukeEnergyRealtime,
+    counter: _StateWriteCounter,
+    messages: list,
+    rate: float,
+) -> dict:
+    """Replay messages into the real-time handler at a fixed rate."""
+    counter.reset()
+    usages = []
+    for message in messages:
+        measurement = realtime.msg_to_usage_measurement(message)
+        usages.append(float(measurement.usage) if measurement else None)
+
+    handler_durations = []
+    interval = 1 / rate
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    for i, message in enumerate(messages):
+        delay = start + i * interval - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        elif i % 100 == 0:
+            await asyncio.sleep(0)  # falling behind, but still let the loop run
+
+        sent = time.perf_counter()
+        if usages[i] is not None:
+            counter.sent_at[usages[i]].append(sent)
+        realtime.on_message(message)
+        handler_durations.append(time.perf_counter() - sent)
+    await hass.async_block_till_done()
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu_start
+
+    return {
+        "messages": len(messages),
+        "target_rate": rate,
+        "achieved_rate": len(messages) / elapsed,
+        "handler": _summarize(handler_durations, scale=1_000_000),
+        # includes work the handler schedules on the loop, e.g. dispatching and state writes (us)
+        "cpu_per_message": cpu / len(messages) * 1_000_000 if messages else 0,
+        "dispatch_latency": _summarize(counter.latencies),
+        "state_writes": dict(counter.writes),
+        "memory": _memory(),
+    }
+
+
+async def async_main(args: argparse.Namespace) -> dict:
+    """Run the benchmarks."""
+    hass = HomeAssistant()
+    hass.config.config_dir = tempfile.mkdtemp()
+    hass.config.set_time_zone(args.time_zone)
+
+    counter = _StateWriteCounter()
+    hass.bus.async_listen(EVENT_STATE_CHANGED, counter.on_state_changed)
+
+    coordinator, client, realtime = await async_setup_benchmark(hass, args)
+    results = {"setup_memory": _memory()}
+
+    results["polling"] = await async_bench_polls(
+        hass, coordinator, client, counter, args.polls
+    )
+
+    if args.replay:
+        messages = load_messages(args.replay)
+    else:
+        messages = generate_messages(int(args.rate * args.duration), dt.utcnow())
+    results["realtime"] = await async_bench_realtime(
+        hass, realtime, counter, messages, args.rate
+    )
+
+    coordinator.realtime_cancel()
+    await hass.async_stop(force=True)
+    return results
+
+
+def _print_results(results: dict, indent: int = 0):
+    """Print nested results."""
+    for key, value in results.items():
+        if isinstance(value, dict):
+            print(f"{' ' * indent}{key}:")
+            _print_results(value, indent + 2)
+        elif isinstance(value, float):
+            print(f"{' ' * indent}{key}: {value:.3f}")
+        else:
+            print(f"{' ' * indent}{key}: {value}")
+
+
+def main(argv: "list[str]" = None):
+    """Parse arguments, run the benchmarks and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--minutes",
+        type=int,
+        default=23 * 60,
+        help="minutes of usage data already published today",
+    )
+    parser.add_argument("--polls", type=int, default=60, help="incremental polls")
+    parser.add_argument(
+        "--api-latency", type=float, default=0, help="simulated API latency (ms)"
+    )
+    parser.add_argument("--rate", type=float, default=100, help="messages per second")
+    parser.add_argument("--duration", type=float, default=10, help="seconds to replay")
+    parser.add_argument("--replay", help="file of recorded payloads, one per line")
+    parser.add_argument(
+        "--interval", type=float, default=0, help="real-time throttling interval (s)"
+    )
+    parser.add_argument(
+        "--mode",
+        choices=[REALTIME_MODE_SAMPLE, REALTIME_MODE_AGGREGATE],
+        default=REALTIME_MODE_SAMPLE,
+    )
+    parser.add_argument(
+        "--deadband", type=float, default=0, help="real-time write deadband (W)"
+    )
+    parser.add_argument(
+        "--deadband-percent",
+        type=float,
+        default=0,
+        help="real-time write deadband (%% of the last state)",
+    )
+    parser.add_argument(
+        "--heartbeat", type=float, default=0, help="real-time write heartbeat (s)"
+    )
+    parser.add_argument("--time-zone", default="America/New_York")
+    parser.add_argument(
+        "--trace-memory", action="store_true", help="track allocations (slower)"
+    )
+    parser.add_argument("--json", action="store_true", help="output results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.trace_memory:
+        tracemalloc.start()
+    results = asyncio.run(async_main(args))
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+    else:
+        _print_results(results)
+
+
+if __name__ == "__main__":
+    main()
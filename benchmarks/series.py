@@ -0,0 +1,144 @@
+"""Benchmark the memory and time costs of holding minute usage in a UsageSeries.
+
+Compares it with a list of pyduke_energy UsageMeasurement objects, which is how usage is returned by
+the API, and reports the cost of learning the load profile from the series a minute at a time and
+projecting a day with it. Run from the repository root, e.g.:
+
+    python -m benchmarks.series --days 7
+"""
+import argparse
+import json
+import sys
+import time
+import tracemalloc
+
+from custom_components.duke_energy_gateway.forecast import LoadProfile
+from custom_components.duke_energy_gateway.usage import UsageSeries
+from pyduke_energy.types import UsageMeasurement
+
+from .fakes import synthetic_usage
+
+DAY_START = 1_700_000_000 // 86400 * 86400
+
+
+def _measure(build):
+    """Run build(), returning its result, the memory it holds on to (bytes) and the time taken (s)."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, elapsed
+
+
+def _timed(func, repeat: int) -> float:
+    """Best time of several runs of func(), in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv: "list[str]" = None):
+    """Parse arguments, run the benchmark and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=1, help="days of minute data")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="output results as JSON")
+    args = parser.parse_args(argv)
+
+    minutes = range(DAY_START, DAY_START + args.days * 86400, 60)
+    rows = [(t, synthetic_usage(t), 0.0) for t in minutes]
+    hour_starts = range(DAY_START, DAY_START + args.days * 86400, 3600)
+
+    measurements, objects_bytes, objects_build = _measure(
+        lambda: [
+            UsageMeasurement({"t": t * 1000, "dr": usage, "i": power})
+            for t, usage, power in rows
+        ]
+    )
+
+    def build_series():
+        series = UsageSeries()
+        for t, usage, power in rows:
+            series.add(t, usage, power)
+        return series
+
+    series, series_bytes, series_build = _measure(build_series)
+    stored = json.dumps(series.as_dict())
+
+    def learn_profile():
+        profile = LoadProfile()
+        profile.add_series(series, DAY_START + args.days * 86400)
+        return profile
+
+    profile = learn_profile()
+
+    results = {
+        "measurements": len(rows),
+        "objects": {
+            "bytes_per_measurement": objects_bytes / len(rows),
+            "build_ms": objects_build * 1000,
+            "hourly_sums_ms": _timed(
+                lambda: [
+                    sum(
+                        m.usage
+                        for m in measurements
+                        if hour <= m.timestamp < hour + 3600
+                    )
+                    for hour in hour_starts
+                ],
+                args.repeat,
+            )
+            * 1000,
+        },
+        "series": {
+            "bytes_per_measurement": series_bytes / len(rows),
+            "build_ms": series_build * 1000,
+            "hourly_sums_ms": _timed(
+                lambda: [series.sum(hour, hour + 3600) for hour in hour_starts],
+                args.repeat,
+            )
+            * 1000,
+            "serialize_ms": _timed(lambda: json.dumps(series.as_dict()), args.repeat)
+            * 1000,
+            "deserialize_ms": _timed(
+                lambda: UsageSeries.from_dict(json.loads(stored)), args.repeat
+            )
+            * 1000,
+            "stored_bytes": len(stored),
+        },
+        "load_profile": {
+            "learn_us_per_minute": _timed(learn_profile, args.repeat) * 1e6 / len(rows),
+            "project_day_ms": _timed(
+                lambda: profile.project_remaining(DAY_START, DAY_START + 86400),
+                args.repeat,
+            )
+            * 1000,
+            "stored_bytes": len(json.dumps(profile.as_dict())),
+        },
+    }
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+    for name, result in results.items():
+        if not isinstance(result, dict):
+            print(f"{name}: {result}")
+            continue
+        print(f"{name}:")
+        for key, value in result.items():
+            print(
+                f"  {key}: {value:.3f}"
+                if isinstance(value, float)
+                else f"  {key}: {value}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""Benchmark repricing days of minute usage with a compiled tariff.
+
+Compares it with matching each measurement against the tariff's rules, which is what pricing
+would cost without compiling the tariff. Run from the repository root, e.g.:
+
+    python -m benchmarks.tariff --days 7
+"""
+import argparse
+import json
+import sys
+import time
+from datetime import datetime
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+from custom_components.duke_energy_gateway.tariff import DAY_SETS
+from custom_components.duke_energy_gateway.tariff import Tariff
+from custom_components.duke_energy_gateway.tariff import TariffDay
+from custom_components.duke_energy_gateway.usage import UsageSeries
+
+from .fakes import synthetic_usage
+
+TIME_ZONE = ZoneInfo("America/New_York")
+
+# A typical time-of-use plan with seasonal on-peak hours and an overnight discount
+TARIFF_CONFIG = {
+    "default_period": "off_peak",
+    "default_rate": 0.1055,
+    "fixed_per_month": 14.00,
+    "periods": [
+        {
+            "name": "on_peak",
+            "rate": 0.2297,
+            "months": [6, 7, 8, 9],
+            "days": "weekdays",
+            "start": "18:00",
+            "end": "21:00",
+        },
+        {
+            "name": "on_peak",
+            "rate": 0.2156,
+            "months": [12, 1, 2],
+            "days": "weekdays",
+            "start": "06:00",
+            "end": "09:00",
+        },
+        {"name": "discount", "rate": 0.0478, "start": "01:00", "end": "06:00"},
+    ],
+}
+
+
+def _minutes(text: str) -> int:
+    hours, minutes = text.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def price_by_rules(series: UsageSeries) -> "dict[str, float]":
+    """Price each measurement by converting it to local time and finding the first rule it matches."""
+    rules = [
+        (
+            rule["name"],
+            rule["rate"],
+            set(rule.get("months", range(1, 13))),
+            set(DAY_SETS[rule.get("days", "all")]),
+            _minutes(rule.get("start", "00:00")),
+            _minutes(rule.get("end", "24:00")),
+        )
+        for rule in TARIFF_CONFIG["periods"]
+    ]
+    costs: dict[str, float] = {}
+    for timestamp, usage, _power in series:
+        local = datetime.fromtimestamp(timestamp, TIME_ZONE)
+        minute = local.hour * 60 + local.minute
+        name, rate = TARIFF_CONFIG["default_period"], TARIFF_CONFIG["default_rate"]
+        for rule_name, rule_rate, months, weekdays, start, end in rules:
+            if (
+                local.month in months
+                and local.weekday() in weekdays
+                and (
+                    start <= minute < end
+                    if start < end
+                    else minute >= start or minute < end
+                )
+            ):
+                name, rate = rule_name, rule_rate
+                break
+        costs[name] = costs.get(name, 0.0) + usage * rate / 1000
+    return costs
+
+
+def price_compiled(
+    tariff: Tariff, series: UsageSeries, day_starts: "list[datetime]"
+) -> "dict[str, float]":
+    """Price the measurements a day at a time with the compiled tariff."""
+    costs: dict[str, float] = {}
+    for day_start in day_starts:
+        day = TariffDay(tariff, day_start, _next_day(day_start))
+        day.add_series(series)
+        for name in tariff.period_names:
+            costs[name] = costs.get(name, 0.0) + day.get_cost(name)
+    return costs
+
+
+def _next_day(day_start: datetime) -> datetime:
+    return (day_start + timedelta(days=1, hours=2)).replace(hour=0)
+
+
+def _timed(func, repeat: int) -> float:
+    """Best time of several runs of func(), in seconds."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(argv: "list[str]" = None):
+    """Parse arguments, run the benchmark and report the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=7, help="days of minute data")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="output results as JSON")
+    args = parser.parse_args(argv)
+
+    day_starts = [datetime(2023, 7, 10, tzinfo=TIME_ZONE)]
+    for _ in range(args.days - 1):
+        day_starts.append(_next_day(day_starts[-1]))
+    series = UsageSeries()
+    start = int(day_starts[0].timestamp())
+    for timestamp in range(start, int(_next_day(day_starts[-1]).timestamp()), 60):
+        series.add(timestamp, synthetic_usage(timestamp), 0.0)
+
+    tariff = Tariff.from_config(TARIFF_CONFIG)
+    by_rules = price_by_rules(series)
+    compiled = price_compiled(tariff, series, day_starts)
+    if any(abs(by_rules[name] - compiled[name]) > 1e-6 for name in by_rules):
+        raise AssertionError(f"Costs differ: {by_rules} != {compiled}")
+
+    results = {
+        "measurements": len(series),
+        "compile_ms": _timed(lambda: Tariff.from_config(TARIFF_CONFIG), args.repeat)
+        * 1000,
+        "rules_ms": _timed(lambda: price_by_rules(series), args.repeat) * 1000,
+        "compiled_ms": _timed(
+            lambda: price_compiled(tariff, series, day_starts), args.repeat
+        )
+        * 1000,
+    }
+    results["speedup"] = results["rules_ms"] / results["compiled_ms"]
+
+    if args.json:
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return
+    for key, value in results.items():
+        print(f"{key}: {value:.3f}" if isinstance(value, float) else f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -7,51 +7,186 @@ https://github.com/mjmeli/ha-duke-energy-gateway
 import asyncio
 import logging
 from datetime import timedelta
+from typing import TYPE_CHECKING
 
+import voluptuous as vol
 from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
 from homeassistant.core import Config
+from homeassistant.core import Event
 from homeassistant.core import HomeAssistant
+from homeassistant.core import ServiceCall
 from homeassistant.exceptions import ConfigEntryNotReady
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from pyduke_energy.client import DukeEnergyClient
-from pyduke_energy.realtime import DukeEnergyRealtime
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.event import async_call_later
+from homeassistant.util import dt
 
+from .const import ATTR_END_DATE
+from .const import ATTR_START_DATE
+from .const import CONF_BACKFILL_DAYS
+from .const import CONF_BACKFILL_DAYS_DEFAULT
+from .const import CONF_BILLING_DAY
+from .const import CONF_BILLING_DAY_DEFAULT
 from .const import CONF_EMAIL
+from .const import CONF_EXPORT_DIRECTORY
+from .const import CONF_EXPORT_DIRECTORY_DEFAULT
+from .const import CONF_METER
 from .const import CONF_PASSWORD
+from .const import CONF_POLL_INTERVAL_MAX
+from .const import CONF_POLL_INTERVAL_MAX_DEFAULT_SEC
+from .const import CONF_POLL_INTERVAL_MIN
+from .const import CONF_POLL_INTERVAL_MIN_DEFAULT_SEC
+from .const import CONF_REALTIME_DEADBAND
+from .const import CONF_REALTIME_DEADBAND_DEFAULT_W
+from .const import CONF_REALTIME_DEADBAND_PERCENT
+from .const import CONF_REALTIME_DEADBAND_PERCENT_DEFAULT
+from .const import CONF_REALTIME_HEARTBEAT
+from .const import CONF_REALTIME_HEARTBEAT_DEFAULT_SEC
 from .const import CONF_REALTIME_INTERVAL
 from .const import CONF_REALTIME_INTERVAL_DEFAULT_SEC
+from .const import CONF_REALTIME_MODE
+from .const import CONF_REALTIME_MODE_DEFAULT
+from .const import CONF_REPUBLISH_MQTT_TOPIC
+from .const import CONF_REPUBLISH_MQTT_TOPIC_DEFAULT
+from .const import CONF_REPUBLISH_WEBSOCKET
+from .const import CONF_REPUBLISH_WEBSOCKET_DEFAULT
+from .const import CONF_TARIFF
+from .const import CONF_TARIFF_DEFAULT
 from .const import DOMAIN
 from .const import PLATFORMS
+from .const import SERVICE_IMPORT_STATISTICS
 from .const import STARTUP_MESSAGE
-from .coordinator import DukeEnergyGatewayUsageDataUpdateCoordinator
+from .export import UsageExporter
+from .loader import API_MODULES
+from .loader import async_import
+from .tariff import Tariff
+
+if TYPE_CHECKING:
+    from .coordinator import DukeEnergyGatewayUsageDataUpdateCoordinator
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
+# Options that can be applied to a running coordinator without reloading the entry
+LIVE_OPTIONS = {
+    CONF_REALTIME_INTERVAL,
+    CONF_REALTIME_MODE,
+    CONF_REALTIME_DEADBAND,
+    CONF_REALTIME_DEADBAND_PERCENT,
+    CONF_REALTIME_HEARTBEAT,
+    CONF_POLL_INTERVAL_MIN,
+    CONF_POLL_INTERVAL_MAX,
+    CONF_BILLING_DAY,
+    CONF_TARIFF,
+}
+
+
+IMPORT_STATISTICS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_START_DATE): cv.date,
+        vol.Optional(ATTR_END_DATE): cv.date,
+    }
+)
+
 
-async def async_setup(_hass: HomeAssistant, _config: Config):
+async def async_setup(hass: HomeAssistant, _config: Config):
     """Set up this integration using YAML is not supported."""
+
+    async def async_handle_import_statistics(call: ServiceCall):
+        """Import usage history into long-term statistics for every gateway."""
+        await async_import(hass, *API_MODULES)
+        # pylint: disable-next=import-outside-toplevel
+        from .backfill import async_import_statistics
+
+        start_date = call.data[ATTR_START_DATE]
+        end_date = call.data.get(ATTR_END_DATE, dt.now().date() - timedelta(days=1))
+        if start_date > end_date:
+            raise HomeAssistantError("Start date must be before end date")
+
+        for data in hass.data.get(DOMAIN, {}).values():
+            await async_import_statistics(
+                hass, data["coordinator"], start_date, end_date
+            )
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_IMPORT_STATISTICS,
+        async_handle_import_statistics,
+        schema=IMPORT_STATISTICS_SCHEMA,
+    )
     return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     """Set up this integration using UI."""
-    if hass.data.get(DOMAIN) is None:
+    first_setup = hass.data.get(DOMAIN) is None
+    if first_setup:
         hass.data.setdefault(DOMAIN, {})
         _LOGGER.info(STARTUP_MESSAGE)
 
+    # pyduke-energy is only imported once there is an entry to set up, and off the event loop
+    await async_import(hass, *API_MODULES)
+    # pylint: disable=import-outside-toplevel
+    from .account import async_discover_meters
+    from .account import async_get_account
+    from .backfill import async_backfill_statistics
+    from .bridge import RealtimeBridge
+    from .bridge import RealtimeBridgeView
+    from .coordinator import DukeEnergyGatewayUsageDataUpdateCoordinator
+    from .storage import gateway_from_dict
+    from .storage import get_store
+    from .storage import meter_from_dict
+
+    # pylint: enable=import-outside-toplevel
+
+    if first_setup:
+        # Streams the real-time usage of the gateways with websocket republishing enabled
+        hass.http.register_view(RealtimeBridgeView())
+
     email = entry.data.get(CONF_EMAIL)
     password = entry.data.get(CONF_PASSWORD)
-    realtime_interval = entry.options.get(
-        CONF_REALTIME_INTERVAL, CONF_REALTIME_INTERVAL_DEFAULT_SEC
-    )
+    options = _get_options(entry)
 
-    session = async_get_clientsession(hass)
-    client = DukeEnergyClient(email, password, session)
-    realtime = DukeEnergyRealtime(client)
-    _LOGGER.debug("Set up Duke Energy API clients")
+    # Meters on the same account share its login, but each gets its own client. The real-time client
+    # is created by the coordinator when a sensor starts the stream.
+    account = async_get_account(hass, email, password)
+    client = account.create_meter_client()
+    _LOGGER.debug("Set up Duke Energy API client")
 
-    # Find the meter that is used for the gateway
-    selected_meter, selected_gateway = await client.select_default_meter()
+    store = get_store(hass, entry.entry_id)
+    stored = await store.async_load() or {}
+
+    if stored.get("meter") and stored.get("gateway"):
+        # Re-use the meter found on a previous run so we don't need the API to start up
+        selected_meter = meter_from_dict(stored["meter"])
+        selected_gateway = gateway_from_dict(stored["gateway"])
+        client.select_meter(selected_meter)
+        _LOGGER.debug(
+            "Using stored meter '%s' with gateway '%s'",
+            selected_meter.serial_num,
+            selected_gateway.id,
+        )
+    elif entry.data.get(CONF_METER):
+        # Find the meter this entry was set up for
+        try:
+            meters = await async_discover_meters(client)
+        except Exception as exception:
+            raise ConfigEntryNotReady(
+                f"Error communicating with Duke Energy API: {exception}"
+            ) from exception
+        selected_meter, selected_gateway = next(
+            (
+                (meter, gateway)
+                for meter, gateway in meters
+                if meter.serial_num == entry.data[CONF_METER]
+            ),
+            (None, None),
+        )
+        if selected_meter:
+            client.select_meter(selected_meter)
+    else:
+        # Entries from before multiple meters were supported use the first meter with a gateway
+        selected_meter, selected_gateway = await client.select_default_meter()
 
     # If no meter was found, we raise an error
     if not selected_meter:
@@ -63,20 +198,86 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
     coordinator = DukeEnergyGatewayUsageDataUpdateCoordinator(
         hass,
         client=client,
-        realtime=realtime,
-        realtime_interval=timedelta(seconds=realtime_interval),
+        realtime_interval=timedelta(seconds=options[CONF_REALTIME_INTERVAL]),
+        realtime_mode=options[CONF_REALTIME_MODE],
+        store=store,
+        meter=selected_meter,
+        gateway=selected_gateway,
+    )
+    _apply_realtime_deadband(coordinator, options)
+    coordinator.apply_poll_interval(
+        options[CONF_POLL_INTERVAL_MIN], options[CONF_POLL_INTERVAL_MAX]
     )
-    await coordinator.async_refresh()
+    coordinator.billing_day = options[CONF_BILLING_DAY]
+    coordinator.apply_tariff(_get_tariff(options))
+
+    # Entities can start from stored data, in which case any gaps are filled in the background
+    restored = coordinator.restore_from_store(stored)
+    if not restored:
+        await coordinator.async_refresh()
+
+        if not coordinator.last_update_success:
+            raise ConfigEntryNotReady
+
+    if options[CONF_EXPORT_DIRECTORY]:
+        # Each gateway exports to its own directory, so entries can share the option's value
+        exporter = UsageExporter(
+            hass,
+            hass.config.path(options[CONF_EXPORT_DIRECTORY], selected_gateway.id),
+        )
+        await exporter.async_start()
+        coordinator.exporter = exporter
+
+        async def async_flush_export(_event: Event):
+            await exporter.async_flush()
 
-    if not coordinator.last_update_success:
-        raise ConfigEntryNotReady
+        entry.async_on_unload(
+            hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, async_flush_export)
+        )
+
+    if options[CONF_REPUBLISH_MQTT_TOPIC] or options[CONF_REPUBLISH_WEBSOCKET]:
+        # Local consumers share this entry's real-time stream instead of each connecting to Duke Energy
+        coordinator.bridge = RealtimeBridge(
+            hass, coordinator, options[CONF_REPUBLISH_WEBSOCKET]
+        )
+        if options[CONF_REPUBLISH_MQTT_TOPIC]:
+            coordinator.bridge.start_mqtt(options[CONF_REPUBLISH_MQTT_TOPIC])
+
+    # Stagger the polls of meters on the same account. Polls are scheduled relative to the last one,
+    # so delaying the next poll keeps them apart, and the offset keeps them apart once polls follow
+    # when each gateway publishes its data.
+    poll_offset = account.get_poll_offset(
+        account.acquire(entry.entry_id), options[CONF_POLL_INTERVAL_MIN]
+    )
+    coordinator.polling.offset_sec = poll_offset
+    _LOGGER.debug(
+        "Polling gateway '%s' at offset %ds", selected_gateway.id, poll_offset
+    )
+    if restored:
+
+        async def async_refresh_staggered(_now):
+            await coordinator.async_refresh()
+
+        entry.async_on_unload(
+            async_call_later(hass, poll_offset, async_refresh_staggered)
+        )
+    elif poll_offset:
+        # Just polled, so push its next poll back by the offset rather than polling again
+        coordinator.update_interval += timedelta(seconds=poll_offset)
 
     hass.data[DOMAIN][entry.entry_id] = {
         "coordinator": coordinator,
+        "account": account,
         "meter": selected_meter,
         "gateway": selected_gateway,
+        "options": options,
     }
 
+    if options[CONF_BACKFILL_DAYS] > 0:
+        hass.async_create_task(
+            async_backfill_statistics(hass, coordinator, options[CONF_BACKFILL_DAYS])
+        )
+
     for platform in PLATFORMS:
         if entry.options.get(platform, True):
             coordinator.platforms.append(platform)
@@ -84,13 +285,59 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
                 hass.config_entries.async_forward_entry_setup(entry, platform)
             )
 
-    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
     return True
 
 
+def _get_options(entry: ConfigEntry) -> dict:
+    """Get the entry's options, with defaults for any that are not set."""
+    options = dict(entry.options)
+    options.setdefault(CONF_REALTIME_INTERVAL, CONF_REALTIME_INTERVAL_DEFAULT_SEC)
+    options.setdefault(CONF_REALTIME_MODE, CONF_REALTIME_MODE_DEFAULT)
+    options.setdefault(CONF_REALTIME_DEADBAND, CONF_REALTIME_DEADBAND_DEFAULT_W)
+    options.setdefault(
+        CONF_REALTIME_DEADBAND_PERCENT, CONF_REALTIME_DEADBAND_PERCENT_DEFAULT
+    )
+    options.setdefault(CONF_REALTIME_HEARTBEAT, CONF_REALTIME_HEARTBEAT_DEFAULT_SEC)
+    options.setdefault(CONF_POLL_INTERVAL_MIN, CONF_POLL_INTERVAL_MIN_DEFAULT_SEC)
+    options.setdefault(CONF_POLL_INTERVAL_MAX, CONF_POLL_INTERVAL_MAX_DEFAULT_SEC)
+    options.setdefault(CONF_BILLING_DAY, CONF_BILLING_DAY_DEFAULT)
+    options.setdefault(CONF_TARIFF, CONF_TARIFF_DEFAULT)
+    options.setdefault(CONF_BACKFILL_DAYS, CONF_BACKFILL_DAYS_DEFAULT)
+    options.setdefault(CONF_EXPORT_DIRECTORY, CONF_EXPORT_DIRECTORY_DEFAULT)
+    options.setdefault(CONF_REPUBLISH_MQTT_TOPIC, CONF_REPUBLISH_MQTT_TOPIC_DEFAULT)
+    options.setdefault(CONF_REPUBLISH_WEBSOCKET, CONF_REPUBLISH_WEBSOCKET_DEFAULT)
+    return options
+
+
+def _get_tariff(options: dict) -> Tariff:
+    """Compile the tariff in the options, if there is one."""
+    try:
+        return Tariff.parse(options[CONF_TARIFF])
+    except ValueError as exception:
+        # Options are validated by the options flow, so this is only from entries edited by hand
+        _LOGGER.error("Ignoring the configured tariff: %s", exception)
+        return None
+
+
+def _apply_realtime_deadband(
+    coordinator: "DukeEnergyGatewayUsageDataUpdateCoordinator", options: dict
+):
+    """Apply the options for which real-time measurements are written as a state."""
+    coordinator.apply_realtime_deadband(
+        options[CONF_REALTIME_DEADBAND],
+        options[CONF_REALTIME_DEADBAND_PERCENT],
+        options[CONF_REALTIME_HEARTBEAT],
+    )
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Handle removal of an entry."""
-    coordinator: DukeEnergyGatewayUsageDataUpdateCoordinator = hass.data[DOMAIN][
+    # Only set up entries are unloaded, so the account module is already imported
+    # pylint: disable-next=import-outside-toplevel
+    from .account import async_release_account
+
+    coordinator: "DukeEnergyGatewayUsageDataUpdateCoordinator" = hass.data[DOMAIN][
         entry.entry_id
     ]["coordinator"]
 
@@ -104,16 +351,76 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         )
     )
     if unloaded:
-        hass.data[DOMAIN].pop(entry.entry_id)
+        data = hass.data[DOMAIN].pop(entry.entry_id)
+        async_release_account(hass, data["account"], entry.entry_id)
 
     # Cleanup real-time stream if it wasn't already done so (it should be done by the sensor entity)
     _LOGGER.debug("Checking for clean-up of real-time stream in async_unload_entry")
+    if coordinator.bridge is not None:
+        coordinator.bridge.async_stop()
+        coordinator.bridge = None
     coordinator.realtime_cancel()
-    coordinator.async_realtime_unsubscribe_all_from_dispatcher()
+    coordinator.async_realtime_unsubscribe_all()
+    coordinator.cancel_fill_daily_usage()
+    if coordinator.exporter is not None:
+        await coordinator.exporter.async_stop()
+        coordinator.exporter = None
 
     return unloaded
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the stored data for an entry that is being deleted."""
+    await async_import(hass, *API_MODULES)
+    from .storage import get_store  # pylint: disable=import-outside-toplevel
+
+    await get_store(hass, entry.entry_id).async_remove()
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Apply updated options, only reloading the entry if an option needs it."""
+    data = hass.data[DOMAIN][entry.entry_id]
+    applied = data["options"]
+    options = _get_options(entry)
+    changed = {
+        key
+        for key in applied.keys() | options.keys()
+        if applied.get(key) != options.get(key)
+    }
+
+    # Each of the tariff's periods has its own sensors, so changing the periods needs a reload
+    tariff = _get_tariff(options)
+    tariff_periods_changed = CONF_TARIFF in changed and _get_period_names(
+        _get_tariff(applied)
+    ) != _get_period_names(tariff)
+
+    if not changed <= LIVE_OPTIONS or tariff_periods_changed:
+        _LOGGER.debug("Reloading entry to apply changed options: %s", changed)
+        await async_reload_entry(hass, entry)
+        return
+
+    _LOGGER.debug("Applying changed options without reloading: %s", changed)
+    coordinator: "DukeEnergyGatewayUsageDataUpdateCoordinator" = data["coordinator"]
+    coordinator.apply_realtime_options(
+        timedelta(seconds=options[CONF_REALTIME_INTERVAL]),
+        options[CONF_REALTIME_MODE],
+    )
+    _apply_realtime_deadband(coordinator, options)
+    coordinator.apply_poll_interval(
+        options[CONF_POLL_INTERVAL_MIN], options[CONF_POLL_INTERVAL_MAX]
+    )
+    if CONF_BILLING_DAY in changed:
+        coordinator.apply_billing_day(options[CONF_BILLING_DAY])
+    if CONF_TARIFF in changed:
+        coordinator.apply_tariff(tariff)
+    data["options"] = options
+
+
+def _get_period_names(tariff: Tariff) -> "list[str]":
+    """Get the names of a tariff's periods, which each have their own sensors."""
+    return tariff.period_names if tariff is not None else None
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
     await async_unload_entry(hass, entry)
@@ -0,0 +1,160 @@
+"""Duke Energy accounts shared by the config entries for each of their meters."""
+import logging
+from typing import Optional
+
+from homeassistant.core import callback
+from homeassistant.core import CALLBACK_TYPE
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.event import async_call_later
+from pyduke_energy.client import DukeEnergyClient
+from pyduke_energy.types import GatewayStatus
+from pyduke_energy.types import MeterInfo
+
+from .api import DukeEnergyApi
+from .const import DATA_ACCOUNTS
+
+# Seconds between the polls of meters on the same account, so they don't all hit the API at once
+POLL_STAGGER_SEC = 7
+
+# Seconds an account is kept after its last entry unloads, so reloading the entry re-uses its login
+ACCOUNT_RELEASE_GRACE_SEC = 60
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class DukeEnergyAccount:
+    """A Duke Energy login, with its OAuth token, cache and requests shared by the clients for each meter on the account.
+
+    The account is also used by the config flow to check the login and find the meters, so setting up
+    the entry afterwards re-uses that login and those responses.
+    """
+
+    def __init__(self, hass: HomeAssistant, email: str, password: str):
+        self.email = email
+        self._password = password
+        self._session = async_get_clientsession(hass)
+        self.api = DukeEnergyApi(DukeEnergyClient(email, password, self._session))
+        self._slots: list[Optional[str]] = []  # entry IDs by poll slot
+        self.unsub_remove: Optional[CALLBACK_TYPE] = None  # pending removal once unused
+
+    def create_meter_client(self) -> DukeEnergyApi:
+        """Create a client for a single meter that shares the account's OAuth login."""
+        return self.api.create_meter_api(
+            DukeEnergyClient(self.email, self._password, self._session)
+        )
+
+    def matches(self, password: str) -> bool:
+        """Check if the account was created with the same password."""
+        return self._password == password
+
+    def acquire(self, entry_id: str) -> int:
+        """Start using the account for an entry, returning its poll slot."""
+        if entry_id in self._slots:
+            return self._slots.index(entry_id)
+        if None in self._slots:
+            slot = self._slots.index(None)
+            self._slots[slot] = entry_id
+        else:
+            slot = len(self._slots)
+            self._slots.append(entry_id)
+        return slot
+
+    def release(self, entry_id: str) -> bool:
+        """Stop using the account for an entry, returning if it is no longer in use."""
+        if entry_id in self._slots:
+            self._slots[self._slots.index(entry_id)] = None
+        return not self.in_use
+
+    @property
+    def in_use(self) -> bool:
+        """Whether any entry is using the account."""
+        return any(self._slots)
+
+    @staticmethod
+    def get_poll_offset(slot: int, scan_interval: int) -> int:
+        """Get how many seconds into the scan interval a poll slot polls at."""
+        return slot * POLL_STAGGER_SEC % scan_interval
+
+
+def async_get_account(
+    hass: HomeAssistant, email: str, password: str
+) -> DukeEnergyAccount:
+    """Get the shared account for the credentials, creating it if needed."""
+    accounts: dict[str, DukeEnergyAccount] = hass.data.setdefault(DATA_ACCOUNTS, {})
+    key = email.lower()
+    account = accounts.get(key)
+    if account is None or not account.matches(password):
+        _LOGGER.debug("Creating shared Duke Energy account for %s", email)
+        account = accounts[key] = DukeEnergyAccount(hass, email, password)
+    elif account.unsub_remove is not None:
+        # Picked back up before it was removed, e.g. by an entry reloading
+        account.unsub_remove()
+        account.unsub_remove = None
+    return account
+
+
+def async_release_account(
+    hass: HomeAssistant, account: DukeEnergyAccount, entry_id: Optional[str]
+):
+    """Stop using an account for an entry, removing it a little while after no entries use it.
+
+    Until then an entry that is reloading, e.g. for changed options, re-uses the account's login.
+    """
+    if not account.release(entry_id) or account.unsub_remove is not None:
+        return
+
+    @callback
+    def async_remove(_now):
+        account.unsub_remove = None
+        accounts: dict[str, DukeEnergyAccount] = hass.data.get(DATA_ACCOUNTS, {})
+        if not account.in_use and accounts.get(account.email.lower()) is account:
+            _LOGGER.debug("Removing shared Duke Energy account for %s", account.email)
+            accounts.pop(account.email.lower())
+
+    account.unsub_remove = async_call_later(
+        hass, ACCOUNT_RELEASE_GRACE_SEC, async_remove
+    )
+
+
+async def async_discover_meters(
+    client: DukeEnergyApi,
+) -> "list[tuple[MeterInfo, GatewayStatus]]":
+    """Find every smart meter with gateway access on the client's accounts."""
+    found = []
+    for account in await client.get_account_list():
+        try:
+            account_details = await client.get_account_details(account)
+        except Exception as exception:  # pylint: disable=broad-except
+            _LOGGER.debug(
+                "Failed to get meters on account '%s': %s",
+                account.src_acct_id,
+                exception,
+            )
+            continue
+
+        for meter in account_details.meter_infos:
+            if not (
+                meter.serial_num  # sometimes blank meters show up
+                and meter.meter_type.upper() == "ELECTRIC"
+                and meter.is_certified_smart_meter
+            ):
+                continue
+            try:
+                client.select_meter(meter)
+                gateway = await client.get_gateway_status()
+            except Exception as exception:  # pylint: disable=broad-except
+                _LOGGER.debug(
+                    "Failed to check meter '%s' for a gateway: %s",
+                    meter.serial_num,
+                    exception,
+                )
+                continue
+            if gateway is not None:
+                _LOGGER.debug(
+                    "Found meter '%s' with gateway '%s'", meter.serial_num, gateway.id
+                )
+                found.append((meter, gateway))
+
+    client.reset_selected_meter()
+    return found
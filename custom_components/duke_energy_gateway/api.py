@@ -0,0 +1,297 @@
+"""Duke Energy API access shared by everything that uses an account: its login, recent responses and requests in flight."""
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import Hashable
+
+from pyduke_energy.client import DukeEnergyClient
+from pyduke_energy.types import Account
+from pyduke_energy.types import AccountDetails
+from pyduke_energy.types import GatewayStatus
+from pyduke_energy.types import MeterInfo
+from pyduke_energy.types import UsageMeasurement
+
+# How long responses that rarely change (accounts, meters and gateways) are re-used for
+API_CACHE_TTL_SEC = 300
+
+# Consecutive usage request failures that open the circuit breaker, and how long it stays open for.
+# Each time a probe fails it stays open for twice as long, up to the maximum, less up to half for jitter.
+BREAKER_FAILURE_THRESHOLD = 3
+BREAKER_OPEN_MIN_SEC = 120
+BREAKER_OPEN_MAX_SEC = 1800
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class SingleFlight:
+    """Runs one call at a time per key, with callers for a key that is already in flight sharing its result."""
+
+    def __init__(self):
+        self._calls: dict[Hashable, asyncio.Future] = {}
+        self.coalesced = 0  # calls that shared another's result
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Run func() for the key, or wait for the result of the call already running for it."""
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(func())
+            self._calls[key] = future
+            future.add_done_callback(lambda _: self._calls.pop(key, None))
+        else:
+            self.coalesced += 1
+        # Shielded, so one caller being cancelled doesn't cancel the call for the others
+        return await asyncio.shield(future)
+
+
+class ResponseCache:
+    """Responses by key, each re-used until it is `ttl_sec` old."""
+
+    def __init__(self, ttl_sec: float):
+        self.ttl_sec = ttl_sec
+        self._responses: dict[Hashable, tuple[float, Any]] = {}
+        self.hits = 0
+
+    def get(self, key: Hashable) -> Any:
+        """Get the response for the key, or None if there isn't one or it has expired."""
+        cached = self._responses.get(key)
+        if cached is None:
+            return None
+        if time.monotonic() >= cached[0]:
+            del self._responses[key]
+            return None
+        self.hits += 1
+        return cached[1]
+
+    def set(self, key: Hashable, response: Any):
+        """Cache the response for the key."""
+        self._responses[key] = (time.monotonic() + self.ttl_sec, response)
+
+    def clear(self):
+        """Drop every response."""
+        self._responses.clear()
+
+
+class CircuitOpenError(Exception):
+    """A request wasn't made because the API has been failing."""
+
+    def __init__(self, retry_in_sec: float):
+        super().__init__(f"Duke Energy API is failing, retrying in {retry_in_sec:.0f}s")
+        self.retry_in_sec = retry_in_sec
+
+
+class CircuitBreaker:
+    """Stops requests to an API that keeps failing, letting a single request through now and then to probe it.
+
+    Closed, requests go through. After `BREAKER_FAILURE_THRESHOLD` consecutive failures it opens, and
+    requests fail straight away with `CircuitOpenError` until its backoff has passed. Then it is half
+    open, and the next request is let through as a probe while the rest keep failing. The probe
+    succeeding closes it, and failing opens it again for longer.
+    """
+
+    def __init__(self):
+        self.state = BREAKER_CLOSED
+        self.failures = 0  # consecutive
+        self.trips = 0  # consecutive times opened, for the backoff
+        self.retry_at = 0.0  # monotonic time the next probe is allowed
+        self.rejected = 0  # requests not made while open
+
+    @property
+    def retry_in_sec(self) -> float:
+        """Seconds until the next probe is allowed, or 0 if requests are allowed now."""
+        if self.state != BREAKER_OPEN:
+            return 0.0
+        return max(self.retry_at - time.monotonic(), 0.0)
+
+    async def call(self, func: Callable[[], Awaitable[Any]], record: bool = True) -> Any:
+        """Run func() unless the circuit is open, recording whether it failed.
+
+        Requests that aren't recorded, e.g. background ones, are only made while the circuit is
+        closed, and neither open it nor probe it.
+        """
+        if not record:
+            if self.state != BREAKER_CLOSED:
+                self.rejected += 1
+                raise CircuitOpenError(self.retry_in_sec)
+            return await func()
+
+        if self.state == BREAKER_OPEN and time.monotonic() >= self.retry_at:
+            _LOGGER.debug("Probing the Duke Energy API")
+            self.state = BREAKER_HALF_OPEN
+            probe = True
+        elif self.state == BREAKER_CLOSED:
+            probe = False
+        else:
+            self.rejected += 1
+            raise CircuitOpenError(self.retry_in_sec)
+
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            if probe:
+                # No answer either way, so let the next request probe instead
+                self.state = BREAKER_OPEN
+            raise
+        except Exception:
+            self._record_failure(probe)
+            raise
+        self._record_success()
+        return result
+
+    def as_dict(self) -> dict:
+        """Get the state of the breaker, e.g. for diagnostics."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "retry_in_sec": self.retry_in_sec,
+            "rejected_requests": self.rejected,
+        }
+
+    def _record_success(self):
+        if self.state != BREAKER_CLOSED:
+            _LOGGER.info("Duke Energy API has recovered")
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.trips = 0
+
+    def _record_failure(self, probe: bool):
+        if self.state != BREAKER_CLOSED and not probe:
+            # Made before the breaker opened, so it doesn't say anything new about the API
+            return
+        self.failures += 1
+        if probe or self.failures >= BREAKER_FAILURE_THRESHOLD:
+            self.trips += 1
+            backoff = min(
+                BREAKER_OPEN_MIN_SEC * 2 ** (self.trips - 1), BREAKER_OPEN_MAX_SEC
+            )
+            backoff *= random.uniform(0.5, 1.0)
+            self.state = BREAKER_OPEN
+            self.retry_at = time.monotonic() + backoff
+            _LOGGER.warning(
+                "Duke Energy API failed %d times in a row, pausing requests for %.0fs",
+                self.failures,
+                backoff,
+            )
+
+
+class DukeEnergyApi:
+    """Wraps a `DukeEnergyClient` for one meter, or for the account itself, sharing with the account's other clients.
+
+    Clients created with `create_meter_api` share the account's OAuth token, log in through one
+    request at a time, and share its cache of account, meter and gateway responses. Identical
+    requests made while one is already in flight wait for its result instead of calling the API
+    again, e.g. the coordinator and a backfill asking for the same usage. Usage requests for the
+    account's meters go through one circuit breaker, so an outage pauses all of them.
+    """
+
+    def __init__(
+        self,
+        client: DukeEnergyClient,
+        requests: SingleFlight = None,
+        cache: ResponseCache = None,
+        breaker: CircuitBreaker = None,
+    ):
+        self.client = client
+        self.requests = requests or SingleFlight()
+        self.cache = cache or ResponseCache(API_CACHE_TTL_SEC)
+        self.breaker = breaker or CircuitBreaker()
+        self.meter_id: str = None
+
+    def create_meter_api(self, client: DukeEnergyClient) -> "DukeEnergyApi":
+        """Wrap another client on the same account, sharing this one's OAuth login, cache and requests."""
+        # pyduke-energy keeps the OAuth token on each client, so share ours to log in once per account.
+        # The gateway token is per meter, so that stays with the client.
+        client._oauth_auth_info = (  # pylint: disable=protected-access
+            self.client._oauth_auth_info  # pylint: disable=protected-access
+        )
+        return DukeEnergyApi(client, self.requests, self.cache, self.breaker)
+
+    async def async_login(self):
+        """Log in to the account if its OAuth token is missing or expiring, once for all of its clients."""
+        auth_info = self.client._oauth_auth_info  # pylint: disable=protected-access
+        if auth_info.needs_new_access_token():
+            _LOGGER.debug("Logging in to Duke Energy")
+            await self.requests.run(
+                "login",
+                self.client._oauth_login,  # pylint: disable=protected-access
+            )
+
+    def select_meter(self, meter: MeterInfo):
+        """Select the meter that gateway requests are for."""
+        self.client.select_meter(meter)
+        self.meter_id = meter.serial_num
+
+    def reset_selected_meter(self):
+        """Clear the selected meter."""
+        self.client.reset_selected_meter()
+        self.meter_id = None
+
+    async def select_default_meter(self) -> "tuple[MeterInfo, GatewayStatus]":
+        """Select the first meter on the account with a gateway."""
+        await self.async_login()
+        meter, gateway = await self.client.select_default_meter()
+        self.meter_id = meter.serial_num if meter else None
+        return meter, gateway
+
+    async def get_account_list(self) -> "list[Account]":
+        """Get the accounts for the login."""
+        return await self._cached("accounts", self.client.get_account_list)
+
+    async def get_account_details(self, account: Account) -> AccountDetails:
+        """Get the details of an account, including its meters."""
+        return await self._cached(
+            ("account_details", account.src_acct_id),
+            lambda: self.client.get_account_details(account),
+        )
+
+    async def get_gateway_status(self) -> GatewayStatus:
+        """Get the status of the selected meter's gateway."""
+        return await self._cached(
+            ("gateway_status", self.meter_id), self.client.get_gateway_status
+        )
+
+    async def get_gateway_usage(
+        self, range_start: datetime, range_end: datetime, background: bool = False
+    ) -> "list[UsageMeasurement]":
+        """Get the selected meter's minute usage over a range of time. This isn't cached, but identical requests in flight are shared.
+
+        Raises `CircuitOpenError` without calling the API while it is failing. Failures of
+        background requests, e.g. fetching past days, aren't counted by the circuit breaker, so
+        they can't hold up the polls for live usage.
+        """
+
+        async def async_get_usage():
+            await self.async_login()
+            return await self.client.get_gateway_usage(range_start, range_end)
+
+        # The breaker is inside the shared request, so a failure is only counted once
+        return await self.requests.run(
+            ("usage", self.meter_id, range_start, range_end, background),
+            lambda: self.breaker.call(async_get_usage, record=not background),
+        )
+
+    def as_dict(self) -> dict:
+        """Get the counters of the account's shared cache and requests, e.g. for diagnostics."""
+        return {
+            "cache_hits": self.cache.hits,
+            "coalesced_requests": self.requests.coalesced,
+            "breaker": self.breaker.as_dict(),
+        }
+
+    async def _cached(self, key: Hashable, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Get a response from the cache, or from func() through the requests in flight."""
+        response = self.cache.get(key)
+        if response is not None:
+            return response
+        await self.async_login()
+        response = await self.requests.run(key, func)
+        self.cache.set(key, response)
+        return response
@@ -0,0 +1,237 @@
+"""Backfill of Duke Energy Gateway usage history into Home Assistant long-term statistics."""
+import asyncio
+import logging
+from datetime import date
+from datetime import datetime
+from datetime import timedelta
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData
+from homeassistant.components.recorder.models import StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.components.recorder.statistics import get_last_statistics
+from homeassistant.components.recorder.statistics import statistics_during_period
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt
+from homeassistant.util import slugify
+from pyduke_energy.types import UsageMeasurement
+
+from .const import DOMAIN
+from .const import NAME
+from .coordinator import DukeEnergyGatewayUsageDataUpdateCoordinator
+
+# Number of days fetched from the API at once. This also bounds how much minute data is held in memory.
+BACKFILL_CONCURRENCY = 4
+
+# How far back to look for an existing statistic to continue the sum from
+BACKFILL_SUM_LOOKBACK = timedelta(days=30)
+
+# Period of statistics read at once when shifting the sums after an imported range
+BACKFILL_REBASE_PAGE = timedelta(days=30)
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+def get_statistic_id(coordinator: DukeEnergyGatewayUsageDataUpdateCoordinator) -> str:
+    """Get the ID of the external statistic usage is imported into for a gateway."""
+    return f"{DOMAIN}:{slugify(coordinator.gateway.id)}_energy_consumption"
+
+
+async def async_import_statistics(
+    hass: HomeAssistant,
+    coordinator: DukeEnergyGatewayUsageDataUpdateCoordinator,
+    start_date: date,
+    end_date: date,
+):
+    """Import hourly usage for each local day from start_date through end_date (inclusive)."""
+    statistic_id = get_statistic_id(coordinator)
+    metadata = StatisticMetaData(
+        has_mean=False,
+        has_sum=True,
+        name=f"{NAME} {coordinator.gateway.id} Energy Consumption",
+        source=DOMAIN,
+        statistic_id=statistic_id,
+        unit_of_measurement="kWh",
+    )
+
+    usage_sum = await _async_get_sum_before(
+        hass, statistic_id, dt.start_of_local_day(start_date)
+    )
+    _LOGGER.debug(
+        "Importing statistics for %s from %s to %s, starting at sum %f",
+        statistic_id,
+        start_date,
+        end_date,
+        usage_sum,
+    )
+
+    # Only hourly statistics are kept until every day has been fetched, so nothing is written if
+    # any day fails and the sums after the range stay consistent
+    days = [
+        start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)
+    ]
+    statistics = []
+    for chunk_start in range(0, len(days), BACKFILL_CONCURRENCY):
+        chunk = days[chunk_start : chunk_start + BACKFILL_CONCURRENCY]
+        days_usage = await asyncio.gather(
+            *[coordinator.async_get_day_usage(day) for day in chunk]
+        )
+
+        for day, day_usage in zip(chunk, days_usage):
+            # Save fetching closed days again for the period sensors
+            coordinator.record_closed_day(day, day_usage)
+            for hour_start, hour_usage in _usage_by_hour(day_usage):
+                usage_sum += hour_usage
+                statistics.append(
+                    StatisticData(start=hour_start, state=hour_usage, sum=usage_sum)
+                )
+        _LOGGER.debug(
+            "Fetched %d hours of statistics for %s through %s",
+            len(statistics),
+            statistic_id,
+            chunk[-1],
+        )
+
+    if statistics:
+        async_add_external_statistics(hass, metadata, statistics)
+    await _async_rebase_later_statistics(
+        hass, metadata, dt.start_of_local_day(end_date + timedelta(days=1)), usage_sum
+    )
+
+
+async def async_backfill_statistics(
+    hass: HomeAssistant,
+    coordinator: DukeEnergyGatewayUsageDataUpdateCoordinator,
+    days: int,
+):
+    """Import statistics for the last number of days that have not already been imported."""
+    today = dt.now().date()
+    start_date = today - timedelta(days=days)
+
+    # Continue from the last imported day, re-importing it in case it was incomplete
+    statistic_id = get_statistic_id(coordinator)
+    last_stats = await get_instance(hass).async_add_executor_job(
+        get_last_statistics, hass, 1, statistic_id, True, {"sum"}
+    )
+    if last_stats.get(statistic_id):
+        last_end = _row_start(last_stats[statistic_id][0]) + timedelta(hours=1)
+        start_date = max(start_date, dt.as_local(last_end).date())
+
+    end_date = today - timedelta(days=1)  # only closed days
+    if start_date > end_date:
+        _LOGGER.debug("Statistics for %s are already up to date", statistic_id)
+        return
+
+    try:
+        await async_import_statistics(hass, coordinator, start_date, end_date)
+    except Exception as exception:  # pylint: disable=broad-except
+        _LOGGER.error("Failed to backfill usage statistics: %s", exception)
+
+
+async def _async_get_sum_before(
+    hass: HomeAssistant, statistic_id: str, start_time: datetime
+) -> float:
+    """Get the sum of the last statistic before the start time, so imported sums continue from it."""
+    stats = await get_instance(hass).async_add_executor_job(
+        statistics_during_period,
+        hass,
+        start_time - BACKFILL_SUM_LOOKBACK,
+        start_time,
+        {statistic_id},
+        "hour",
+        None,
+        {"sum"},
+    )
+    rows = stats.get(statistic_id)
+    if not rows:
+        # Nothing recent, so fall back to the latest statistic if it is before the start time
+        stats = await get_instance(hass).async_add_executor_job(
+            get_last_statistics, hass, 1, statistic_id, True, {"sum"}
+        )
+        rows = [
+            row for row in stats.get(statistic_id, []) if _row_start(row) < start_time
+        ]
+    if not rows:
+        return 0.0
+    return rows[-1]["sum"] or 0.0
+
+
+async def _async_rebase_later_statistics(
+    hass: HomeAssistant,
+    metadata: StatisticMetaData,
+    start_time: datetime,
+    usage_sum: float,
+):
+    """Re-import the statistics from the start time onwards so their sums continue from usage_sum.
+
+    Otherwise importing before existing statistics, or re-importing a range with different
+    usage, leaves a jump in the sum where the range ends. The statistics are read a page at a time.
+    """
+    statistic_id = metadata["statistic_id"]
+    offset = None
+    page_start = start_time
+    now = dt.utcnow()
+    while page_start <= now:
+        page_end = page_start + BACKFILL_REBASE_PAGE
+        stats = await get_instance(hass).async_add_executor_job(
+            statistics_during_period,
+            hass,
+            page_start,
+            page_end,
+            {statistic_id},
+            "hour",
+            None,
+            {"state", "sum"},
+        )
+        rows = stats.get(statistic_id)
+        page_start = page_end
+        if not rows:
+            continue
+        if offset is None:
+            # The first later statistic's sum, less its own usage, is the sum it continued from
+            first = rows[0]
+            offset = usage_sum - ((first["sum"] or 0.0) - (first["state"] or 0.0))
+            if abs(offset) < 1e-9:
+                return
+            _LOGGER.debug(
+                "Shifting the sums of statistics for %s after %s by %f",
+                statistic_id,
+                start_time,
+                offset,
+            )
+        async_add_external_statistics(
+            hass,
+            metadata,
+            [
+                StatisticData(
+                    start=_row_start(row),
+                    state=row["state"],
+                    sum=(row["sum"] or 0.0) + offset,
+                )
+                for row in rows
+            ],
+        )
+
+
+def _usage_by_hour(measurements: "list[UsageMeasurement]"):
+    """Roll sorted minute usage (Wh) up into (hour start, kWh) pairs."""
+    hour_start = None
+    hour_usage = 0.0
+    for measurement in measurements:
+        measurement_hour = measurement.timestamp - measurement.timestamp % 3600
+        if measurement_hour != hour_start:
+            if hour_start is not None:
+                yield dt.utc_from_timestamp(hour_start), hour_usage / 1000
+            hour_start = measurement_hour
+            hour_usage = 0.0
+        hour_usage += measurement.usage or 0
+    if hour_start is not None:
+        yield dt.utc_from_timestamp(hour_start), hour_usage / 1000
+
+
+def _row_start(row: dict) -> datetime:
+    """Get the start of a statistics row, which is a timestamp in newer versions of Home Assistant."""
+    start = row["start"]
+    if isinstance(start, datetime):
+        return start
+    return dt.utc_from_timestamp(start)
@@ -0,0 +1,251 @@
+"""Republishing of the real-time stream to local consumers, over MQTT or a websocket, each behind a bounded buffer."""
+import asyncio
+import json
+import logging
+from collections import deque
+from http import HTTPStatus
+from typing import Any
+from typing import Awaitable
+from typing import Callable
+from typing import TYPE_CHECKING
+
+from aiohttp import web
+from homeassistant.components.http import HomeAssistantView
+from homeassistant.core import callback
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+from .const import REALTIME_MODE_RAW
+from .loader import async_import
+
+if TYPE_CHECKING:
+    from .coordinator import DukeEnergyGatewayUsageDataUpdateCoordinator
+
+# Measurements held for a consumer that isn't keeping up, after which the oldest are dropped
+BRIDGE_BUFFER_SIZE = 100
+
+BRIDGE_WEBSOCKET_URL = "/api/duke_energy_gateway/realtime/{gateway_id}"
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class BufferedSender:
+    """Sends payloads to one consumer from its own task, through a buffer that drops the oldest when full.
+
+    `put` only appends to the buffer, so a consumer that is slow or has stalled never holds up the
+    real-time message handler or the other consumers. It just misses the oldest measurements.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        send: Callable[[str], Awaitable[Any]],
+        size: int = BRIDGE_BUFFER_SIZE,
+        on_stop: Callable[[], None] = None,
+    ):
+        self.name = name
+        self._send = send
+        self._on_stop = on_stop
+        self._buffer: deque[str] = deque(maxlen=size)
+        self._ready = asyncio.Event()
+        self._task: asyncio.Task = None
+        self.sent = 0
+        self.dropped = 0
+        self.errors = 0
+
+    def start(self):
+        """Start sending buffered payloads."""
+        self._task = asyncio.create_task(self._async_run())
+
+    def stop(self):
+        """Stop sending, dropping anything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self._buffer.clear()
+        if self._on_stop is not None:
+            self._on_stop()
+
+    @callback
+    def put(self, payload: str):
+        """Buffer a payload to send, dropping the oldest if the buffer is full."""
+        buffer = self._buffer
+        if len(buffer) == buffer.maxlen:
+            self.dropped += 1
+        buffer.append(payload)
+        self._ready.set()
+
+    async def _async_run(self):
+        buffer = self._buffer
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            while buffer:
+                try:
+                    await self._send(buffer.popleft())
+                except Exception as exception:  # pylint: disable=broad-except
+                    self.errors += 1
+                    _LOGGER.debug(
+                        "Failed to republish real-time usage to %s: %s",
+                        self.name,
+                        exception,
+                    )
+                    continue
+                self.sent += 1
+
+    def as_dict(self) -> dict:
+        """Get the state of the sender, e.g. for diagnostics."""
+        return {
+            "name": self.name,
+            "buffered": len(self._buffer),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "errors": self.errors,
+        }
+
+
+class RealtimeBridge:
+    """Republishes a gateway's real-time measurements to any number of local consumers.
+
+    The bridge is a single subscriber to the coordinator's real-time stream, so every consumer shares
+    the one connection to Duke Energy, and each measurement is serialized once for all of them. It is
+    only subscribed while it has consumers.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        coordinator: "DukeEnergyGatewayUsageDataUpdateCoordinator",
+        websocket: bool,
+    ):
+        self.hass = hass
+        self.coordinator = coordinator
+        self.websocket = websocket  # if websocket consumers can connect
+        self.senders: list[BufferedSender] = []
+        self._unsubscribe: Callable[[], None] = None
+        self._mqtt_task: asyncio.Task = None
+
+    @callback
+    def add(self, sender: BufferedSender) -> Callable[[], None]:
+        """Start republishing to a consumer, returning a function that stops it."""
+        self.senders.append(sender)
+        sender.start()
+        _LOGGER.debug("Republishing real-time usage to %s", sender.name)
+        if self._unsubscribe is None:
+            self._unsubscribe = self.coordinator.async_realtime_subscribe(
+                RealtimeBridge.__name__,
+                self._async_on_measurement,
+                mode=REALTIME_MODE_RAW,
+            )
+
+        @callback
+        def async_remove():
+            if sender not in self.senders:
+                return
+            self.senders.remove(sender)
+            sender.stop()
+            _LOGGER.debug("Stopped republishing real-time usage to %s", sender.name)
+            if not self.senders and self._unsubscribe is not None:
+                self._unsubscribe()
+                self._unsubscribe = None
+
+        return async_remove
+
+    @callback
+    def start_mqtt(self, topic: str):
+        """Republish to a topic on the broker of Home Assistant's MQTT integration, once it is set up."""
+        self._mqtt_task = self.hass.async_create_task(self._async_start_mqtt(topic))
+
+    async def _async_start_mqtt(self, topic: str):
+        await async_import(self.hass, "homeassistant.components.mqtt")
+        # pylint: disable-next=import-outside-toplevel
+        from homeassistant.components import mqtt
+
+        if not await mqtt.async_wait_for_mqtt_client(self.hass):
+            _LOGGER.error(
+                "Can't republish real-time usage to '%s' as MQTT is not set up", topic
+            )
+            return
+
+        async def async_publish(payload: str):
+            await mqtt.async_publish(self.hass, topic, payload)
+
+        self._mqtt_task = None
+        self.add(BufferedSender(f"mqtt:{topic}", async_publish))
+
+    @callback
+    def async_stop(self):
+        """Stop republishing to every consumer."""
+        if self._mqtt_task is not None:
+            self._mqtt_task.cancel()
+            self._mqtt_task = None
+        for sender in self.senders:
+            sender.stop()
+        self.senders.clear()
+        if self._unsubscribe is not None:
+            self._unsubscribe()
+            self._unsubscribe = None
+
+    @callback
+    def _async_on_measurement(self, measurement):
+        payload = json.dumps(
+            {
+                "gateway": self.coordinator.gateway.id,
+                "timestamp": measurement.timestamp,
+                "usage": measurement.usage,
+            }
+        )
+        for sender in self.senders:
+            sender.put(payload)
+
+    def as_dict(self) -> dict:
+        """Get the consumers and their counters, e.g. for diagnostics."""
+        return {
+            "websocket": self.websocket,
+            "consumers": [sender.as_dict() for sender in self.senders],
+        }
+
+
+class RealtimeBridgeView(HomeAssistantView):
+    """Websocket that streams a gateway's real-time measurements as JSON, one message per measurement.
+
+    It uses Home Assistant's authentication, so consumers connect with a long-lived access token.
+    Consumers only listen: anything they send is ignored.
+    """
+
+    url = BRIDGE_WEBSOCKET_URL
+    name = f"api:{DOMAIN}:realtime"
+
+    async def get(self, request: web.Request, gateway_id: str) -> web.StreamResponse:
+        """Stream the gateway's real-time measurements until the consumer disconnects."""
+        hass: HomeAssistant = request.app["hass"]
+        bridge = next(
+            (
+                data["coordinator"].bridge
+                for data in hass.data.get(DOMAIN, {}).values()
+                if data["gateway"].id == gateway_id
+            ),
+            None,
+        )
+        if bridge is None or not bridge.websocket:
+            return self.json_message(
+                "Real-time republishing is not enabled for this gateway",
+                HTTPStatus.NOT_FOUND,
+            )
+
+        websocket = web.WebSocketResponse(heartbeat=55)
+        await websocket.prepare(request)
+        # The websocket is closed if the bridge stops first, e.g. when the entry is reloaded
+        remove = bridge.add(
+            BufferedSender(
+                f"websocket:{request.remote}",
+                websocket.send_str,
+                on_stop=lambda: hass.async_create_task(websocket.close()),
+            )
+        )
+        try:
+            async for _message in websocket:
+                pass
+        finally:
+            remove()
+        return websocket
@@ -1,15 +1,48 @@
 """Adds config flow for Duke Energy Gateway."""
+from typing import TYPE_CHECKING
+
 import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import callback
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
-from pyduke_energy.client import DukeEnergyClient
 
+from .const import CONF_BACKFILL_DAYS
+from .const import CONF_BACKFILL_DAYS_DEFAULT
+from .const import CONF_BILLING_DAY
+from .const import CONF_BILLING_DAY_DEFAULT
 from .const import CONF_EMAIL
+from .const import CONF_EXPORT_DIRECTORY
+from .const import CONF_EXPORT_DIRECTORY_DEFAULT
+from .const import CONF_METER
 from .const import CONF_PASSWORD
+from .const import CONF_POLL_INTERVAL_MAX
+from .const import CONF_POLL_INTERVAL_MAX_DEFAULT_SEC
+from .const import CONF_POLL_INTERVAL_MIN
+from .const import CONF_POLL_INTERVAL_MIN_DEFAULT_SEC
+from .const import CONF_REALTIME_DEADBAND
+from .const import CONF_REALTIME_DEADBAND_DEFAULT_W
+from .const import CONF_REALTIME_DEADBAND_PERCENT
+from .const import CONF_REALTIME_DEADBAND_PERCENT_DEFAULT
+from .const import CONF_REALTIME_HEARTBEAT
+from .const import CONF_REALTIME_HEARTBEAT_DEFAULT_SEC
 from .const import CONF_REALTIME_INTERVAL
 from .const import CONF_REALTIME_INTERVAL_DEFAULT_SEC
+from .const import CONF_REALTIME_MODE
+from .const import CONF_REALTIME_MODE_DEFAULT
+from .const import CONF_REPUBLISH_MQTT_TOPIC
+from .const import CONF_REPUBLISH_MQTT_TOPIC_DEFAULT
+from .const import CONF_REPUBLISH_WEBSOCKET
+from .const import CONF_REPUBLISH_WEBSOCKET_DEFAULT
+from .const import CONF_TARIFF
+from .const import CONF_TARIFF_DEFAULT
 from .const import DOMAIN
+from .const import REALTIME_MODE_AGGREGATE
+from .const import REALTIME_MODE_SAMPLE
+from .loader import async_import
+from .tariff import Tariff
+
+if TYPE_CHECKING:
+    from pyduke_energy.types import GatewayStatus
+    from pyduke_energy.types import MeterInfo
 
 
 class DukeEnergyGatewayFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
@@ -21,23 +54,32 @@ class DukeEnergyGatewayFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     def __init__(self):
         """Initialize."""
         self._errors = {}
+        self._user_input = {}
+        self._meters: "dict[str, tuple[MeterInfo, GatewayStatus]]" = {}
 
     async def async_step_user(self, user_input=None):
         """Handle a flow initialized by the user."""
         self._errors = {}
 
-        # Uncomment the next 2 lines if only a single instance of the integration is allowed:
-        if self._async_current_entries():
-            return self.async_abort(reason="single_instance_allowed")
-
         if user_input is not None:
-            valid = await self._test_credentials(
+            meters = await self._discover_meters(
                 user_input[CONF_EMAIL], user_input[CONF_PASSWORD]
             )
-            if valid:
-                return self.async_create_entry(
-                    title=user_input[CONF_EMAIL], data=user_input
-                )
+            if meters is not None:
+                self._user_input = user_input
+                configured = self._configured_meters()
+                self._meters = {
+                    meter.serial_num: (meter, gateway)
+                    for meter, gateway in meters
+                    if meter.serial_num not in configured
+                }
+                if not self._meters:
+                    return self.async_abort(
+                        reason="already_configured" if meters else "no_meters"
+                    )
+                if len(self._meters) == 1:
+                    return await self._create_meter_entry(next(iter(self._meters)))
+                return await self.async_step_meter()
             else:
                 self._errors["base"] = "auth"
 
@@ -45,6 +87,25 @@ class DukeEnergyGatewayFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
         return await self._show_config_form(user_input)
 
+    async def async_step_meter(self, user_input=None):
+        """Handle choosing which meter to set up when the account has several."""
+        if user_input is not None:
+            return await self._create_meter_entry(user_input[CONF_METER])
+
+        return self.async_show_form(
+            step_id="meter",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(CONF_METER): vol.In(
+                        {
+                            serial_num: f"{serial_num} (gateway {gateway.id})"
+                            for serial_num, (_, gateway) in self._meters.items()
+                        }
+                    )
+                }
+            ),
+        )
+
     @staticmethod
     @callback
     def async_get_options_flow(config_entry):
@@ -60,16 +121,40 @@ class DukeEnergyGatewayFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             errors=self._errors,
         )
 
-    async def _test_credentials(self, email, password):
-        """Return true if credentials is valid."""
+    async def _create_meter_entry(self, serial_num: str):
+        """Create the entry for a meter."""
+        await self.async_set_unique_id(serial_num)
+        self._abort_if_unique_id_configured()
+        return self.async_create_entry(
+            title=f"{self._user_input[CONF_EMAIL]} ({serial_num})",
+            data={**self._user_input, CONF_METER: serial_num},
+        )
+
+    def _configured_meters(self) -> "set[str]":
+        """Get the meters that already have an entry, including entries from before meters were chosen."""
+        configured = {entry.unique_id for entry in self._async_current_entries()}
+        for data in self.hass.data.get(DOMAIN, {}).values():
+            configured.add(data["meter"].serial_num)
+        return configured
+
+    async def _discover_meters(self, email, password):
+        """Return the meters with gateway access on the account, or None if the credentials are invalid."""
+        # Showing the forms doesn't need the API client, so it is only imported to check a login
+        await async_import(self.hass, f"{__package__}.account")
+        # pylint: disable=import-outside-toplevel
+        from .account import async_discover_meters
+        from .account import async_get_account
+        from .account import async_release_account
+
+        # pylint: enable=import-outside-toplevel
+
+        # The shared account keeps the login and responses, so setting up the entry can re-use them
+        account = async_get_account(self.hass, email, password)
         try:
-            session = async_create_clientsession(self.hass)
-            client = DukeEnergyClient(email, password, session)
-            account_list = await client.get_account_list()
-            return account_list and len(account_list) > 0
+            return await async_discover_meters(account.api)
         except Exception:  # pylint: disable=broad-except
-            pass
-        return False
+            async_release_account(self.hass, account, None)
+        return None
 
 
 class DukeEnergyGatewayOptionsFlowHandler(config_entries.OptionsFlow):
@@ -93,6 +178,34 @@ class DukeEnergyGatewayOptionsFlowHandler(config_entries.OptionsFlow):
         realtime_interval = self.options.get(
             CONF_REALTIME_INTERVAL, CONF_REALTIME_INTERVAL_DEFAULT_SEC
         )
+        realtime_mode = self.options.get(CONF_REALTIME_MODE, CONF_REALTIME_MODE_DEFAULT)
+        realtime_deadband = self.options.get(
+            CONF_REALTIME_DEADBAND, CONF_REALTIME_DEADBAND_DEFAULT_W
+        )
+        realtime_deadband_percent = self.options.get(
+            CONF_REALTIME_DEADBAND_PERCENT, CONF_REALTIME_DEADBAND_PERCENT_DEFAULT
+        )
+        realtime_heartbeat = self.options.get(
+            CONF_REALTIME_HEARTBEAT, CONF_REALTIME_HEARTBEAT_DEFAULT_SEC
+        )
+        poll_interval_min = self.options.get(
+            CONF_POLL_INTERVAL_MIN, CONF_POLL_INTERVAL_MIN_DEFAULT_SEC
+        )
+        poll_interval_max = self.options.get(
+            CONF_POLL_INTERVAL_MAX, CONF_POLL_INTERVAL_MAX_DEFAULT_SEC
+        )
+        billing_day = self.options.get(CONF_BILLING_DAY, CONF_BILLING_DAY_DEFAULT)
+        tariff = self.options.get(CONF_TARIFF, CONF_TARIFF_DEFAULT)
+        backfill_days = self.options.get(CONF_BACKFILL_DAYS, CONF_BACKFILL_DAYS_DEFAULT)
+        export_directory = self.options.get(
+            CONF_EXPORT_DIRECTORY, CONF_EXPORT_DIRECTORY_DEFAULT
+        )
+        republish_mqtt_topic = self.options.get(
+            CONF_REPUBLISH_MQTT_TOPIC, CONF_REPUBLISH_MQTT_TOPIC_DEFAULT
+        )
+        republish_websocket = self.options.get(
+            CONF_REPUBLISH_WEBSOCKET, CONF_REPUBLISH_WEBSOCKET_DEFAULT
+        )
 
         return self.async_show_form(
             step_id="user",
@@ -102,6 +215,54 @@ class DukeEnergyGatewayOptionsFlowHandler(config_entries.OptionsFlow):
                         CONF_REALTIME_INTERVAL,
                         default=realtime_interval,
                     ): int,
+                    vol.Required(
+                        CONF_REALTIME_MODE,
+                        default=realtime_mode,
+                    ): vol.In([REALTIME_MODE_SAMPLE, REALTIME_MODE_AGGREGATE]),
+                    vol.Required(
+                        CONF_REALTIME_DEADBAND,
+                        default=realtime_deadband,
+                    ): int,
+                    vol.Required(
+                        CONF_REALTIME_DEADBAND_PERCENT,
+                        default=realtime_deadband_percent,
+                    ): int,
+                    vol.Required(
+                        CONF_REALTIME_HEARTBEAT,
+                        default=realtime_heartbeat,
+                    ): int,
+                    vol.Required(
+                        CONF_POLL_INTERVAL_MIN,
+                        default=poll_interval_min,
+                    ): int,
+                    vol.Required(
+                        CONF_POLL_INTERVAL_MAX,
+                        default=poll_interval_max,
+                    ): int,
+                    vol.Required(
+                        CONF_BILLING_DAY,
+                        default=billing_day,
+                    ): int,
+                    vol.Optional(
+                        CONF_TARIFF,
+                        default=tariff,
+                    ): str,
+                    vol.Required(
+                        CONF_BACKFILL_DAYS,
+                        default=backfill_days,
+                    ): int,
+                    vol.Optional(
+                        CONF_EXPORT_DIRECTORY,
+                        default=export_directory,
+                    ): str,
+                    vol.Optional(
+                        CONF_REPUBLISH_MQTT_TOPIC,
+                        default=republish_mqtt_topic,
+                    ): str,
+                    vol.Required(
+                        CONF_REPUBLISH_WEBSOCKET,
+                        default=republish_websocket,
+                    ): bool,
                 }
             ),
         )
@@ -113,6 +274,42 @@ class DukeEnergyGatewayOptionsFlowHandler(config_entries.OptionsFlow):
         )
         if update_interval < 0:
             return self.async_abort(reason="invalid_update_interval_value")
+        deadband = self.options.get(
+            CONF_REALTIME_DEADBAND, CONF_REALTIME_DEADBAND_DEFAULT_W
+        )
+        deadband_percent = self.options.get(
+            CONF_REALTIME_DEADBAND_PERCENT, CONF_REALTIME_DEADBAND_PERCENT_DEFAULT
+        )
+        if deadband < 0 or deadband_percent < 0:
+            return self.async_abort(reason="invalid_deadband_value")
+        heartbeat = self.options.get(
+            CONF_REALTIME_HEARTBEAT, CONF_REALTIME_HEARTBEAT_DEFAULT_SEC
+        )
+        if heartbeat < 0:
+            return self.async_abort(reason="invalid_heartbeat_value")
+        poll_interval_min = self.options.get(
+            CONF_POLL_INTERVAL_MIN, CONF_POLL_INTERVAL_MIN_DEFAULT_SEC
+        )
+        poll_interval_max = self.options.get(
+            CONF_POLL_INTERVAL_MAX, CONF_POLL_INTERVAL_MAX_DEFAULT_SEC
+        )
+        if poll_interval_min <= 0 or poll_interval_max < poll_interval_min:
+            return self.async_abort(reason="invalid_poll_interval_value")
+        billing_day = self.options.get(CONF_BILLING_DAY, CONF_BILLING_DAY_DEFAULT)
+        if not 1 <= billing_day <= 31:
+            return self.async_abort(reason="invalid_billing_day_value")
+        try:
+            Tariff.parse(self.options.get(CONF_TARIFF, CONF_TARIFF_DEFAULT))
+        except ValueError:
+            return self.async_abort(reason="invalid_tariff_value")
+        backfill_days = self.options.get(CONF_BACKFILL_DAYS, CONF_BACKFILL_DAYS_DEFAULT)
+        if backfill_days < 0:
+            return self.async_abort(reason="invalid_backfill_days_value")
+        republish_mqtt_topic = self.options.get(
+            CONF_REPUBLISH_MQTT_TOPIC, CONF_REPUBLISH_MQTT_TOPIC_DEFAULT
+        )
+        if "+" in republish_mqtt_topic or "#" in republish_mqtt_topic:
+            return self.async_abort(reason="invalid_mqtt_topic_value")
         return self.async_create_entry(
             title=self.config_entry.data.get(CONF_EMAIL), data=self.options
         )
@@ -3,6 +3,7 @@
 NAME = "Duke Energy Gateway"
 DOMAIN = "duke_energy_gateway"
 DOMAIN_DATA = f"{DOMAIN}_data"
+DATA_ACCOUNTS = f"{DOMAIN}_accounts"
 VERSION = "1.0.0"
 
 ATTRIBUTION = "Data provided by Duke Energy Unofficial API"
@@ -16,13 +17,48 @@ PLATFORMS = [SENSOR]
 CONF_ENABLED = "enabled"
 CONF_EMAIL = "email"
 CONF_PASSWORD = "password"
+CONF_METER = "meter"
 CONF_REALTIME_INTERVAL = "realtimeInterval"
 CONF_REALTIME_INTERVAL_DEFAULT_SEC = 0  # no throttling
+CONF_REALTIME_MODE = "realtimeMode"
+REALTIME_MODE_SAMPLE = "sample"  # send one measurement per interval, dropping the rest
+REALTIME_MODE_AGGREGATE = "aggregate"  # send a summary of all measurements per interval
+REALTIME_MODE_RAW = "raw"  # send every measurement, for subscribers that need them all
+CONF_REALTIME_MODE_DEFAULT = REALTIME_MODE_SAMPLE
+CONF_REALTIME_DEADBAND = "realtimeDeadband"
+CONF_REALTIME_DEADBAND_DEFAULT_W = 0  # write every change
+CONF_REALTIME_DEADBAND_PERCENT = "realtimeDeadbandPercent"
+CONF_REALTIME_DEADBAND_PERCENT_DEFAULT = 0  # write every change
+CONF_REALTIME_HEARTBEAT = "realtimeHeartbeat"
+CONF_REALTIME_HEARTBEAT_DEFAULT_SEC = 300
+CONF_POLL_INTERVAL_MIN = "pollIntervalMin"
+CONF_POLL_INTERVAL_MIN_DEFAULT_SEC = 60
+CONF_POLL_INTERVAL_MAX = "pollIntervalMax"
+CONF_POLL_INTERVAL_MAX_DEFAULT_SEC = 600
+CONF_BILLING_DAY = "billingCycleDay"
+CONF_BILLING_DAY_DEFAULT = 1  # billing cycles match calendar months
+CONF_TARIFF = "tariff"
+CONF_TARIFF_DEFAULT = ""  # no tariff, so no cost sensors
+CONF_BACKFILL_DAYS = "backfillDays"
+CONF_BACKFILL_DAYS_DEFAULT = 0  # no backfill
+CONF_EXPORT_DIRECTORY = "exportDirectory"
+CONF_EXPORT_DIRECTORY_DEFAULT = ""  # no export
+CONF_REPUBLISH_MQTT_TOPIC = "republishMqttTopic"
+CONF_REPUBLISH_MQTT_TOPIC_DEFAULT = ""  # not republished to MQTT
+CONF_REPUBLISH_WEBSOCKET = "republishWebsocket"
+CONF_REPUBLISH_WEBSOCKET_DEFAULT = False
 
 # Defaults
 DEFAULT_NAME = DOMAIN
 
-REALTIME_DISPATCH_SIGNAL = f"{DOMAIN}_realtime_dispatch_signal"
+REALTIME_STATUS_SIGNAL = f"{DOMAIN}_realtime_status_signal"
+# How often sensors derived from the real-time stream are written, whatever the real-time options
+REALTIME_DERIVED_INTERVAL_SEC = 60
+
+# Services
+SERVICE_IMPORT_STATISTICS = "import_statistics"
+ATTR_START_DATE = "start_date"
+ATTR_END_DATE = "end_date"
 
 STARTUP_MESSAGE = f"""
 -------------------------------------------------------------------
@@ -1,26 +1,75 @@
 """Data update coordinator for Duke Energy Gateway entities."""
 import asyncio
+import json
 import logging
+import random
+import threading
+import time
 from asyncio.tasks import Task
+from datetime import date
 from datetime import datetime
 from datetime import timedelta
 from typing import Any
 from typing import Callable
+from typing import Optional
+from typing import TYPE_CHECKING
 
+from homeassistant.core import callback
 from homeassistant.core import DOMAIN
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.dispatcher import async_dispatcher_connect
-from homeassistant.helpers.dispatcher import dispatcher_send
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from homeassistant.helpers.update_coordinator import UpdateFailed
 from homeassistant.util import dt
-from pyduke_energy.client import DukeEnergyClient
-from pyduke_energy.realtime import DukeEnergyRealtime
-from pyduke_energy.types import RealtimeUsageMeasurement
+from pyduke_energy.types import GatewayStatus
+from pyduke_energy.types import MeterInfo
+from pyduke_energy.types import UsageMeasurement
 
-from .const import REALTIME_DISPATCH_SIGNAL
+from .api import DukeEnergyApi
+from .bridge import RealtimeBridge
+from .const import CONF_POLL_INTERVAL_MAX_DEFAULT_SEC
+from .const import CONF_POLL_INTERVAL_MIN_DEFAULT_SEC
+from .const import REALTIME_STATUS_SIGNAL
+from .demand import BASE_LOAD_END_HOUR
+from .demand import DemandTracker
+from .demand import REALTIME_DEMAND_WINDOW_SEC
+from .demand import RollingWindow
+from .energy import RealtimeEnergyIntegrator
+from .export import UsageExporter
+from .forecast import LoadProfile
+from .hub import RealtimeHub
+from .loader import async_import
+from .loader import REALTIME_MODULE
+from .metrics import DukeEnergyGatewayMetrics
+from .polling import AdaptivePollInterval
+from .storage import gateway_to_dict
+from .storage import meter_to_dict
+from .storage import STORAGE_SAVE_DELAY
+from .tariff import Tariff
+from .tariff import TariffDay
+from .usage import billing_cycle_start
+from .usage import DailyUsage
+from .usage import UsageSeries
 
-SCAN_INTERVAL = timedelta(seconds=60)
+if TYPE_CHECKING:
+    from pyduke_energy.realtime import DukeEnergyRealtime
+
+# How far before our latest measurement to re-request data, so late corrections get picked up
+USAGE_FETCH_OVERLAP = timedelta(minutes=15)
+
+# Real-time stream supervision. The stream is restarted if it exits or no message arrives for the stall timeout.
+REALTIME_WATCHDOG_INTERVAL_SEC = 15
+REALTIME_STALL_TIMEOUT_SEC = 180
+REALTIME_RESTART_BACKOFF_MIN_SEC = 5
+REALTIME_RESTART_BACKOFF_MAX_SEC = 300
+REALTIME_CANCEL_TIMEOUT_SEC = 10
+
+# Daily usage kept for the period sensors, which need at most a month or billing cycle (plus a week's margin)
+DAILY_USAGE_RETENTION_DAYS = 40
+DAILY_USAGE_LAST_DAYS = 7
+DAILY_USAGE_FETCH_CONCURRENCY = 4
+DAILY_USAGE_RETRY_SEC = 3600
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
@@ -31,40 +80,442 @@ class DukeEnergyGatewayUsageDataUpdateCoordinator(DataUpdateCoordinator):
     def __init__(
         self,
         hass: HomeAssistant,
-        client: DukeEnergyClient,
-        realtime: DukeEnergyRealtime,
+        client: DukeEnergyApi,
         realtime_interval: timedelta,
+        realtime_mode: str,
+        store: Store,
+        meter: MeterInfo,
+        gateway: GatewayStatus,
+        realtime: "DukeEnergyRealtime" = None,
     ) -> None:
         """Initialize."""
         self.client = client
-        self.realtime = realtime
+        self.store = store
+        self.meter = meter
+        self.gateway = gateway
+        self.realtime = (
+            realtime  # created when the stream is first started, unless given
+        )
         self.realtime_interval = realtime_interval
-        self.realtime_next_send = datetime.utcnow()
+        self.realtime_mode = realtime_mode
+        self.realtime_deadband_w = 0.0
+        self.realtime_deadband_percent = 0.0
+        self.realtime_heartbeat_sec = 0.0
         self.realtime_task: Task = None
-        self.async_realtime_remove_subscriber_funcs_by_source: dict[
-            str, Callable[[], None]
-        ] = {}
+        self.realtime_supervisor_task: Task = None
+        self.realtime_connected = False
+        self._realtime_last_message = time.monotonic()
+        # Subscribers to the real-time stream, which runs while there are any
+        self.realtime_hub = RealtimeHub(
+            gateway.id, realtime_mode, _interval_seconds(realtime_interval)
+        )
+        self._loop_thread_id: int = None
         self.platforms = []
+        self.metrics = DukeEnergyGatewayMetrics()
+        self.polling = AdaptivePollInterval(
+            CONF_POLL_INTERVAL_MIN_DEFAULT_SEC, CONF_POLL_INTERVAL_MAX_DEFAULT_SEC
+        )
+
+        # The status signal is per gateway, so each entry's sensors only get their own gateway's status
+        self.realtime_status_signal = f"{REALTIME_STATUS_SIGNAL}_{gateway.id}"
+
+        # Yesterday's and today's minute-by-minute usage. Yesterday is kept since its last minutes can
+        # still be published after midnight.
+        self._usage_day_start: datetime = None
+        self.usage_today: date = None
+        self._usage = UsageSeries()
+        # When the usage stopped being updated, while the API is failing
+        self.stale_since: datetime = None
+
+        # Usage of each day, for the period sensors
+        self.daily_usage = DailyUsage()
+        self.billing_day = 1
+        self._daily_usage_task: Task = None
+        self._daily_usage_retry_at = 0.0  # monotonic
+
+        # Today's usage in each period of the tariff, if there is one, for the cost sensors
+        self.tariff: Tariff = None
+        self.tariff_today: TariffDay = None
 
-        super().__init__(hass, _LOGGER, name=DOMAIN, update_interval=SCAN_INTERVAL)
+        # Estimate of usage from the real-time stream for the minutes the gateway data doesn't cover yet
+        self.realtime_energy = RealtimeEnergyIntegrator()
+
+        # Today's peak demand and base load from the minute usage, and recent demand from the real-time stream
+        self.demand: DemandTracker = None
+        self.realtime_demand = RollingWindow(REALTIME_DEMAND_WINDOW_SEC)
+
+        # Typical usage of each hour of the week, learnt from the minute usage, to project today's usage
+        self.load_profile = LoadProfile()
+
+        # Export of the real-time and minute usage to files, if enabled
+        self.exporter: UsageExporter = None
+
+        # Republishing of the real-time stream to local consumers, if enabled
+        self.bridge: RealtimeBridge = None
+
+        super().__init__(
+            hass,
+            _LOGGER,
+            name=DOMAIN,
+            update_interval=timedelta(seconds=CONF_POLL_INTERVAL_MIN_DEFAULT_SEC),
+        )
 
     async def _async_update_data(self):
         """Update data via library to get last day of minute-by-minute usage data."""
+        today_start = dt.start_of_local_day()
+        if self._usage_day_start != today_start:
+            self._start_day(today_start)
+        yesterday_start = dt.start_of_local_day(self.usage_today - timedelta(days=1))
+        today_end = dt.start_of_local_day(self.usage_today + timedelta(days=1))
+
+        # Only request the window after the data we already have (plus some overlap)
+        fetch_start = yesterday_start
+        if self._usage:
+            fetch_start = max(
+                yesterday_start,
+                dt.utc_from_timestamp(self._usage.last_timestamp) - USAGE_FETCH_OVERLAP,
+            )
+
+        poll_started = time.perf_counter()
         try:
-            today_start = dt.start_of_local_day()
-            today_end = today_start + timedelta(days=1)
-            return await self.client.get_gateway_usage(today_start, today_end)
+            measurements = await self.client.get_gateway_usage(fetch_start, today_end)
         except Exception as exception:
-            raise UpdateFailed(
-                f"Error communicating with Duke Energy Usage API: {exception}"
-            ) from exception
+            self.metrics.record_poll_failure(poll_started)
+            # Poll again once the circuit breaker will let a probe through, if it is open, but no
+            # later than the longest interval configured
+            self.update_interval = timedelta(
+                seconds=min(
+                    max(
+                        self.polling.record_failure(),
+                        self.client.breaker.retry_in_sec,
+                    ),
+                    self.polling.max_sec,
+                )
+            )
+            if not self._usage:
+                raise UpdateFailed(
+                    f"Error communicating with Duke Energy Usage API: {exception}"
+                ) from exception
+            # Keep serving the last good data, flagged as stale, rather than making the sensors unavailable
+            if self.stale_since is None:
+                self.stale_since = dt.utcnow()
+            _LOGGER.warning(
+                "Error communicating with Duke Energy Usage API, keeping usage from before %s: %s",
+                self.stale_since,
+                exception,
+            )
+            return self._usage
+        if self.stale_since is not None:
+            _LOGGER.info(
+                "Usage is up to date again, after being stale since %s",
+                self.stale_since,
+            )
+            self.stale_since = None
+
+        self._merge_usage(
+            measurements,
+            int(yesterday_start.timestamp()),
+            int(today_start.timestamp()),
+            int(today_end.timestamp()),
+        )
+        self.metrics.record_poll(poll_started, len(measurements))
+
+        # Schedule the next poll for when the gateway is expected to have published new data
+        self.update_interval = timedelta(
+            seconds=self.polling.record_poll(
+                dt.utcnow().timestamp(), self.usage_last_timestamp
+            )
+        )
+        _LOGGER.debug("Next usage poll in %s", self.update_interval)
+        self.store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+        self.async_fill_daily_usage()
+        return self._usage
+
+    def _start_day(self, today_start: datetime):
+        """Roll the usage over to a new local day, dropping what is no longer needed."""
+        _LOGGER.debug("Starting new usage day for %s", today_start)
+        self._usage_day_start = today_start
+        self.usage_today = today_start.date()
+        yesterday = self.usage_today - timedelta(days=1)
+        self._close_days_from_series(yesterday)
+        self._usage.discard_before(int(dt.start_of_local_day(yesterday).timestamp()))
+        self.daily_usage.discard_before(
+            self.usage_today - timedelta(days=DAILY_USAGE_RETENTION_DAYS)
+        )
+        self.realtime_energy.discard_before(int(today_start.timestamp()))
+        self._price_today()
+        self._start_demand()
+
+    def _close_days_from_series(self, end: date):
+        """Close the days before end that the series has every minute of, before they are discarded.
+
+        Days missing minutes keep their partial totals, and are fetched whole by the daily usage fill.
+        """
+        if not self._usage:
+            return
+        day = dt.as_local(dt.utc_from_timestamp(self._usage.first_timestamp)).date()
+        last_day = dt.as_local(dt.utc_from_timestamp(self._usage.last_timestamp)).date()
+        while day < end and day <= last_day:
+            if not self.daily_usage.is_closed(day):
+                day_start = int(dt.start_of_local_day(day).timestamp())
+                day_end = int(dt.start_of_local_day(day + timedelta(days=1)).timestamp())
+                if self._usage.count(day_start, day_end) >= (day_end - day_start) // 60:
+                    self.daily_usage.close(day, self._usage.sum(day_start, day_end))
+            day += timedelta(days=1)
+
+    def _start_demand(self):
+        """Start tracking today's demand from the minutes of today in the series."""
+        self.demand = DemandTracker(
+            int(self._usage_day_start.timestamp()),
+            int(self._usage_day_start.replace(hour=BASE_LOAD_END_HOUR).timestamp()),
+        )
+        self.demand.add_series(self._usage)
+
+    def _price_today(self):
+        """Price today's usage in the series with the tariff, if there is one."""
+        if self.tariff is None or self.usage_today is None:
+            self.tariff_today = None
+            return
+        self.tariff_today = TariffDay(
+            self.tariff,
+            self._usage_day_start,
+            dt.start_of_local_day(self.usage_today + timedelta(days=1)),
+        )
+        self.tariff_today.add_series(self._usage)
+
+    def restore_from_store(self, stored: dict) -> bool:
+        """Restore the usage series and daily usage from stored data. Returns true if any usage was restored."""
+        try:
+            self.daily_usage = DailyUsage.from_dict(stored.get("daily_usage", {}))
+            self.load_profile = LoadProfile.from_dict(stored.get("load_profile", {}))
+            usage = UsageSeries.from_dict(stored.get("usage", {}))
+        except (AttributeError, TypeError, ValueError, OverflowError) as exception:
+            _LOGGER.warning("Could not restore stored usage: %s", exception)
+            self.daily_usage = DailyUsage()
+            self.load_profile = LoadProfile()
+            return False
+
+        self._usage = usage
+        self._start_day(dt.start_of_local_day())
+        if not self._usage:
+            _LOGGER.debug(
+                "Stored usage is not from today or yesterday, so not restoring it"
+            )
+            return False
+
+        # The open days' totals are kept from the series, which may have had more data merged since
+        # they were last stored
+        yesterday_start = dt.start_of_local_day(self.usage_today - timedelta(days=1))
+        today_start = int(self._usage_day_start.timestamp())
+        self.daily_usage.set(
+            self.usage_today - timedelta(days=1),
+            self._usage.sum(int(yesterday_start.timestamp()), today_start),
+        )
+        self.daily_usage.set(self.usage_today, self._usage.sum(today_start, None))
+        self.realtime_energy.discard_before(self._usage.last_timestamp + 60)
+        self.data = self._usage
+        _LOGGER.debug("Restored %d stored usage measurements", len(self._usage))
+        return True
+
+    def _data_to_store(self) -> dict:
+        """Get the data to persist across restarts."""
+        return {
+            "meter": meter_to_dict(self.meter),
+            "gateway": gateway_to_dict(self.gateway),
+            "usage": self._usage.as_dict(),
+            "daily_usage": self.daily_usage.as_dict(),
+            "load_profile": self.load_profile.as_dict(),
+        }
+
+    def _merge_usage(
+        self,
+        measurements: list[UsageMeasurement],
+        yesterday_start: int,
+        today_start: int,
+        today_end: int,
+    ):
+        """Merge new measurements into the series, replacing any with the same timestamp."""
+        add = self._usage.add
+        tariff_today = self.tariff_today
+        demand_last_timestamp = self.demand.last_timestamp or 0
+        demand_revised = False
+        yesterday_wh = today_wh = 0.0
+        for measurement in measurements:
+            timestamp = measurement.timestamp
+            if today_start <= timestamp < today_end:
+                change = add(
+                    timestamp, measurement.usage or 0.0, measurement.power or 0.0
+                )
+                today_wh += change
+                if tariff_today is not None:
+                    tariff_today.add(timestamp, change)
+                if change and timestamp <= demand_last_timestamp:
+                    demand_revised = True
+            elif yesterday_start <= timestamp < today_start:
+                yesterday_wh += add(
+                    timestamp, measurement.usage or 0.0, measurement.power or 0.0
+                )
+
+        # Keep the open days' totals up to date as the series changes
+        self.daily_usage.add(self.usage_today - timedelta(days=1), yesterday_wh)
+        self.daily_usage.add(self.usage_today, today_wh)
+
+        # Demand is tracked a minute at a time, so only a revised minute means starting over
+        if demand_revised:
+            self._start_demand()
+        else:
+            self.demand.add_series(self._usage)
+
+        # Gateway data replaces the real-time estimate for every minute up to the latest measurement
+        if self._usage:
+            self.realtime_energy.discard_before(self._usage.last_timestamp + 60)
+
+            # Minutes before the overlap won't be fetched again, so they can't change once exported or learnt
+            final_before = self._usage.last_timestamp - int(
+                USAGE_FETCH_OVERLAP.total_seconds()
+            )
+            self.load_profile.add_series(self._usage, final_before)
+            if self.exporter is not None:
+                self.exporter.add_usage(self._usage, final_before)
+
+    @property
+    def usage_today_wh(self) -> float:
+        """Today's usage from the gateway data."""
+        return self.daily_usage.get(self.usage_today) or 0.0
+
+    @property
+    def usage_remaining_today_wh(self) -> Optional[float]:
+        """Typical usage of the rest of today after the latest measurement, or None if the profile doesn't cover it yet."""
+        if self.usage_today is None:
+            return None
+        day_end = dt.start_of_local_day(self.usage_today + timedelta(days=1))
+        last_timestamp = self._usage.last_timestamp
+        after = int(self._usage_day_start.timestamp())
+        if last_timestamp is not None:
+            after = max(after, last_timestamp + 60)
+        return self.load_profile.project_remaining(after, int(day_end.timestamp()))
+
+    @property
+    def usage_forecast_today_wh(self) -> Optional[float]:
+        """Today's usage so far plus the typical usage of the rest of the day, if known."""
+        remaining = self.usage_remaining_today_wh
+        return self.usage_today_wh + remaining if remaining is not None else None
+
+    @property
+    def usage_last_timestamp(self) -> int:
+        """Timestamp of the latest usage measurement, if any."""
+        return self._usage.last_timestamp
+
+    @property
+    def usage_measurements_today(self) -> int:
+        """Number of today's minutes in the usage series, which also holds yesterday's."""
+        if self._usage_day_start is None:
+            return 0
+        return len(self._usage) - self._usage.index(
+            int(self._usage_day_start.timestamp())
+        )
+
+    def get_usage_wh(self, start: date, end: date) -> Optional[float]:
+        """Get the usage of the days in [start, end), or None if some of those days aren't known yet."""
+        return self.daily_usage.total(start, end)
+
+    def get_daily_usage_start(self) -> date:
+        """Get the first day the period sensors need the usage of."""
+        return min(
+            self.usage_today - timedelta(days=DAILY_USAGE_LAST_DAYS - 1),
+            self.usage_today.replace(day=1),
+            billing_cycle_start(self.usage_today, self.billing_day),
+        )
+
+    def apply_billing_day(self, billing_day: int):
+        """Apply a new day of the month that billing cycles start on."""
+        self.billing_day = billing_day
+        self._daily_usage_retry_at = 0.0
+        self.async_fill_daily_usage()
+        self.async_update_listeners()
+
+    def apply_tariff(self, tariff: Optional[Tariff]):
+        """Apply a new tariff, repricing today's usage with it."""
+        self.tariff = tariff
+        self._price_today()
+        self.async_update_listeners()
+
+    @callback
+    def async_fill_daily_usage(self):
+        """Fetch the usage of any closed days the period sensors need that aren't final, in the background."""
+        if self.usage_today is None or (
+            self._daily_usage_task is not None and not self._daily_usage_task.done()
+        ):
+            return
+        missing = self.daily_usage.missing(
+            self.get_daily_usage_start(), self.usage_today - timedelta(days=1)
+        )
+        if missing and time.monotonic() >= self._daily_usage_retry_at:
+            self._daily_usage_task = self.hass.async_create_task(
+                self._async_fill_daily_usage(missing)
+            )
+
+    def cancel_fill_daily_usage(self):
+        """Cancel any fetch of past days' usage that is in progress."""
+        if self._daily_usage_task is not None:
+            self._daily_usage_task.cancel()
+            self._daily_usage_task = None
+
+    async def _async_fill_daily_usage(self, days: "list[date]"):
+        """Fetch the usage of closed days, which then never needs to be fetched again."""
+        _LOGGER.debug("Fetching usage for %d days from %s", len(days), days[0])
+        for chunk_start in range(0, len(days), DAILY_USAGE_FETCH_CONCURRENCY):
+            chunk = days[chunk_start : chunk_start + DAILY_USAGE_FETCH_CONCURRENCY]
+            try:
+                days_usage = await asyncio.gather(
+                    *[self.async_get_day_usage(day) for day in chunk]
+                )
+            except Exception as exception:  # pylint: disable=broad-except
+                _LOGGER.warning("Failed to fetch usage for past days: %s", exception)
+                self._daily_usage_retry_at = time.monotonic() + DAILY_USAGE_RETRY_SEC
+                break
+            for day, day_usage in zip(chunk, days_usage):
+                self.record_closed_day(day, day_usage)
+
+        self.store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+        self.async_update_listeners()
+
+    async def async_get_day_usage(self, day: date) -> "list[UsageMeasurement]":
+        """Get the minute usage for a local day from the API."""
+        day_start = dt.start_of_local_day(day)
+        day_end = dt.start_of_local_day(day + timedelta(days=1))
+        measurements = await self.client.get_gateway_usage(
+            day_start, day_end, background=True
+        )
+
+        # The API works in whole hours, so only keep what is actually in the day
+        day_start_ts = day_start.timestamp()
+        day_end_ts = day_end.timestamp()
+        return [m for m in measurements if day_start_ts <= m.timestamp < day_end_ts]
+
+    def record_closed_day(self, day: date, measurements: "list[UsageMeasurement]"):
+        """Record the usage of a closed day fetched whole from the API, if it isn't already final."""
+        if (
+            self.usage_today is not None
+            and day < self.usage_today - timedelta(days=1)
+            and not self.daily_usage.is_closed(day)
+        ):
+            self.daily_usage.close(day, sum(m.usage or 0.0 for m in measurements))
+
+    @property
+    def usage_today_realtime_wh(self) -> float:
+        """Today's usage from the gateway data plus the real-time estimate for the minutes after it."""
+        return self.usage_today_wh + self.realtime_energy.pending_wh
 
     def realtime_initialize(self):
         """Setup callbacks, connect, and subscribe to the real-time usage MQTT stream."""
+        if self.realtime_supervisor_task is not None:
+            return
         try:
-            self.realtime.on_message = self._realtime_on_message
-            self.realtime_task = asyncio.create_task(
-                self.realtime.connect_and_subscribe_forever()
+            # Messages are normally handled on the event loop, so note its thread to dispatch directly
+            self._loop_thread_id = threading.get_ident()
+            self.realtime_supervisor_task = asyncio.create_task(
+                self._async_realtime_supervise()
             )
             _LOGGER.debug("Triggered real-time connect/subscribe async task")
         except Exception as exception:
@@ -74,67 +525,199 @@ class DukeEnergyGatewayUsageDataUpdateCoordinator(DataUpdateCoordinator):
             )
             raise
 
+    def apply_realtime_options(self, realtime_interval: timedelta, realtime_mode: str):
+        """Apply new throttling options to the running real-time stream."""
+        self.realtime_interval = realtime_interval
+        self.realtime_mode = realtime_mode
+        self.realtime_hub.set_options(
+            realtime_mode, _interval_seconds(realtime_interval)
+        )
+
+    def apply_realtime_deadband(
+        self, deadband_w: float, deadband_percent: float, heartbeat_sec: float
+    ):
+        """Apply new options for which real-time measurements are worth writing as a state."""
+        self.realtime_deadband_w = deadband_w
+        self.realtime_deadband_percent = deadband_percent
+        self.realtime_heartbeat_sec = heartbeat_sec
+
+    def apply_poll_interval(self, min_sec: float, max_sec: float):
+        """Apply new bounds to the usage poll interval."""
+        self.polling.set_bounds(min_sec, max_sec)
+
     def realtime_cancel(self):
         """Cancel the real-time usage MQTT stream, which will unsubscribe."""
+        if self.realtime_supervisor_task:
+            self.realtime_supervisor_task.cancel()
+            self.realtime_supervisor_task = None
         if self.realtime_task:
             self.realtime_task.cancel()
             self.realtime_task = None
             _LOGGER.debug("Cancelled real-time async task")
+        self._set_realtime_connected(False)
+
+    async def _async_realtime_supervise(self):
+        """Run the real-time stream, restarting it with backoff when it exits or stalls."""
+        if self.realtime is None:
+            self.realtime = await self._async_create_realtime()
+        self.realtime.on_message = self._realtime_on_message
+
+        failures = 0
+        while True:
+            self._realtime_last_message = time.monotonic()
+            self.realtime_task = asyncio.create_task(
+                self.realtime.connect_and_subscribe_forever()
+            )
+
+            # Watch for the task exiting or the stream going quiet
+            while not self.realtime_task.done():
+                await asyncio.wait(
+                    {self.realtime_task}, timeout=REALTIME_WATCHDOG_INTERVAL_SEC
+                )
+                silence = time.monotonic() - self._realtime_last_message
+                if (
+                    not self.realtime_task.done()
+                    and silence > REALTIME_STALL_TIMEOUT_SEC
+                ):
+                    _LOGGER.warning(
+                        "No real-time usage message received for %d seconds, restarting the stream",
+                        silence,
+                    )
+                    self.realtime_task.cancel()
+                    await asyncio.wait(
+                        {self.realtime_task}, timeout=REALTIME_CANCEL_TIMEOUT_SEC
+                    )
+                    break
+
+            if self.realtime_task.done() and not self.realtime_task.cancelled():
+                _LOGGER.warning(
+                    "Real-time usage stream exited, restarting the stream: %s",
+                    self.realtime_task.exception(),
+                )
+
+            # Only back off further if the last connection never produced a message
+            failures = 0 if self.realtime_connected else failures + 1
+            self._set_realtime_connected(False)
+            self.metrics.realtime_reconnects += 1
+
+            backoff = min(
+                REALTIME_RESTART_BACKOFF_MIN_SEC * 2 ** max(failures - 1, 0),
+                REALTIME_RESTART_BACKOFF_MAX_SEC,
+            )
+            delay = backoff * random.uniform(0.5, 1.0)
+            _LOGGER.debug("Restarting real-time usage stream in %.1f seconds", delay)
+            await asyncio.sleep(delay)
+
+    async def _async_create_realtime(self) -> "DukeEnergyRealtime":
+        """Create the real-time client, importing pyduke-energy's MQTT machinery off the event loop."""
+        (realtime_module,) = await async_import(self.hass, REALTIME_MODULE)
+        _LOGGER.debug("Creating real-time usage client")
+        return realtime_module.DukeEnergyRealtime(self.client.client)
+
+    @callback
+    def _set_realtime_connected(self, connected: bool):
+        """Track whether the real-time stream is delivering messages, notifying listeners on change. Must run on the event loop."""
+        if connected != self.realtime_connected:
+            self.realtime_connected = connected
+            async_dispatcher_send(self.hass, self.realtime_status_signal)
 
     def _realtime_on_message(self, msg):
-        """Handler for the real-time usage MQTT messages."""
+        """Handler for the real-time usage MQTT messages. This runs for every message, so keep it lean."""
+        now = time.monotonic()
+        self._realtime_last_message = now
+        if not self.realtime_connected:
+            if threading.get_ident() == self._loop_thread_id:
+                self._set_realtime_connected(True)
+            else:
+                self.hass.loop.call_soon_threadsafe(self._set_realtime_connected, True)
+        metrics = self.metrics
+        metrics.realtime_messages_received += 1
+        metrics.realtime_last_message = now
+
+        # Only pull out what we need, the measurement object is only created if it is sent
         try:
-            measurement = self.realtime.msg_to_usage_measurement(msg)
-        except (ValueError, TypeError) as exception:
+            data = json.loads(msg.payload.decode("utf8"))
+            timestamp = int(data["t"] / 1000)  # remove ms
+            usage = data["da"]["i"]  # in watts
+            if not isinstance(usage, (int, float)) or isinstance(usage, bool):
+                raise TypeError(f"Usage is not a number: {usage!r}")
+        except (ValueError, TypeError, KeyError) as exception:
             _LOGGER.error(
                 "Error while parsing real-time usage message: %s [Message='%s']",
                 exception,
-                msg.payload.decode("utf8"),
+                msg.payload.decode("utf8", "replace"),
             )
+            metrics.realtime_parse_errors += 1
+            return
+
+        # Every measurement goes into the energy estimate, regardless of throttling
+        self.realtime_energy.add(timestamp, usage)
+        self.realtime_demand.add(timestamp, usage)
+        if self.exporter is not None:
+            self.exporter.add_realtime(timestamp, usage)
+
+        # Each subscriber is throttled to its own rate, so only those that are due get the measurement
+        deliveries = self.realtime_hub.offer(now, timestamp, usage, data)
+        if not deliveries:
+            metrics.realtime_messages_throttled += 1
             return
 
-        if measurement:
-            # Throttle sending calls to reduce amount of data bneing produced.
-            should_send = (
-                self.realtime_interval is None
-                or self.realtime_next_send is None
-                or datetime.utcnow() >= self.realtime_next_send
+        if threading.get_ident() == self._loop_thread_id:
+            self._async_realtime_dispatch(deliveries)
+        else:
+            self.hass.loop.call_soon_threadsafe(
+                self._async_realtime_dispatch, deliveries
             )
-            if should_send:
-                self.realtime_next_send = datetime.utcnow() + self.realtime_interval
-                dispatcher_send(self.hass, REALTIME_DISPATCH_SIGNAL, measurement)
-            else:
-                _LOGGER.debug(
-                    "Ignoring real-time update as still in throttling interval"
-                )
 
-    def async_realtime_subscribe_to_dispatcher(
-        self, source: str, target: Callable[[RealtimeUsageMeasurement], Any]
+    @callback
+    def _async_realtime_dispatch(
+        self, deliveries: "list[tuple[Callable[[Any], None], Any]]"
     ):
-        """Setup a subscriber to receive new real-time measurements."""
-        # If this source is already subscribed, re-use the existing one
-        if source in self.async_realtime_remove_subscriber_funcs_by_source:
-            _LOGGER.warning(
-                "Attempting to subscribe to dispatcher by source that is already subscribed: %s",
-                source,
-            )
-            return
+        """Send measurements to the subscribers they are due to."""
+        self.metrics.realtime_messages_dispatched += 1
+        for target, measurement in deliveries:
+            target(measurement)
+
+    @callback
+    def async_realtime_subscribe(
+        self,
+        source: str,
+        target: Callable[[Any], None],
+        mode: str = None,
+        interval_sec: float = None,
+    ) -> Callable[[], None]:
+        """Subscribe to real-time measurements, returning a function that unsubscribes.
+
+        Subscribers get every measurement in `raw` mode, or one measurement (`sample`) or a summary
+        (`aggregate`) per interval. Without a mode or interval they follow the real-time options.
+        The stream is started by the first subscriber and stopped when the last one unsubscribes.
+        """
+        subscription = self.realtime_hub.add(source, target, mode, interval_sec)
+        _LOGGER.debug(
+            "Subscribed %s to real-time measurements (%s every %ss)",
+            source,
+            subscription.mode,
+            subscription.interval_sec,
+        )
+        if len(self.realtime_hub) == 1:
+            self.realtime_initialize()
+
+        @callback
+        def async_unsubscribe():
+            if not self.realtime_hub.remove(subscription):
+                return
+            _LOGGER.debug("Unsubscribed %s from real-time measurements", source)
+            if not self.realtime_hub:
+                self.realtime_cancel()
+
+        return async_unsubscribe
+
+    @callback
+    def async_realtime_unsubscribe_all(self):
+        """Remove all subscribers from real-time measurements."""
+        self.realtime_hub.clear()
+
 
-        # Connect function returns a function that removes the subscription. Save for later.
-        self.async_realtime_remove_subscriber_funcs_by_source[
-            source
-        ] = async_dispatcher_connect(self.hass, REALTIME_DISPATCH_SIGNAL, target)
-        _LOGGER.debug("Subscribed target for %s to dispatcher", source)
-
-    def async_realtime_unsubscribe_from_dispatcher(self, source: str):
-        """Remove a subscriber from the dispatch."""
-        if source in self.async_realtime_remove_subscriber_funcs_by_source:
-            _LOGGER.debug("Removing subscribers to dispatcher for %s", source)
-            self.async_realtime_remove_subscriber_funcs_by_source[source]()
-            self.async_realtime_remove_subscriber_funcs_by_source.pop(source)
-
-    def async_realtime_unsubscribe_all_from_dispatcher(self):
-        """Remove all subscribers from the dispatch."""
-        sources = self.async_realtime_remove_subscriber_funcs_by_source.keys()
-        for source in sources:
-            self.async_realtime_unsubscribe_from_dispatcher(source)
+def _interval_seconds(interval: timedelta) -> float:
+    """Get a throttling interval in seconds, where no interval is 0."""
+    return interval.total_seconds() if interval is not None else 0.0
@@ -0,0 +1,148 @@
+"""Rolling demand statistics over minute usage and real-time power, updated a sample at a time."""
+from collections import deque
+from typing import Optional
+
+from .usage import UsageSeries
+
+# Window lengths (minutes) of the average demand that today's peaks are tracked for
+DEMAND_WINDOWS_MIN = (15, 30, 60)
+
+# Base load is the lowest average demand over this long, in the night before this local hour
+BASE_LOAD_WINDOW_MIN = 60
+BASE_LOAD_END_HOUR = 6
+
+# Window the real-time demand is averaged over
+REALTIME_DEMAND_WINDOW_SEC = 15 * 60
+
+
+class RollingWindow:
+    """Sum, minimum and maximum of the samples in a sliding time window.
+
+    Samples must be added in time order. The sum is kept as samples enter and leave the window, and
+    the minimum and maximum are the heads of monotonic deques, so each sample costs O(1) amortized
+    rather than a scan of the window.
+    """
+
+    __slots__ = ("window_sec", "sum", "_samples", "_min", "_max")
+
+    def __init__(self, window_sec: int):
+        self.window_sec = window_sec
+        self.sum = 0.0
+        self._samples: deque[tuple[int, float]] = deque()
+        self._min: deque[tuple[int, float]] = deque()  # increasing values
+        self._max: deque[tuple[int, float]] = deque()  # decreasing values
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def add(self, timestamp: int, value: float):
+        """Add a sample, dropping those that are no longer within the window of it."""
+        self._samples.append((timestamp, value))
+        self.sum += value
+        # Samples that can never be the minimum or maximum while this one is in the window are dropped
+        while self._min and self._min[-1][1] >= value:
+            self._min.pop()
+        self._min.append((timestamp, value))
+        while self._max and self._max[-1][1] <= value:
+            self._max.pop()
+        self._max.append((timestamp, value))
+        self.evict(timestamp)
+
+    def evict(self, now: int):
+        """Drop the samples at or before `window_sec` before now."""
+        horizon = now - self.window_sec
+        samples = self._samples
+        while samples and samples[0][0] <= horizon:
+            self.sum -= samples.popleft()[1]
+        if not samples:
+            self.sum = 0.0  # avoid accumulating float error
+        while self._min and self._min[0][0] <= horizon:
+            self._min.popleft()
+        while self._max and self._max[0][0] <= horizon:
+            self._max.popleft()
+
+    def clear(self):
+        """Drop all of the samples."""
+        self.sum = 0.0
+        self._samples.clear()
+        self._min.clear()
+        self._max.clear()
+
+    @property
+    def mean(self) -> Optional[float]:
+        """Mean of the samples in the window, if any."""
+        return self.sum / len(self._samples) if self._samples else None
+
+    @property
+    def min(self) -> Optional[float]:
+        """Smallest sample in the window, if any."""
+        return self._min[0][1] if self._min else None
+
+    @property
+    def max(self) -> Optional[float]:
+        """Largest sample in the window, if any."""
+        return self._max[0][1] if self._max else None
+
+
+class DemandTracker:
+    """Today's peak average demand over each of `DEMAND_WINDOWS_MIN`, and last night's base load.
+
+    Minute usage is fed in time order through a rolling window per window length, so the average
+    demand ending at each minute is the window's sum of usage (Wh) over its length. Peaks and the
+    base load are kept as (demand in W, unix time the window ends).
+    """
+
+    __slots__ = (
+        "day_start",
+        "base_load_end",
+        "last_timestamp",
+        "peaks",
+        "base_load",
+        "_windows",
+    )
+
+    def __init__(self, day_start: int, base_load_end: int):
+        self.day_start = day_start
+        self.base_load_end = base_load_end
+        self.last_timestamp: int = None
+        self.peaks: dict[int, Optional[tuple[float, int]]] = dict.fromkeys(
+            DEMAND_WINDOWS_MIN
+        )
+        self.base_load: Optional[tuple[float, int]] = None
+        self._windows = {
+            minutes: RollingWindow(minutes * 60)
+            for minutes in (*DEMAND_WINDOWS_MIN, BASE_LOAD_WINDOW_MIN)
+        }
+
+    def add(self, timestamp: int, usage: float):
+        """Add a minute of usage (Wh), which must be after those already added."""
+        if timestamp < self.day_start or (
+            self.last_timestamp is not None and timestamp <= self.last_timestamp
+        ):
+            return
+        self.last_timestamp = timestamp
+        window_end = timestamp + 60
+
+        for window in self._windows.values():
+            window.add(timestamp, usage)
+        for minutes in DEMAND_WINDOWS_MIN:
+            demand = self._windows[minutes].sum * 60 / minutes
+            peak = self.peaks[minutes]
+            if peak is None or demand > peak[0]:
+                self.peaks[minutes] = (demand, window_end)
+
+        # Only windows without missing minutes count, as a gap would look like a low load
+        window = self._windows[BASE_LOAD_WINDOW_MIN]
+        if window_end <= self.base_load_end and len(window) == BASE_LOAD_WINDOW_MIN:
+            demand = window.sum * 60 / BASE_LOAD_WINDOW_MIN
+            if self.base_load is None or demand < self.base_load[0]:
+                self.base_load = (demand, window_end)
+
+    def add_series(self, series: UsageSeries):
+        """Add the minutes of the series after those already added."""
+        index = series.index(
+            self.day_start if self.last_timestamp is None else self.last_timestamp + 1
+        )
+        add = self.add
+        for timestamp, usage in zip(series.timestamps[index:], series.usage[index:]):
+            add(timestamp, usage)
@@ -0,0 +1,82 @@
+"""Diagnostics support for Duke Energy Gateway."""
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt
+
+from .const import CONF_EMAIL
+from .const import CONF_METER
+from .const import CONF_PASSWORD
+from .const import DOMAIN
+from .coordinator import DukeEnergyGatewayUsageDataUpdateCoordinator
+from .storage import gateway_to_dict
+from .storage import meter_to_dict
+
+TO_REDACT = {
+    CONF_EMAIL,
+    CONF_PASSWORD,
+    CONF_METER,
+    "serialNum",
+    "serviceId",
+    "_id",
+    "id",
+    "gwMAC",
+    "zgbMAC",
+}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict:
+    """Return diagnostics for a config entry."""
+    coordinator: DukeEnergyGatewayUsageDataUpdateCoordinator = hass.data[DOMAIN][
+        entry.entry_id
+    ]["coordinator"]
+
+    last_timestamp = coordinator.usage_last_timestamp
+    # The usage series holds yesterday's minutes too, since they can still be published after midnight
+    measurements_today = coordinator.usage_measurements_today
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "meter": async_redact_data(meter_to_dict(coordinator.meter), TO_REDACT),
+        "gateway": async_redact_data(gateway_to_dict(coordinator.gateway), TO_REDACT),
+        "usage": {
+            "last_update_success": coordinator.last_update_success,
+            "stale_since": coordinator.stale_since,
+            "measurements_today": measurements_today,
+            "measurements_yesterday": len(coordinator.data or []) - measurements_today,
+            "usage_today_wh": coordinator.usage_today_wh,
+            "last_measurement": (
+                dt.utc_from_timestamp(last_timestamp)
+                if last_timestamp is not None
+                else None
+            ),
+            "realtime_pending_wh": coordinator.realtime_energy.pending_wh,
+            "days_of_daily_usage": len(coordinator.daily_usage),
+            "load_profile_hours": len(coordinator.load_profile),
+        },
+        "realtime": {
+            "connected": coordinator.realtime_connected,
+            "running": coordinator.realtime_supervisor_task is not None
+            and not coordinator.realtime_supervisor_task.done(),
+            "interval": (
+                coordinator.realtime_interval.total_seconds()
+                if coordinator.realtime_interval is not None
+                else None
+            ),
+            "mode": coordinator.realtime_mode,
+            "subscribers": coordinator.realtime_hub.as_dict(),
+        },
+        "polling": coordinator.polling.as_dict(),
+        "api": coordinator.client.as_dict(),
+        "export": (
+            coordinator.exporter.as_dict() if coordinator.exporter is not None else None
+        ),
+        "bridge": (
+            coordinator.bridge.as_dict() if coordinator.bridge is not None else None
+        ),
+        "metrics": coordinator.metrics.as_dict(),
+    }
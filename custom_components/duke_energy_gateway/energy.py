@@ -0,0 +1,55 @@
+"""Energy estimation from the real-time power stream for Duke Energy Gateway."""
+# Readings further apart than this are treated as a gap in the stream and not integrated across
+REALTIME_ENERGY_MAX_GAP_SEC = 60
+
+
+class RealtimeEnergyIntegrator:
+    """Integrates real-time power readings (W) into energy (Wh) with the trapezoidal rule.
+
+    Energy is kept in per-minute buckets so it can be reconciled with the gateway's minute usage
+    data: once the gateway reports a minute, the real-time estimate for it is discarded.
+    """
+
+    def __init__(self, max_gap: int = REALTIME_ENERGY_MAX_GAP_SEC):
+        self.max_gap = max_gap
+        self.pending_wh = 0.0  # total of all buckets not yet covered by gateway data
+        self._buckets: dict[int, float] = {}  # minute start timestamp -> Wh
+        self._covered_before: int = None
+        self._last_timestamp: int = None
+        self._last_usage: float = None
+
+    def add(self, timestamp: int, usage: float):
+        """Add a power reading, integrating from the previous reading if there is no gap."""
+        if self._last_timestamp is not None:
+            elapsed = timestamp - self._last_timestamp
+            if elapsed < 0:
+                return  # out of order, ignore
+            if 0 < elapsed <= self.max_gap:
+                self._integrate(
+                    self._last_timestamp, self._last_usage, timestamp, usage
+                )
+        self._last_timestamp = timestamp
+        self._last_usage = usage
+
+    def discard_before(self, timestamp: int):
+        """Discard energy for minutes starting before the timestamp, e.g. as gateway data covers them."""
+        if self._covered_before is not None and timestamp <= self._covered_before:
+            return
+        self._covered_before = timestamp
+        for minute in [m for m in self._buckets if m < timestamp]:
+            self.pending_wh -= self._buckets.pop(minute)
+        if not self._buckets:
+            self.pending_wh = 0.0  # avoid accumulating float error
+
+    def _integrate(self, t_0: int, p_0: float, t_1: int, p_1: float):
+        """Integrate linearly between two readings, splitting the energy across minute boundaries."""
+        seg_t, seg_p = t_0, p_0
+        while seg_t < t_1:
+            minute = seg_t - seg_t % 60
+            end_t = min(t_1, minute + 60)
+            end_p = p_0 + (p_1 - p_0) * (end_t - t_0) / (t_1 - t_0)
+            if self._covered_before is None or minute >= self._covered_before:
+                energy = (seg_p + end_p) / 2 * (end_t - seg_t) / 3600
+                self._buckets[minute] = self._buckets.get(minute, 0.0) + energy
+                self.pending_wh += energy
+            seg_t, seg_p = end_t, end_p
@@ -4,6 +4,7 @@ from pyduke_energy.types import GatewayStatus
 from pyduke_energy.types import MeterInfo
 
 from .const import ATTRIBUTION
+from .const import CONF_METER
 from .const import DOMAIN
 from .const import NAME
 from .const import VERSION
@@ -29,6 +30,9 @@ class DukeEnergyGatewayEntity(CoordinatorEntity):
     @property
     def unique_id(self):
         """Return a unique ID to use for this entity."""
+        if self._config_entry.data.get(CONF_METER):
+            # Entries for a specific meter can be one of several, so include the gateway
+            return f"duke_energy_{self._gateway.id}_{self._entity_id}"
         return f"duke_energy_{self._entity_id}"
 
     @property
@@ -0,0 +1,230 @@
+"""Export of real-time readings and minute usage to daily CSV files, written in batches off the event loop."""
+import asyncio
+import logging
+import os
+from collections import deque
+from datetime import timedelta
+from typing import Optional
+
+from homeassistant.core import callback
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import dt
+
+from .usage import UsageSeries
+
+EXPORT_REALTIME = "realtime"
+EXPORT_USAGE = "usage"
+EXPORT_HEADERS = {
+    EXPORT_REALTIME: "timestamp,power_w\n",
+    EXPORT_USAGE: "timestamp,usage_wh,power_w\n",
+}
+
+# Buffered rows are written once there are this many of a kind, or at least this often
+EXPORT_FLUSH_ROWS = 1000
+EXPORT_FLUSH_INTERVAL = timedelta(seconds=60)
+
+# How much of the end of a file to read to find its last row
+EXPORT_TAIL_BYTES = 4096
+
+_LOGGER: logging.Logger = logging.getLogger(__package__)
+
+
+class UsageExporter:
+    """Appends real-time readings and minute usage to a CSV file per kind and local day.
+
+    Real-time readings are only appended to an in-memory queue by the message handler, which can run
+    on any thread. The queues are written out by an executor job once one is large enough or on a
+    timer, and when Home Assistant stops.
+
+    Rows are never written twice: at startup the last timestamp in each kind's newest file is read
+    back, and only rows after it are exported. Minute usage is only exported once it is older than
+    the window re-fetched for corrections, so its rows are final when written.
+    """
+
+    def __init__(self, hass: HomeAssistant, directory: str):
+        self.hass = hass
+        self.directory = directory
+        self._rows: dict[str, deque[tuple]] = {kind: deque() for kind in EXPORT_HEADERS}
+        self._realtime_after: int = (
+            None  # last real-time reading exported before a restart
+        )
+        self._usage_after: int = None  # last minute of usage exported
+        self._flush_lock = asyncio.Lock()
+        self._flush_scheduled = False
+        self._unsub_timer = None
+        self.rows_written = 0
+        self.write_errors = 0
+
+    async def async_start(self):
+        """Find where the files from previous runs end, and start flushing on a timer."""
+        last_timestamps = await self.hass.async_add_executor_job(
+            self._load_last_timestamps
+        )
+        self._realtime_after = last_timestamps[EXPORT_REALTIME]
+        self._usage_after = last_timestamps[EXPORT_USAGE]
+        _LOGGER.debug("Exporting usage to %s after %s", self.directory, last_timestamps)
+        self._unsub_timer = async_track_time_interval(
+            self.hass, self._async_flush_on_timer, EXPORT_FLUSH_INTERVAL
+        )
+
+    async def async_stop(self):
+        """Stop the timer and write out everything still buffered."""
+        if self._unsub_timer is not None:
+            self._unsub_timer()
+            self._unsub_timer = None
+        await self.async_flush()
+
+    def add_realtime(self, timestamp: int, power: float):
+        """Queue a real-time reading (W) for export. This is called for every message, from any thread."""
+        if self._realtime_after is not None and timestamp <= self._realtime_after:
+            return
+        rows = self._rows[EXPORT_REALTIME]
+        rows.append((timestamp, power))
+        if len(rows) >= EXPORT_FLUSH_ROWS and not self._flush_scheduled:
+            self._flush_scheduled = True
+            self.hass.loop.call_soon_threadsafe(self._async_schedule_flush)
+
+    def add_usage(self, series: UsageSeries, final_before: int):
+        """Queue the minutes of the series before `final_before` that haven't been exported yet."""
+        start = series.index(0 if self._usage_after is None else self._usage_after + 1)
+        end = series.index(final_before)
+        if end <= start:
+            return
+        rows = self._rows[EXPORT_USAGE]
+        rows.extend(
+            zip(
+                series.timestamps[start:end],
+                series.usage[start:end],
+                series.power[start:end],
+            )
+        )
+        self._usage_after = series.timestamps[end - 1]
+        if len(rows) >= EXPORT_FLUSH_ROWS and not self._flush_scheduled:
+            self._flush_scheduled = True
+            self._async_schedule_flush()
+
+    @property
+    def rows_pending(self) -> int:
+        """Number of rows waiting to be written."""
+        return sum(len(rows) for rows in self._rows.values())
+
+    def as_dict(self) -> dict:
+        """Get the state of the export, e.g. for diagnostics."""
+        return {
+            "rows_written": self.rows_written,
+            "rows_pending": self.rows_pending,
+            "write_errors": self.write_errors,
+        }
+
+    @callback
+    def _async_schedule_flush(self):
+        self.hass.async_create_task(self.async_flush())
+
+    async def _async_flush_on_timer(self, _now):
+        await self.async_flush()
+
+    async def async_flush(self):
+        """Write out the buffered rows. Flushes run one at a time, so rows are written in order."""
+        async with self._flush_lock:
+            self._flush_scheduled = False
+            # Taken a row at a time, since the handler can be adding to the queues on another thread
+            batches = {
+                kind: [rows.popleft() for _ in range(len(rows))]
+                for kind, rows in self._rows.items()
+            }
+            if any(batches.values()):
+                await self.hass.async_add_executor_job(self._write, batches)
+
+    def _write(self, batches: "dict[str, list[tuple]]"):
+        """Append rows to the files for their local day. Runs in the executor."""
+        for kind, rows in batches.items():
+            if not rows:
+                continue
+            try:
+                for path, lines in self._group_by_file(kind, rows):
+                    self._append(path, kind, lines)
+                self.rows_written += len(rows)
+            except OSError as exception:
+                self.write_errors += 1
+                _LOGGER.error(
+                    "Failed to export %d %s rows to %s: %s",
+                    len(rows),
+                    kind,
+                    self.directory,
+                    exception,
+                )
+
+    def _group_by_file(self, kind: str, rows: "list[tuple]"):
+        """Group rows into CSV lines for each file, by the local day of their timestamps."""
+        day_start = day_end = None
+        path = None
+        lines: list[str] = []
+        for row in rows:
+            timestamp = row[0]
+            if day_start is None or not day_start <= timestamp < day_end:
+                if lines:
+                    yield path, lines
+                    lines = []
+                local = dt.as_local(dt.utc_from_timestamp(timestamp))
+                start = dt.start_of_local_day(local)
+                day_start = start.timestamp()
+                day_end = dt.start_of_local_day(
+                    local.date() + timedelta(days=1)
+                ).timestamp()
+                path = self._get_path(kind, start.date().isoformat())
+            lines.append(",".join(map(str, row)) + "\n")
+        if lines:
+            yield path, lines
+
+    def _get_path(self, kind: str, day: str) -> str:
+        return os.path.join(self.directory, f"{kind}-{day}.csv")
+
+    @staticmethod
+    def _append(path: str, kind: str, lines: "list[str]"):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a", encoding="utf8") as file:
+            if file.tell() == 0:
+                file.write(EXPORT_HEADERS[kind])
+            file.writelines(lines)
+
+    def _load_last_timestamps(self) -> "dict[str, Optional[int]]":
+        """Get the last timestamp in each kind's newest file, dropping any partly written row. Runs in the executor."""
+        try:
+            names = sorted(os.listdir(self.directory))
+        except FileNotFoundError:
+            names = []
+
+        last_timestamps = {}
+        for kind in EXPORT_HEADERS:
+            files = [
+                name
+                for name in names
+                if name.startswith(f"{kind}-") and name.endswith(".csv")
+            ]
+            last_timestamps[kind] = (
+                _read_last_timestamp(os.path.join(self.directory, files[-1]))
+                if files
+                else None
+            )
+        return last_timestamps
+
+
+def _read_last_timestamp(path: str) -> Optional[int]:
+    """Read the timestamp of the last complete row of a CSV file, truncating a partly written row after it."""
+    with open(path, "rb+") as file:
+        size = file.seek(0, os.SEEK_END)
+        file.seek(max(size - EXPORT_TAIL_BYTES, 0))
+        tail = file.read()
+        if not tail.endswith(b"\n"):
+            # Home Assistant stopped in the middle of a write, so drop the partial row
+            size -= len(tail) - (tail.rfind(b"\n") + 1)
+            file.truncate(size)
+            tail = tail[: tail.rfind(b"\n") + 1]
+
+    for line in reversed(tail.splitlines()):
+        try:
+            return int(line.split(b",", 1)[0])
+        except ValueError:
+            continue  # the header, or the start of a row cut off by the tail
+    return None
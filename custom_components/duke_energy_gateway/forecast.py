@@ -0,0 +1,166 @@
+"""Typical usage of each hour of the week, learnt a minute at a time, and today's projected usage from it."""
+from array import array
+from typing import Optional
+
+from homeassistant.util import dt
+
+from .usage import UsageSeries
+
+HOURS_PER_WEEK = 7 * 24
+
+# Weight of each new hour in its hour of the week's average, so a week's usage counts for a quarter
+FORECAST_PROFILE_ALPHA = 0.25
+
+# Hours with fewer minutes of data than this aren't learnt, as scaling them up would be a guess
+FORECAST_MIN_MINUTES_PER_HOUR = 45
+
+
+class LoadProfile:
+    """Exponentially weighted average usage (Wh) of each hour of the week, in local time.
+
+    Minutes are added in time order and summed into the hour they are in. When a minute of a later
+    hour arrives the hour is closed, and its usage (scaled up for any missing minutes) is folded into
+    the average for its weekday and hour. Each minute costs O(1), and the profile is a fixed 168
+    averages however long it has been learning.
+    """
+
+    __slots__ = (
+        "usage",
+        "counts",
+        "last_timestamp",
+        "_hour_slot",
+        "_hour_end",
+        "_hour_wh",
+        "_hour_minutes",
+    )
+
+    def __init__(self):
+        self.usage = (
+            array("d", [0.0]) * HOURS_PER_WEEK
+        )  # average Wh per hour of the week
+        self.counts = array("l", [0]) * HOURS_PER_WEEK  # hours learnt for each
+        self.last_timestamp: int = None
+        # The hour being summed, which is learnt once it is over
+        self._hour_slot: int = None
+        self._hour_end: int = None
+        self._hour_wh = 0.0
+        self._hour_minutes = 0
+
+    def __len__(self) -> int:
+        """Number of hours of the week with an average."""
+        return sum(1 for count in self.counts if count)
+
+    def add(self, timestamp: int, usage: float):
+        """Add a minute of usage (Wh), which must be after those already added."""
+        if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+            return
+        self.last_timestamp = timestamp
+
+        if self._hour_end is None or timestamp >= self._hour_end:
+            self._close_hour()
+            # Local time is only worked out once per hour
+            local = dt.as_local(dt.utc_from_timestamp(timestamp))
+            self._hour_slot = _slot(local.weekday(), local.hour)
+            self._hour_end = timestamp - local.minute * 60 - local.second + 3600
+        self._hour_wh += usage
+        self._hour_minutes += 1
+
+    def add_series(self, series: UsageSeries, end: int):
+        """Add the minutes of the series before `end` that are after those already added."""
+        start = series.index(
+            0 if self.last_timestamp is None else self.last_timestamp + 1
+        )
+        end = series.index(end)
+        add = self.add
+        for timestamp, usage in zip(
+            series.timestamps[start:end], series.usage[start:end]
+        ):
+            add(timestamp, usage)
+
+    def get(self, weekday: int, hour: int) -> Optional[float]:
+        """Get the typical usage (Wh) of an hour of a weekday.
+
+        An hour that hasn't been seen on that weekday falls back to the average of that hour on the
+        other weekdays, so there is a profile after a day rather than a week.
+        """
+        slot = _slot(weekday, hour)
+        if self.counts[slot]:
+            return self.usage[slot]
+        known = [
+            self.usage[_slot(day, hour)]
+            for day in range(7)
+            if self.counts[_slot(day, hour)]
+        ]
+        return sum(known) / len(known) if known else None
+
+    def project_remaining(self, after: int, end: int) -> Optional[float]:
+        """Project the usage (Wh) from `after` until `end` (e.g. the end of the day), or None if an hour has no profile.
+
+        The hour `after` is in is counted for the part of it that is left.
+        """
+        remaining = 0.0
+        timestamp = after
+        while timestamp < end:
+            local = dt.as_local(dt.utc_from_timestamp(timestamp))
+            usage = self.get(local.weekday(), local.hour)
+            if usage is None:
+                return None
+            hour_end = min(timestamp - local.minute * 60 - local.second + 3600, end)
+            remaining += usage * (hour_end - timestamp) / 3600
+            timestamp = hour_end
+        return remaining
+
+    def _close_hour(self):
+        """Fold the hour being summed into its average, if enough of it had data."""
+        minutes = self._hour_minutes
+        if minutes >= FORECAST_MIN_MINUTES_PER_HOUR:
+            hour_wh = self._hour_wh * 60 / min(minutes, 60)
+            slot = self._hour_slot
+            if self.counts[slot]:
+                self.usage[slot] += FORECAST_PROFILE_ALPHA * (
+                    hour_wh - self.usage[slot]
+                )
+            else:
+                self.usage[slot] = hour_wh
+            self.counts[slot] += 1
+        self._hour_wh = 0.0
+        self._hour_minutes = 0
+
+    def as_dict(self) -> dict:
+        """Serialize the profile for storage, with the hour being summed so it carries on after a restart."""
+        return {
+            "usage": self.usage.tolist(),
+            "counts": self.counts.tolist(),
+            "last_timestamp": self.last_timestamp,
+            "hour": [
+                self._hour_slot,
+                self._hour_end,
+                self._hour_wh,
+                self._hour_minutes,
+            ],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LoadProfile":
+        """Deserialize a stored profile."""
+        profile = cls()
+        if not data:
+            return profile
+        usage = array("d", data.get("usage", []))
+        counts = array("l", data.get("counts", []))
+        if not len(usage) == len(counts) == HOURS_PER_WEEK:
+            raise ValueError("Stored load profile doesn't have an average per hour")
+        profile.usage = usage
+        profile.counts = counts
+        profile.last_timestamp = data.get("last_timestamp")
+        (
+            profile._hour_slot,
+            profile._hour_end,
+            profile._hour_wh,
+            profile._hour_minutes,
+        ) = data.get("hour", (None, None, 0.0, 0))
+        return profile
+
+
+def _slot(weekday: int, hour: int) -> int:
+    return weekday * 24 + hour
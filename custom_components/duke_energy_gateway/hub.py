@@ -0,0 +1,217 @@
+"""Fan-out of each real-time measurement to its subscribers, each at its own rate."""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any
+from typing import Callable
+from typing import Optional
+
+from homeassistant.util import dt
+from pyduke_energy.types import RealtimeUsageMeasurement
+
+from .const import REALTIME_MODE_AGGREGATE
+from .const import REALTIME_MODE_RAW
+
+
+@dataclass
+class RealtimeUsageAggregate:
+    """Summary of the real-time usage measurements received over a throttling interval."""
+
+    gateway_id: str
+    timestamp: int
+    datetime_utc: datetime
+    usage: float  # mean, in watts
+    usage_min: float
+    usage_max: float
+    usage_last: float
+    count: int
+
+
+class _RealtimeUsageAccumulator:
+    """Accumulates real-time usage measurements in constant memory."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min: float = None
+        self.max: float = None
+        self.last: float = None
+        self.last_timestamp: int = None
+
+    def reset(self):
+        """Clear all accumulated measurements."""
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.last = None
+        self.last_timestamp = None
+
+    def add(self, timestamp: int, usage: float):
+        """Add a measurement to the accumulator."""
+        self.count += 1
+        self.total += usage
+        if self.min is None or usage < self.min:
+            self.min = usage
+        if self.max is None or usage > self.max:
+            self.max = usage
+        self.last = usage
+        self.last_timestamp = timestamp
+
+    def pop_summary(self, gateway_id: str) -> RealtimeUsageAggregate:
+        """Summarize the accumulated measurements and reset the accumulator."""
+        summary = RealtimeUsageAggregate(
+            gateway_id=gateway_id,
+            timestamp=self.last_timestamp,
+            datetime_utc=dt.utc_from_timestamp(self.last_timestamp),
+            usage=self.total / self.count,
+            usage_min=self.min,
+            usage_max=self.max,
+            usage_last=self.last,
+            count=self.count,
+        )
+        self.reset()
+        return summary
+
+
+class RealtimeSubscription:
+    """A subscriber to real-time measurements, and when it is next due one.
+
+    `raw` subscribers get every measurement, `sample` subscribers one per interval, and `aggregate`
+    subscribers a summary of the measurements in each interval. A subscription made without a mode
+    or interval follows the integration's real-time options for it.
+    """
+
+    __slots__ = (
+        "source",
+        "target",
+        "requested_mode",
+        "requested_interval_sec",
+        "mode",
+        "interval_sec",
+        "next_send",
+        "accumulator",
+    )
+
+    def __init__(
+        self,
+        source: str,
+        target: Callable[[Any], None],
+        mode: str = None,
+        interval_sec: float = None,
+    ):
+        self.source = source
+        self.target = target
+        self.requested_mode = mode
+        self.requested_interval_sec = interval_sec
+        self.mode: str = None
+        self.interval_sec = 0.0
+        self.next_send = 0.0  # monotonic
+        self.accumulator = _RealtimeUsageAccumulator()
+
+    def apply_options(self, mode: str, interval_sec: float):
+        """Set the rate from the options for what wasn't requested, starting a new interval."""
+        mode = self.requested_mode or mode
+        if mode != self.mode:
+            self.accumulator.reset()
+        self.mode = mode
+        if mode == REALTIME_MODE_RAW:
+            self.interval_sec = 0.0
+        elif self.requested_interval_sec is not None:
+            self.interval_sec = self.requested_interval_sec
+        else:
+            self.interval_sec = interval_sec
+        self.next_send = 0.0
+
+
+class RealtimeHub:
+    """Real-time subscribers, with each measurement parsed once and offered to all of them.
+
+    Subscribers are held in a tuple that is replaced rather than changed, so the message handler can
+    offer measurements from the real-time client's thread while subscribers come and go on the event
+    loop.
+    """
+
+    def __init__(self, gateway_id: str, mode: str, interval_sec: float):
+        self.gateway_id = gateway_id
+        self.mode = mode  # from the options
+        self.interval_sec = interval_sec
+        self.subscriptions: tuple[RealtimeSubscription, ...] = ()
+
+    def __len__(self) -> int:
+        return len(self.subscriptions)
+
+    def add(
+        self,
+        source: str,
+        target: Callable[[Any], None],
+        mode: str = None,
+        interval_sec: float = None,
+    ) -> RealtimeSubscription:
+        """Add a subscriber, at its own rate or following the options."""
+        subscription = RealtimeSubscription(source, target, mode, interval_sec)
+        subscription.apply_options(self.mode, self.interval_sec)
+        self.subscriptions = (*self.subscriptions, subscription)
+        return subscription
+
+    def remove(self, subscription: RealtimeSubscription) -> bool:
+        """Remove a subscriber, returning if it was subscribed."""
+        if subscription not in self.subscriptions:
+            return False
+        self.subscriptions = tuple(
+            other for other in self.subscriptions if other is not subscription
+        )
+        return True
+
+    def clear(self):
+        """Remove every subscriber."""
+        self.subscriptions = ()
+
+    def set_options(self, mode: str, interval_sec: float):
+        """Apply new options to the subscribers that follow them."""
+        self.mode = mode
+        self.interval_sec = interval_sec
+        for subscription in self.subscriptions:
+            subscription.apply_options(mode, interval_sec)
+
+    def offer(
+        self, now: float, timestamp: int, usage: float, data: dict
+    ) -> "Optional[list[tuple[Callable[[Any], None], Any]]]":
+        """Offer a parsed measurement to every subscriber, returning the (target, measurement) pairs that are due.
+
+        Nothing is allocated unless a subscriber is due the measurement, in which case the
+        measurement object is created once for all of them. Returns None if no subscriber is due.
+        """
+        deliveries = None
+        measurement = None
+        for subscription in self.subscriptions:
+            if subscription.mode == REALTIME_MODE_AGGREGATE:
+                subscription.accumulator.add(timestamp, usage)
+                if now >= subscription.next_send:
+                    subscription.next_send = now + subscription.interval_sec
+                    if deliveries is None:
+                        deliveries = []
+                    deliveries.append(
+                        (
+                            subscription.target,
+                            subscription.accumulator.pop_summary(self.gateway_id),
+                        )
+                    )
+            elif now >= subscription.next_send:
+                subscription.next_send = now + subscription.interval_sec
+                if measurement is None:
+                    measurement = RealtimeUsageMeasurement(data)
+                if deliveries is None:
+                    deliveries = []
+                deliveries.append((subscription.target, measurement))
+        return deliveries
+
+    def as_dict(self) -> "list[dict]":
+        """Get the subscribers and their rates, e.g. for diagnostics."""
+        return [
+            {
+                "source": subscription.source,
+                "mode": subscription.mode,
+                "interval": subscription.interval_sec,
+            }
+            for subscription in self.subscriptions
+        ]
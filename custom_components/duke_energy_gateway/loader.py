@@ -0,0 +1,31 @@
+"""Deferred imports of the integration's heavier modules, run off the event loop when they are first needed."""
+import importlib
+from types import ModuleType
+
+from homeassistant.core import HomeAssistant
+
+# Modules that import pyduke-energy's API client and types (and with them dateutil and paho-mqtt),
+# which are only needed to check a login or set up an entry
+API_MODULES = (
+    f"{__package__}.account",
+    f"{__package__}.backfill",
+    f"{__package__}.coordinator",
+    f"{__package__}.storage",
+)
+
+# pyduke-energy's real-time client, which is only needed once a sensor starts the real-time stream
+REALTIME_MODULE = "pyduke_energy.realtime"
+
+
+async def async_import(hass: HomeAssistant, *names: str) -> "list[ModuleType]":
+    """Import modules in the executor, so their import time isn't spent on the event loop.
+
+    Modules that are already imported come straight back from `sys.modules`, but this always goes
+    through the executor, as a module another setup is still importing is in `sys.modules` before
+    it has finished.
+    """
+    return await hass.async_add_executor_job(_import_modules, names)
+
+
+def _import_modules(names: "tuple[str, ...]") -> "list[ModuleType]":
+    return [importlib.import_module(name) for name in names]
@@ -0,0 +1,99 @@
+"""Lightweight performance counters for Duke Energy Gateway."""
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+from dataclasses import field
+
+from homeassistant.util import dt
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket histogram of durations in milliseconds."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms: float = None
+
+    def record(self, duration_ms: float):
+        """Record a duration."""
+        self.counts[bisect_left(LATENCY_BUCKETS_MS, duration_ms)] += 1
+        self.count += 1
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self.last_ms = duration_ms
+
+    def as_dict(self) -> dict:
+        """Get the histogram as a dictionary, e.g. for diagnostics."""
+        buckets = {
+            f"<={bound}": count for bound, count in zip(LATENCY_BUCKETS_MS, self.counts)
+        }
+        buckets[f">{LATENCY_BUCKETS_MS[-1]}"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "mean_ms": self.total_ms / self.count if self.count else None,
+            "max_ms": self.max_ms,
+            "last_ms": self.last_ms,
+            "buckets": buckets,
+        }
+
+
+@dataclass
+class DukeEnergyGatewayMetrics:
+    """Counters for the polling and real-time paths of a coordinator."""
+
+    polls: int = 0
+    poll_failures: int = 0
+    poll_duration: LatencyHistogram = field(default_factory=LatencyHistogram)
+    last_poll_measurements: int = 0
+    last_poll_success: float = None  # unix timestamp
+    realtime_messages_received: int = 0
+    realtime_messages_dispatched: int = 0
+    realtime_messages_throttled: int = 0
+    realtime_parse_errors: int = 0
+    realtime_reconnects: int = 0
+    realtime_last_message: float = (
+        None  # monotonic, to keep the real-time handler cheap
+    )
+
+    def record_poll(self, started: float, measurements: int):
+        """Record a successful poll that started at the given perf_counter time."""
+        self.polls += 1
+        self.poll_duration.record((time.perf_counter() - started) * 1000)
+        self.last_poll_measurements = measurements
+        self.last_poll_success = time.time()
+
+    def record_poll_failure(self, started: float):
+        """Record a failed poll that started at the given perf_counter time."""
+        self.polls += 1
+        self.poll_failures += 1
+        self.poll_duration.record((time.perf_counter() - started) * 1000)
+
+    def as_dict(self) -> dict:
+        """Get the counters as a dictionary, e.g. for diagnostics."""
+        return {
+            "polls": self.polls,
+            "poll_failures": self.poll_failures,
+            "poll_duration": self.poll_duration.as_dict(),
+            "last_poll_measurements": self.last_poll_measurements,
+            "last_poll_success": _as_datetime(self.last_poll_success),
+            "realtime_messages_received": self.realtime_messages_received,
+            "realtime_messages_dispatched": self.realtime_messages_dispatched,
+            "realtime_messages_throttled": self.realtime_messages_throttled,
+            "realtime_parse_errors": self.realtime_parse_errors,
+            "realtime_reconnects": self.realtime_reconnects,
+            "realtime_last_message": _as_datetime(
+                time.time() - (time.monotonic() - self.realtime_last_message)
+                if self.realtime_last_message is not None
+                else None
+            ),
+        }
+
+
+def _as_datetime(timestamp: float):
+    return dt.utc_from_timestamp(timestamp) if timestamp is not None else None
@@ -0,0 +1,124 @@
+"""Adaptive scheduling of usage polls around when the gateway publishes new minute data."""
+from collections import deque
+from typing import Optional
+
+# How long after new data is expected to poll for it, to allow for jitter in when it is published
+POLL_MARGIN_SEC = 20
+
+# Number of recent bursts to take the cadence from. The shortest gap between them is used, since a longer
+# one is usually a burst the gateway skipped.
+CADENCE_WINDOW = 8
+
+# Fraction of the lag estimate to try polling earlier by after each poll that found data on time
+LAG_PROBE_FRACTION = 0.1
+LAG_PROBE_MIN_SEC = 5
+
+
+class AdaptivePollInterval:
+    """Picks the delay before the next usage poll from the timestamps of the data each poll returns.
+
+    The gateway publishes minute data in bursts, every `cadence_sec` seconds, with each burst
+    covering up to `lag_sec` seconds before it was published. So once data up to timestamp `t` has
+    been seen, the next burst is expected at `t + cadence_sec + lag_sec`, and polls before then would
+    find nothing new. When a burst is late or a poll fails, polls back off from the minimum interval
+    instead.
+
+    A poll only shows that data was published some time since the previous poll, so the lag is
+    learned by probing: each poll that finds data on time tries a little earlier next time, and a
+    poll that finds nothing narrows down when the burst was really published.
+    """
+
+    def __init__(self, min_sec: float, max_sec: float):
+        self.min_sec = min_sec
+        self.max_sec = max_sec
+        self.offset_sec = 0  # extra delay, to keep meters on the same account apart
+        self.lag_sec: float = None
+        self.cadence_sec: float = None
+        self._cadences: deque[int] = deque(maxlen=CADENCE_WINDOW)
+        self.last_timestamp: int = None  # latest measurement seen
+        self.last_poll: float = None  # unix time of the previous poll
+        self.expected: float = (
+            None  # unix time the next burst is expected to be published
+        )
+        self.misses = 0  # consecutive polls that found nothing new or failed
+        self.interval_sec: float = min_sec
+
+    def set_bounds(self, min_sec: float, max_sec: float):
+        """Change the bounds of the poll interval."""
+        self.min_sec = min_sec
+        self.max_sec = max_sec
+
+    def record_poll(self, now: float, last_timestamp: Optional[int]) -> float:
+        """Record a poll at unix time `now` that had data up to `last_timestamp`, returning the next interval."""
+        previous_poll, self.last_poll = self.last_poll, now
+        if last_timestamp is None or (
+            self.last_timestamp is not None and last_timestamp <= self.last_timestamp
+        ):
+            if self.expected is not None and now < self.expected:
+                # Polled before the burst is due (e.g. the first poll after a restart), so wait for it
+                return self._set_interval(
+                    self.expected + POLL_MARGIN_SEC + self.offset_sec - now
+                )
+            self.misses += 1
+            if self.expected is None:
+                # Don't know when to expect data yet
+                return self._set_interval(self.min_sec)
+            # The burst is late or was skipped, so poll again after as long as it is overdue by,
+            # but no later than the burst after it
+            overdue = (now - self.expected) % self.cadence_sec
+            return self._set_interval(
+                min(overdue, self.cadence_sec - overdue + POLL_MARGIN_SEC)
+            )
+
+        if self.last_timestamp is not None:
+            self._cadences.append(last_timestamp - self.last_timestamp)
+            self.cadence_sec = min(self._cadences)
+        lag_max = max(now - last_timestamp, 0)
+        if self.lag_sec is None:
+            self.lag_sec = lag_max
+        elif self.misses and previous_poll is not None:
+            # The data was published between the previous poll, which found nothing, and now
+            lag_min = min(max(previous_poll - last_timestamp, 0), lag_max)
+            self.lag_sec = (self.lag_sec + (lag_min + lag_max) / 2) / 2
+        else:
+            self.lag_sec = max(
+                min(self.lag_sec, lag_max)
+                - max(self.lag_sec * LAG_PROBE_FRACTION, LAG_PROBE_MIN_SEC),
+                0,
+            )
+        self.last_timestamp = last_timestamp
+        self.misses = 0
+
+        if self.cadence_sec is None:
+            # Need a second burst to learn the cadence
+            self.expected = None
+            return self._set_interval(self.min_sec)
+
+        self.expected = last_timestamp + self.cadence_sec + self.lag_sec
+        return self._set_interval(
+            self.expected + POLL_MARGIN_SEC + self.offset_sec - now
+        )
+
+    def record_failure(self) -> float:
+        """Record a failed poll, returning the next interval."""
+        self.misses += 1
+        return self._set_interval(self._backoff())
+
+    def as_dict(self) -> dict:
+        """Get the state of the schedule as a dictionary, e.g. for diagnostics."""
+        return {
+            "interval_sec": self.interval_sec,
+            "min_sec": self.min_sec,
+            "max_sec": self.max_sec,
+            "offset_sec": self.offset_sec,
+            "lag_sec": self.lag_sec,
+            "cadence_sec": self.cadence_sec,
+            "misses": self.misses,
+        }
+
+    def _backoff(self) -> float:
+        return self.min_sec * 2 ** max(self.misses - 1, 0)
+
+    def _set_interval(self, interval_sec: float) -> float:
+        self.interval_sec = min(max(interval_sec, self.min_sec), self.max_sec)
+        return self.interval_sec
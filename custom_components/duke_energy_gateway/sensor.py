@@ -1,22 +1,36 @@
 """Sensor platform for Duke Energy Gateway."""
 import logging
+import time
 from abc import ABC
 from abc import abstractmethod
 from dataclasses import dataclass
+from datetime import date
+from datetime import timedelta
 
 from homeassistant.components.sensor import SensorEntity
 from homeassistant.components.sensor import STATE_CLASS_MEASUREMENT
 from homeassistant.components.sensor import STATE_CLASS_TOTAL_INCREASING
+from homeassistant.core import callback
 from homeassistant.helpers import device_registry
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+from homeassistant.helpers.entity import EntityCategory
+from homeassistant.helpers.event import async_track_time_change
 from homeassistant.util import dt
+from homeassistant.util import slugify
 from pyduke_energy.types import GatewayStatus
 from pyduke_energy.types import MeterInfo
 from pyduke_energy.types import RealtimeUsageMeasurement
-from pyduke_energy.types import UsageMeasurement
 
 from .const import DOMAIN
+from .const import REALTIME_DERIVED_INTERVAL_SEC
+from .const import REALTIME_MODE_SAMPLE
 from .coordinator import DukeEnergyGatewayUsageDataUpdateCoordinator
+from .demand import BASE_LOAD_WINDOW_MIN
+from .demand import DEMAND_WINDOWS_MIN
 from .entity import DukeEnergyGatewayEntity
+from .hub import RealtimeUsageAggregate
+from .tariff import TariffPeriod
+from .usage import billing_cycle_start
 
 _LOGGER: logging.Logger = logging.getLogger(__package__)
 
@@ -58,9 +72,45 @@ async def async_setup_entry(hass, entry, async_add_entities):
     # Total usage today sensor
     sensors.append(_TotalUsageTodaySensor(coordinator, entry, meter, gateway))
 
+    # Usage over longer periods, from the daily usage
+    sensors.append(_UsageYesterdaySensor(coordinator, entry, meter, gateway))
+    sensors.append(_UsageLast7DaysSensor(coordinator, entry, meter, gateway))
+    sensors.append(_UsageMonthToDateSensor(coordinator, entry, meter, gateway))
+    sensors.append(_UsageBillingCycleSensor(coordinator, entry, meter, gateway))
+
+    # Today's usage projected to the end of the day from the load profile
+    sensors.append(_UsageForecastTodaySensor(coordinator, entry, meter, gateway))
+
+    # Cost sensors, when there is a tariff, with usage and cost sensors for each of its periods
+    if coordinator.tariff is not None:
+        sensors.append(_CostTodaySensor(coordinator, entry, meter, gateway))
+        sensors.append(_CurrentRateSensor(coordinator, entry, meter, gateway))
+        for period in coordinator.tariff.period_names:
+            sensors.append(
+                _PeriodUsageTodaySensor(period, coordinator, entry, meter, gateway)
+            )
+            sensors.append(
+                _PeriodCostTodaySensor(period, coordinator, entry, meter, gateway)
+            )
+
+    # Peak demand and base load from the minute usage, and recent demand from the real-time stream
+    for minutes in DEMAND_WINDOWS_MIN:
+        sensors.append(
+            _PeakDemandTodaySensor(minutes, coordinator, entry, meter, gateway)
+        )
+    sensors.append(_BaseLoadSensor(coordinator, entry, meter, gateway))
+    sensors.append(_RealtimeDemandSensor(coordinator, entry, meter, gateway))
+
     # Real-time usage sensor
     sensors.append(_RealtimeUsageSensor(coordinator, entry, meter, gateway))
 
+    # Real-time usage today sensor
+    sensors.append(_RealtimeUsageTodaySensor(coordinator, entry, meter, gateway))
+
+    # Diagnostic sensors (disabled by default)
+    sensors.append(_ApiPollDurationSensor(coordinator, entry, meter, gateway))
+    sensors.append(_RealtimeMessagesSensor(coordinator, entry, meter, gateway))
+
     async_add_entities(sensors)
 
 
@@ -73,6 +123,9 @@ class _SensorMetadata:
     device_class: str
     state_class: str
     should_poll: bool
+    entity_category: EntityCategory = None
+    enabled_default: bool = True
+    uses_usage_data: bool = True  # shows the polled usage, so can be stale
 
 
 class DukeEnergyGatewaySensor(DukeEnergyGatewayEntity, SensorEntity, ABC):
@@ -140,6 +193,28 @@ class DukeEnergyGatewaySensor(DukeEnergyGatewayEntity, SensorEntity, ABC):
         """Return the state class of the sensor"""
         return self._sensor_metadata.state_class
 
+    @property
+    def entity_category(self):
+        """Return the category of the sensor, e.g. diagnostic."""
+        return self._sensor_metadata.entity_category
+
+    @property
+    def entity_registry_enabled_default(self) -> bool:
+        """Return if the sensor should be enabled when first added."""
+        return self._sensor_metadata.enabled_default
+
+    @property
+    def extra_state_attributes(self):
+        """Flag the state as stale while the usage API is failing and the last good data is shown."""
+        attrs = super().extra_state_attributes
+
+        stale_since = self._coordinator.stale_since
+        if stale_since is not None and self._sensor_metadata.uses_usage_data:
+            attrs["stale"] = True
+            attrs["stale_since"] = dt.as_local(stale_since)
+
+        return attrs
+
 
 class _TotalUsageTodaySensor(DukeEnergyGatewaySensor):
     @staticmethod
@@ -151,28 +226,21 @@ class _TotalUsageTodaySensor(DukeEnergyGatewaySensor):
             "mdi:flash",
             "energy",
             STATE_CLASS_TOTAL_INCREASING,
-            True,
+            False,  # updated by the coordinator, polling would trigger extra API calls
         )
 
     def update(self):
-        """Return today's usage by summing all measurements."""
-        gw_usage: list[UsageMeasurement] = self._coordinator.data
-        if gw_usage and len(gw_usage) > 0:
-            today_usage = round(sum(x.usage for x in gw_usage) / 1000, 5)
-        else:
-            today_usage = 0
-        self._state = today_usage
+        """Return today's usage from the running total kept by the coordinator."""
+        self._state = round(self._coordinator.usage_today_wh / 1000, 5)
 
     @property
     def extra_state_attributes(self):
         """Record the timestamp of the last measurement into state attributes."""
         attrs = super().extra_state_attributes
 
-        gw_usage: list[UsageMeasurement] = self._coordinator.data
-        if gw_usage and len(gw_usage) > 0:
-            last_measurement = dt.as_local(
-                dt.utc_from_timestamp(gw_usage[-1].timestamp)
-            )
+        last_timestamp = self._coordinator.usage_last_timestamp
+        if last_timestamp is not None:
+            last_measurement = dt.as_local(dt.utc_from_timestamp(last_timestamp))
         else:
             # If no data then it's probably the start of the day so use that as the dates
             last_measurement = dt.start_of_local_day()
@@ -181,6 +249,409 @@ class _TotalUsageTodaySensor(DukeEnergyGatewaySensor):
         return attrs
 
 
+class _UsageForecastTodaySensor(DukeEnergyGatewaySensor):
+    @staticmethod
+    def get_sensor_metadata() -> _SensorMetadata:
+        return _SensorMetadata(
+            "projected_usage_today_kwh",
+            "Projected Usage Today [kWh]",
+            "kWh",
+            "mdi:chart-timeline-variant",
+            "energy",
+            None,  # a projection, so neither a total nor a measurement
+            False,
+        )
+
+    def update(self):
+        """Return today's usage so far plus the typical usage of the rest of the day."""
+        usage_wh = self._coordinator.usage_forecast_today_wh
+        self._state = round(usage_wh / 1000, 3) if usage_wh is not None else None
+
+    @property
+    def extra_state_attributes(self):
+        """Record the projected usage of the rest of the day into state attributes."""
+        attrs = super().extra_state_attributes
+
+        remaining_wh = self._coordinator.usage_remaining_today_wh
+        attrs["remaining_kwh"] = (
+            round(remaining_wh / 1000, 3) if remaining_wh is not None else None
+        )
+        attrs["profile_hours"] = len(self._coordinator.load_profile)
+
+        return attrs
+
+
+class _UsagePeriodSensor(DukeEnergyGatewaySensor, ABC):
+    """Usage over a period of days, from the daily usage kept by the coordinator."""
+
+    @abstractmethod
+    def get_period(self, today: date) -> "tuple[date, date]":
+        """Get the first day of the period and the day after its last day."""
+
+    def update(self):
+        """Return the period's usage, or unknown until the usage of all of its days has been fetched."""
+        today = self._coordinator.usage_today
+        usage_wh = (
+            self._coordinator.get_usage_wh(*self.get_period(today))
+            if today is not None
+            else None
+        )
+        self._state = round(usage_wh / 1000, 3) if usage_wh is not None else None
+
+    @property
+    def extra_state_attributes(self):
+        """Record the first and last days of the period into state attributes."""
+        attrs = super().extra_state_attributes
+
+        today = self._coordinator.usage_today
+        if today is not None:
+            start, end = self.get_period(today)
+            attrs["start_date"] = start
+            attrs["end_date"] = end - timedelta(days=1)
+
+        return attrs
+
+
+class _UsageYesterdaySensor(_UsagePeriodSensor):
+    @staticmethod
+    def get_sensor_metadata() -> _SensorMetadata:
+        return _SensorMetadata(
+            "usage_yesterday_kwh",
+            "Usage Yesterday [kWh]",
+            "kWh",
+            "mdi:flash",
+            "energy",
+            None,  # changes once a day rather than accumulating, so not a total
+            False,
+        )
+
+    def get_period(self, today: date) -> "tuple[date, date]":
+        return today - timedelta(days=1), today
+
+
+class _UsageLast7DaysSensor(_UsagePeriodSensor):
+    @staticmethod
+    def get_sensor_metadata() -> _SensorMetadata:
+        return _SensorMetadata(
+            "usage_last_7_days_kwh",
+            "Usage Last 7 Days [kWh]",
+            "kWh",
+            "mdi:flash",
+            "energy",
+            None,  # a rolling window, so it drops as days leave it
+            False,
+        )
+
+    def get_period(self, today: date) -> "tuple[date, date]":
+        return today - timedelta(days=6), today + timedelta(days=1)
+
+
+class _UsageMonthToDateSensor(_UsagePeriodSensor):
+    @staticmethod
+    def get_sensor_metadata() -> _SensorMetadata:
+        return _SensorMetadata(
+            "usage_month_to_date_kwh",
+            "Usage Month to Date [kWh]",
+            "kWh",
+            "mdi:flash",
+            "energy",
+            STATE_CLASS_TOTAL_INCREASING,
+            False,
+        )
+
+    def get_period(self, today: date) -> "tuple[date, date]":
+        return today.replace(day=1), today + timedelta(days=1)
+
+
+class _UsageBillingCycleSensor(_UsagePeriodSensor):
+    @staticmethod
+    def get_sensor_metadata() -> _SensorMetadata:
+        return _SensorMetadata(
+            "usage_billing_cycle_kwh",
+            "Usage This Billing Cycle [kWh]",
+            "kWh",
+            "mdi:flash",
+            "energy",
+            STATE_CLASS_TOTAL_INCREASING,
+            False,
+        )
+
+    def get_period(self, today: date) -> "tuple[date, date]":
+        return (
+            billing_cycle_start(today, self._coordinator.billing_day),
+            today + timedelta(days=1),
+        )
+
+
+class _CostTodaySensor(DukeEnergyGatewaySensor):
+    @staticmethod
+    def get_sensor_metadata() -> _SensorMetadata:
+        return _SensorMetadata(
+            "cost_today",
+            "Cost Today",
+            None,  # the currency configured in Home Assistant
+            "mdi:cash",
+            "monetary",
+            None,
+            False,
+        )
+
+    @property
+    def unit_of_measurement(self):
+        """Return the currency configured in Home Assistant."""
+        return self.hass.config.currency
+
+    def update(self):
+        """Return today's cost, including fixed charges, from the usage priced by the coordinator."""
+        tariff_today = self._coordinator.tariff_today
+        self._state = (
+            round(tariff_today.get_cost(), 2) if tariff_today is not None else None
+        )
+
+
+class _CurrentRateSensor(DukeEnergyGatewaySensor):
+    @staticmethod
+    def get_sensor_metadata() -> _SensorMetadata:
+        return _SensorMetadata(
+            "current_rate",
+            "Current Rate",
+            None,  # the currency configured in Home Assistant, per kWh
+            "mdi:cash-clock",
+            None,
+            STATE_CLASS_MEASUREMENT,
+            False,
+        )
+
+    def __init__(self, *args, **kwargs):
+        """Initialize the sensor."""
+        self._period: TariffPeriod = None
+        super().__init__(*args, **kwargs)
+
+    async def async_added_to_hass(self):
+        """Check for a change of period at the start of every minute."""
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_change(self.hass, self._async_check_period, second=0)
+        )
+
+    @callback
+    def _async_check_period(self, _now):
+        """Only write a state when the period or its rate has changed."""
+        if self._get_period() != self._period:
+            self.async_write_ha_state()
+
+    def _get_period(self) -> TariffPeriod:
+        tariff = self._coordinator.tariff
+        return tariff.get_period(dt.now()) if tariff is not None else None
+
+    @property
+    def unit_of_measurement(self):
+        """Return the currency configured in Home Assistant, per kWh."""
+        return f"{self.hass.config.currency}/kWh"
+
+    def update(self):
+        """Return the rate of the tariff's current period."""
+        self._period = self._get_period()
+        self._state = self._period.rate if self._period is not None else None
+
+    @property
+    def extra_state_attributes(self):
+        """Record the name of the current period into state attributes."""
+        attrs = super().extra_state_attributes
+        if self._period is not None:
+            attrs["period"] = self._period.name
+        return attrs
+
+
+class _PeriodUsageTodaySensor(DukeEnergyGatewaySensor):
+    """Today's usage in one of the tariff's periods."""
+
+    def __init__(self, period: str, *args, **kwargs):
+        """Initialize the sensor."""
+        self._period = period
+        super().__init__(*args, **kwargs)
+
+    def get_sensor_metadata(self) -> _SensorMetadata:
+        return _SensorMetadata(
+            f"usage_{slugify(self._period)}_today_kwh",
+            f"Usage {_period_title(self._period)} Today [kWh]",
+            "kWh",
+            "mdi:flash",
+            "energy",
+            STATE_CLASS_TOTAL_INCREASING,
+            False,
+        )
+
+    def update(self):
+        """Return today's usage in the period, from the usage priced by the coordinator."""
+        tariff_today = self._coordinator.tariff_today
+        self._state = (
+            round(tariff_today.get_usage_wh(self._period) / 1000, 5)
+            if tariff_today is not None
+            else None
+        )
+
+
+class _PeriodCostTodaySensor(DukeEnergyGatewaySensor):
+    """Today's cost of the usage in one of the tariff's periods."""
+
+    def __init__(self, period: str, *args, **kwargs):
+        """Initialize the sensor."""
+        self._period = period
+        super().__init__(*args, **kwargs)
+
+    def get_sensor_metadata(self) -> _SensorMetadata:
+        return _SensorMetadata(
+            f"cost_{slugify(self._period)}_today",
+            f"Cost {_period_title(self._period)} Today",
+            None,  # the currency configured in Home Assistant
+            "mdi:cash",
+            "monetary",
+            None,
+            False,
+        )
+
+    @property
+    def unit_of_measurement(self):
+        """Return the currency configured in Home Assistant."""
+        return self.hass.config.currency
+
+    def update(self):
+        """Return today's cost of the usage in the period, without fixed charges."""
+        tariff_today = self._coordinator.tariff_today
+        self._state = (
+            round(tariff_today.get_cost(self._period), 2)
+            if tariff_today is not None
+            else None
+        )
+
+
+def _period_title(period: str) -> str:
+    """Get a tariff period's name for a sensor name, e.g. "On Peak" for "on_peak"."""
+    return period.replace("_", " ").title()
+
+
+class _PeakDemandTodaySensor(DukeEnergyGatewaySensor):
+    """Today's highest average demand over a window of minutes."""
+
+    def __init__(self, minutes: int, *args, **kwargs):
+        """Initialize the sensor."""
+        self._minutes = minutes
+        super().__init__(*args, **kwargs)
+
+    def get_sensor_metadata(self) -> _SensorMetadata:
+        return _SensorMetadata(
+            f"peak_demand_{self._minutes}_min_today_kw",
+            f"Peak Demand {self._minutes} Min Today [kW]",
+            "kW",
+            "mdi:chart-bell-curve",
+            "power",
+            STATE_CLASS_MEASUREMENT,
+            False,
+        )
+
+    def update(self):
+        """Return the peak from the demand tracked by the coordinator."""
+        demand = self._coordinator.demand
+        peak = demand.peaks[self._minutes] if demand is not None else None
+        self._state = round(peak[0] / 1000, 3) if peak is not None else None
+
+    @property
+    def extra_state_attributes(self):
+        """Record when the peak window started and ended into state attributes."""
+        attrs = super().extra_state_attributes
+        demand = self._coordinator.demand
+        peak = demand.peaks[self._minutes] if demand is not None else None
+        if peak is not None:
+            _add_window_attributes(attrs, peak[1], self._minutes)
+        return attrs
+
+
+class _BaseLoadSensor(DukeEnergyGatewaySensor):
+    @staticmethod
+    def get_sensor_metadata() -> _SensorMetadata:
+        return _SensorMetadata(
+            "base_load_w",
+            "Base Load [W]",
+            "W",
+            "mdi:power-sleep",
+            "power",
+            STATE_CLASS_MEASUREMENT,
+            False,
+        )
+
+    def update(self):
+        """Return last night's lowest hourly average demand, from the demand tracked by the coordinator."""
+        demand = self._coordinator.demand
+        base_load = demand.base_load if demand is not None else None
+        self._state = round(base_load[0], 1) if base_load is not None else None
+
+    @property
+    def extra_state_attributes(self):
+        """Record when the lowest window started and ended into state attributes."""
+        attrs = super().extra_state_attributes
+        demand = self._coordinator.demand
+        if demand is not None and demand.base_load is not None:
+            _add_window_attributes(attrs, demand.base_load[1], BASE_LOAD_WINDOW_MIN)
+        return attrs
+
+
+def _add_window_attributes(attrs: dict, window_end: int, minutes: int):
+    """Add the local start and end times of a window of minutes to state attributes."""
+    end = dt.as_local(dt.utc_from_timestamp(window_end))
+    attrs["window_start"] = end - timedelta(minutes=minutes)
+    attrs["window_end"] = end
+
+
+class _RealtimeDemandSensor(DukeEnergyGatewaySensor):
+    @staticmethod
+    def get_sensor_metadata() -> _SensorMetadata:
+        return _SensorMetadata(
+            "realtime_demand_15_min_w",
+            "Real-time Demand 15 Min [W]",
+            "W",
+            "mdi:flash",
+            "power",
+            STATE_CLASS_MEASUREMENT,
+            False,
+            uses_usage_data=False,
+        )
+
+    def update(self):
+        """Return the mean of the real-time readings in the window kept by the coordinator."""
+        mean = self._coordinator.realtime_demand.mean
+        self._state = round(mean, 1) if mean is not None else None
+
+    @property
+    def extra_state_attributes(self):
+        """Record the lowest and highest readings in the window into state attributes."""
+        attrs = super().extra_state_attributes
+        window = self._coordinator.realtime_demand
+        attrs["min"] = window.min
+        attrs["max"] = window.max
+        attrs["sample_count"] = len(window)
+        return attrs
+
+    async def async_added_to_hass(self):
+        """Subscribe to updates."""
+        await super().async_added_to_hass()
+
+        @callback
+        def async_on_new_measurement(_measurement: RealtimeUsageMeasurement):
+            self.async_write_ha_state()
+
+        # The window is kept by the coordinator and changes slowly, so a sample a minute is
+        # enough to show it, whatever the real-time options
+        self.async_on_remove(
+            self._coordinator.async_realtime_subscribe(
+                _RealtimeDemandSensor.__name__,
+                async_on_new_measurement,
+                mode=REALTIME_MODE_SAMPLE,
+                interval_sec=REALTIME_DERIVED_INTERVAL_SEC,
+            )
+        )
+
+
 class _RealtimeUsageSensor(DukeEnergyGatewaySensor):
     @staticmethod
     def get_sensor_metadata() -> _SensorMetadata:
@@ -192,30 +663,183 @@ class _RealtimeUsageSensor(DukeEnergyGatewaySensor):
             "power",
             STATE_CLASS_MEASUREMENT,
             False,
+            uses_usage_data=False,
         )
 
+    def __init__(self, *args, **kwargs):
+        """Initialize the sensor."""
+        self._aggregate: RealtimeUsageAggregate = None
+        self._written_at: float = None  # monotonic time of the last state written
+        super().__init__(*args, **kwargs)
+
     async def async_added_to_hass(self):
         """Subscribe to updates."""
-        # Setup subscriber callback
-        async def async_on_new_measurement(measurement: RealtimeUsageMeasurement):
+        # Setup subscriber callback, called directly on the event loop for each measurement
+        @callback
+        def async_on_new_measurement(measurement: RealtimeUsageMeasurement):
             _LOGGER.debug("New measurement received: %f", measurement.usage)
+            if not self._should_write(measurement.usage):
+                return
             self._state = measurement.usage
+            if isinstance(measurement, RealtimeUsageAggregate):
+                self._aggregate = measurement
             self.async_write_ha_state()
 
-        # Attach subscriber callback
-        self._coordinator.async_realtime_subscribe_to_dispatcher(
-            _RealtimeUsageSensor.__name__, async_on_new_measurement
+        # Attach subscriber callback, at the rate from the options. The first subscriber starts the
+        # real-time stream, and it is stopped once every subscriber is removed.
+        self.async_on_remove(
+            self._coordinator.async_realtime_subscribe(
+                _RealtimeUsageSensor.__name__, async_on_new_measurement
+            )
         )
 
-        # Initialize the real-time data stream
-        self._coordinator.realtime_initialize()
+        # Update availability when the stream connects or disconnects
+        self.async_on_remove(
+            async_dispatcher_connect(
+                self.hass,
+                self._coordinator.realtime_status_signal,
+                self.async_write_ha_state,
+            )
+        )
+
+    def _should_write(self, usage: float) -> bool:
+        """Check if a measurement moved outside the deadband of the last state, or the heartbeat is due."""
+        now = time.monotonic()
+        if self._state is not None:
+            deadband = max(
+                self._coordinator.realtime_deadband_w,
+                abs(self._state) * self._coordinator.realtime_deadband_percent / 100,
+            )
+            heartbeat = self._coordinator.realtime_heartbeat_sec
+            if abs(usage - self._state) < deadband and (
+                not heartbeat or now - self._written_at < heartbeat
+            ):
+                return False
+        self._written_at = now
+        return True
+
+    @property
+    def available(self) -> bool:
+        """The sensor is only available while the real-time stream is delivering messages."""
+        return self._coordinator.realtime_connected
+
+    @property
+    def extra_state_attributes(self):
+        """Record the summary of the last interval into state attributes when aggregating."""
+        attrs = super().extra_state_attributes
+
+        if self._aggregate:
+            attrs["min"] = self._aggregate.usage_min
+            attrs["max"] = self._aggregate.usage_max
+            attrs["last"] = self._aggregate.usage_last
+            attrs["sample_count"] = self._aggregate.count
+
+        return attrs
 
-    async def async_will_remove_from_hass(self):
-        """Undo subscription."""
-        # Cancel the real-time data stream task
-        self._coordinator.realtime_cancel()
 
-        # Remove subscriber callback
-        self._coordinator.async_realtime_unsubscribe_from_dispatcher(
-            _RealtimeUsageSensor.__name__
+class _RealtimeUsageTodaySensor(DukeEnergyGatewaySensor):
+    @staticmethod
+    def get_sensor_metadata() -> _SensorMetadata:
+        return _SensorMetadata(
+            "realtime_usage_today_kwh",
+            "Real-time Usage Today [kWh]",
+            "kWh",
+            "mdi:flash",
+            "energy",
+            None,  # can dip slightly when gateway data replaces the estimate, so not a total
+            False,
         )
+
+    def update(self):
+        """Return today's usage including the real-time estimate for recent minutes."""
+        self._state = round(self._coordinator.usage_today_realtime_wh / 1000, 5)
+
+    async def async_added_to_hass(self):
+        """Subscribe to updates."""
+        await super().async_added_to_hass()
+
+        # Setup subscriber callback, called directly on the event loop for each measurement
+        @callback
+        def async_on_new_measurement(_measurement: RealtimeUsageMeasurement):
+            self.async_write_ha_state()
+
+        # Attach subscriber callback. The estimate is kept by the coordinator, so a sample a
+        # minute is enough to show it, whatever the real-time options.
+        self.async_on_remove(
+            self._coordinator.async_realtime_subscribe(
+                _RealtimeUsageTodaySensor.__name__,
+                async_on_new_measurement,
+                mode=REALTIME_MODE_SAMPLE,
+                interval_sec=REALTIME_DERIVED_INTERVAL_SEC,
+            )
+        )
+
+
+class _ApiPollDurationSensor(DukeEnergyGatewaySensor):
+    @staticmethod
+    def get_sensor_metadata() -> _SensorMetadata:
+        return _SensorMetadata(
+            "api_poll_duration_ms",
+            "API Poll Duration [ms]",
+            "ms",
+            "mdi:timer-outline",
+            "duration",
+            STATE_CLASS_MEASUREMENT,
+            False,
+            EntityCategory.DIAGNOSTIC,
+            False,
+            uses_usage_data=False,
+        )
+
+    def update(self):
+        """Return the duration of the last usage poll."""
+        last_ms = self._coordinator.metrics.poll_duration.last_ms
+        self._state = round(last_ms, 1) if last_ms is not None else None
+
+    @property
+    def extra_state_attributes(self):
+        """Record the poll counters into state attributes."""
+        attrs = super().extra_state_attributes
+
+        metrics = self._coordinator.metrics
+        attrs["polls"] = metrics.polls
+        attrs["poll_failures"] = metrics.poll_failures
+        attrs["mean_ms"] = metrics.poll_duration.as_dict()["mean_ms"]
+        attrs["max_ms"] = metrics.poll_duration.max_ms
+        attrs["last_poll_measurements"] = metrics.last_poll_measurements
+
+        return attrs
+
+
+class _RealtimeMessagesSensor(DukeEnergyGatewaySensor):
+    @staticmethod
+    def get_sensor_metadata() -> _SensorMetadata:
+        return _SensorMetadata(
+            "realtime_messages",
+            "Real-time Messages",
+            None,
+            "mdi:counter",
+            None,
+            STATE_CLASS_TOTAL_INCREASING,
+            False,
+            EntityCategory.DIAGNOSTIC,
+            False,
+            uses_usage_data=False,
+        )
+
+    def update(self):
+        """Return the number of real-time messages received, refreshed with each poll."""
+        self._state = self._coordinator.metrics.realtime_messages_received
+
+    @property
+    def extra_state_attributes(self):
+        """Record the real-time counters into state attributes."""
+        attrs = super().extra_state_attributes
+
+        metrics = self._coordinator.metrics
+        attrs["dispatched"] = metrics.realtime_messages_dispatched
+        attrs["throttled"] = metrics.realtime_messages_throttled
+        attrs["parse_errors"] = metrics.realtime_parse_errors
+        attrs["reconnects"] = metrics.realtime_reconnects
+
+        return attrs
@@ -0,0 +1,52 @@
+"""Local cache of Duke Energy Gateway data that survives restarts."""
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from pyduke_energy.types import GatewayStatus
+from pyduke_energy.types import MeterInfo
+
+from .const import DOMAIN
+
+STORAGE_VERSION = 1
+STORAGE_SAVE_DELAY = 60  # seconds
+
+
+def get_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Get the store used to cache data for a config entry."""
+    return Store(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+
+
+# The meter and gateway are stored using the API's field names so the pyduke_energy types can rebuild them.
+def meter_to_dict(meter: MeterInfo) -> dict:
+    """Serialize a meter for storage."""
+    return {
+        "meterType": meter.meter_type,
+        "serialNum": meter.serial_num,
+        "agreementActiveDate": meter.agreement_active_date.isoformat(),
+        "isCertifiedSmartMeter": meter.is_certified_smart_meter,
+        "opCenter": meter.op_center,
+        "serviceId": meter.service_id,
+        "transformerNumber": meter.transformer_number,
+    }
+
+
+def meter_from_dict(data: dict) -> MeterInfo:
+    """Deserialize a stored meter."""
+    return MeterInfo(data)
+
+
+def gateway_to_dict(gateway: GatewayStatus) -> dict:
+    """Serialize a gateway for storage."""
+    return {
+        "_id": gateway.id,
+        "serviceState": gateway.service_state,
+        "serviceDt": gateway.service_date.isoformat(),
+        "connected": gateway.connected,
+        "connectTm": gateway.connect_date.isoformat(),
+        "gwMAC": gateway.mac_address,
+        "zgbMAC": gateway.zigbee_mac_address,
+    }
+
+
+def gateway_from_dict(data: dict) -> GatewayStatus:
+    """Deserialize a stored gateway."""
+    return GatewayStatus(data)
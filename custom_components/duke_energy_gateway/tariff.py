@@ -0,0 +1,246 @@
+"""Time-of-use tariffs, compiled into per-minute rate lookups for pricing minute usage."""
+import calendar
+import json
+from dataclasses import dataclass
+from datetime import date
+from datetime import datetime
+from typing import Optional
+
+from .usage import UsageSeries
+
+MINUTES_PER_DAY = 24 * 60
+
+# Days of the week (Monday is 0) that a period can apply to, by name
+DAY_SETS = {
+    "all": range(7),
+    "weekdays": range(5),
+    "weekends": range(5, 7),
+}
+
+
+@dataclass(frozen=True)
+class TariffPeriod:
+    """A named period of a tariff and its rate per kWh."""
+
+    name: str
+    rate: float
+
+
+class Tariff:
+    """A tariff compiled into the period of every minute of each kind of day.
+
+    Periods apply to minutes of the day in some months and days of the week. They are compiled once
+    into one profile per distinct kind of day, each holding the index of the period for every minute,
+    so pricing a measurement is a lookup rather than matching it against the rules. A period with
+    different rates in different seasons is a separate entry in `periods` for each rate.
+    """
+
+    __slots__ = (
+        "periods",
+        "fixed_per_day",
+        "fixed_per_month",
+        "_profiles",
+        "_profile_by_day",
+    )
+
+    def __init__(
+        self,
+        periods: "list[TariffPeriod]",
+        fixed_per_day: float,
+        fixed_per_month: float,
+        profiles: "list[bytes]",
+        profile_by_day: "list[list[int]]",
+    ):
+        self.periods = periods
+        self.fixed_per_day = fixed_per_day
+        self.fixed_per_month = fixed_per_month
+        self._profiles = profiles
+        self._profile_by_day = profile_by_day  # by month - 1, then by weekday
+
+    @classmethod
+    def parse(cls, text: str) -> Optional["Tariff"]:
+        """Compile a tariff from its JSON configuration, or None if there is none. Raises ValueError if it isn't valid."""
+        if not text or not text.strip():
+            return None
+        try:
+            config = json.loads(text)
+        except ValueError as exception:
+            raise ValueError(f"Tariff is not valid JSON: {exception}") from exception
+        if not isinstance(config, dict):
+            raise ValueError("Tariff must be a JSON object")
+        return cls.from_config(config)
+
+    @classmethod
+    def from_config(cls, config: dict) -> "Tariff":
+        """Compile a tariff from its configuration. Raises ValueError if it isn't valid.
+
+        The first period in `periods` that applies to a minute is used, and `default_period` for
+        minutes none of them apply to.
+        """
+        try:
+            default = TariffPeriod(
+                str(config.get("default_period", "standard")),
+                float(config["default_rate"]),
+            )
+            fixed_per_day = float(config.get("fixed_per_day", 0))
+            fixed_per_month = float(config.get("fixed_per_month", 0))
+            rules = [_parse_rule(rule) for rule in config.get("periods", [])]
+        except (AttributeError, KeyError, TypeError, ValueError) as exception:
+            raise ValueError(f"Invalid tariff: {exception}") from exception
+
+        periods = [default]
+        for rule in rules:
+            if rule[0] not in periods:
+                periods.append(rule[0])
+        if len(periods) > 256:
+            raise ValueError("Tariff has too many periods")
+
+        profiles: list[bytes] = []
+        profile_indexes: dict[bytes, int] = {}
+        profile_by_day = []
+        for month in range(1, 13):
+            by_weekday = []
+            for weekday in range(7):
+                profile = bytearray(MINUTES_PER_DAY)  # all the default period
+                # Fill in reverse, so earlier periods overwrite later ones
+                for period, months, weekdays, start, end in reversed(rules):
+                    if month in months and weekday in weekdays:
+                        index = periods.index(period)
+                        if start < end:
+                            profile[start:end] = bytes([index]) * (end - start)
+                        else:
+                            # Wraps past midnight
+                            profile[start:] = bytes([index]) * (MINUTES_PER_DAY - start)
+                            profile[:end] = bytes([index]) * end
+                profile = bytes(profile)
+                if profile not in profile_indexes:
+                    profile_indexes[profile] = len(profiles)
+                    profiles.append(profile)
+                by_weekday.append(profile_indexes[profile])
+            profile_by_day.append(by_weekday)
+
+        return cls(periods, fixed_per_day, fixed_per_month, profiles, profile_by_day)
+
+    @property
+    def period_names(self) -> "list[str]":
+        """Names of the tariff's periods, without duplicates for seasonal rates."""
+        return list(dict.fromkeys(period.name for period in self.periods))
+
+    def get_period(self, local: datetime) -> TariffPeriod:
+        """Get the period a local time is in."""
+        profile = self._profiles[self._profile_by_day[local.month - 1][local.weekday()]]
+        return self.periods[profile[local.hour * 60 + local.minute]]
+
+    def get_fixed_charge(self, day: date) -> float:
+        """Get the fixed charges for a day, with monthly charges split evenly over the month's days."""
+        days_in_month = calendar.monthrange(day.year, day.month)[1]
+        return self.fixed_per_day + self.fixed_per_month / days_in_month
+
+    def get_day_periods(self, day_start: datetime, day_end: datetime) -> bytes:
+        """Get the index of the period of each minute from the start of a local day, for the minutes until its end.
+
+        On days with a daylight saving time change the day is not 24 hours long, so each hour is
+        mapped to the local time it starts at.
+        """
+        profile = self._profiles[
+            self._profile_by_day[day_start.month - 1][day_start.weekday()]
+        ]
+        start = day_start.timestamp()
+        minutes = int(day_end.timestamp() - start) // 60
+        if minutes == MINUTES_PER_DAY:
+            return profile
+
+        periods = bytearray()
+        for minute in range(0, minutes, 60):
+            local = datetime.fromtimestamp(start + minute * 60, day_start.tzinfo)
+            wall_minute = local.hour * 60 + local.minute
+            periods += profile[wall_minute : wall_minute + 60]
+        return bytes(periods)
+
+
+def _parse_rule(rule: dict) -> "tuple[TariffPeriod, set[int], range, int, int]":
+    """Parse a period of a tariff's configuration into (period, months, weekdays, start minute, end minute)."""
+    period = TariffPeriod(str(rule["name"]), float(rule["rate"]))
+    months = set(rule.get("months", range(1, 13)))
+    if not months <= set(range(1, 13)):
+        raise ValueError(f"months of '{period.name}' must be from 1 to 12")
+    days = rule.get("days", "all")
+    if isinstance(days, str):
+        if days not in DAY_SETS:
+            raise ValueError(
+                f"days of '{period.name}' must be one of {', '.join(DAY_SETS)} or a list of weekdays"
+            )
+        weekdays = DAY_SETS[days]
+    else:
+        weekdays = set(days)
+        if not weekdays <= set(range(7)):
+            raise ValueError(f"days of '{period.name}' must be from 0 (Monday) to 6")
+    start = _parse_time(rule.get("start", "00:00"))
+    end = _parse_time(rule.get("end", "24:00"))
+    if start == end:
+        raise ValueError(f"'{period.name}' must not start and end at the same time")
+    return period, months, weekdays, start, end % MINUTES_PER_DAY
+
+
+def _parse_time(text: str) -> int:
+    """Parse a time of day in HH:MM format into minutes since midnight, allowing 24:00 for the end of the day."""
+    hours, minutes = (int(part) for part in str(text).split(":"))
+    if not 0 <= minutes < 60 or not 0 <= hours * 60 + minutes <= MINUTES_PER_DAY:
+        raise ValueError(f"'{text}' is not a time of day")
+    return hours * 60 + minutes
+
+
+class TariffDay:
+    """Usage in each of a tariff's periods over a local day, so its cost is the usage times the rates.
+
+    Each measurement is priced as it is merged by adding it to its period's usage, found by looking
+    up the minute in the day's compiled periods.
+    """
+
+    __slots__ = ("tariff", "day", "start", "end", "periods", "usage_wh")
+
+    def __init__(self, tariff: Tariff, day_start: datetime, day_end: datetime):
+        self.tariff = tariff
+        self.day = day_start.date()
+        self.start = int(day_start.timestamp())
+        self.end = int(day_end.timestamp())
+        self.periods = tariff.get_day_periods(day_start, day_end)
+        self.usage_wh = [0.0] * len(tariff.periods)
+
+    def add(self, timestamp: int, usage: float):
+        """Add usage (Wh) for the minute at the timestamp, if it is in the day."""
+        if self.start <= timestamp < self.end:
+            self.usage_wh[self.periods[(timestamp - self.start) // 60]] += usage
+
+    def add_series(self, series: UsageSeries):
+        """Add the usage of the series' measurements in the day, e.g. to reprice it for a new tariff."""
+        start_index = series.index(self.start)
+        end_index = series.index(self.end)
+        start = self.start
+        periods = self.periods
+        usage_wh = self.usage_wh
+        for timestamp, usage in zip(
+            series.timestamps[start_index:end_index],
+            series.usage[start_index:end_index],
+        ):
+            usage_wh[periods[(timestamp - start) // 60]] += usage
+
+    def get_usage_wh(self, name: str) -> float:
+        """Get the usage in a period, over all of its rates."""
+        return sum(
+            usage
+            for period, usage in zip(self.tariff.periods, self.usage_wh)
+            if period.name == name
+        )
+
+    def get_cost(self, name: str = None) -> float:
+        """Get the cost of the usage in a period, or the total cost including fixed charges."""
+        cost = sum(
+            usage * period.rate
+            for period, usage in zip(self.tariff.periods, self.usage_wh)
+            if name is None or period.name == name
+        )
+        cost /= 1000
+        if name is None:
+            cost += self.tariff.get_fixed_charge(self.day)
+        return cost
@@ -0,0 +1,217 @@
+"""Compact, time-indexed storage of the gateway's minute usage and its daily totals."""
+from array import array
+from bisect import bisect_left
+from datetime import date
+from datetime import timedelta
+from typing import Iterator
+from typing import Optional
+
+
+class UsageSeries:
+    """Minute usage measurements kept sorted by timestamp in parallel typed arrays.
+
+    A measurement takes 24 bytes here, rather than a `UsageMeasurement` object with its own dict and
+    datetime, so several days of minute data per meter stay small. Measurements are nearly always
+    newer than the last one, which is an append; revised or late minutes are found by bisecting.
+    """
+
+    __slots__ = ("timestamps", "usage", "power", "total_wh")
+
+    def __init__(self):
+        self.timestamps = array("q")  # unix timestamps, in seconds
+        self.usage = array("d")  # energy used in the minute, in Wh
+        self.power = array("d")  # instantaneous demand, in W
+        self.total_wh = 0.0  # running total of usage
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __iter__(self) -> Iterator["tuple[int, float, float]"]:
+        return zip(self.timestamps, self.usage, self.power)
+
+    @property
+    def first_timestamp(self) -> Optional[int]:
+        """Timestamp of the oldest measurement, if any."""
+        return self.timestamps[0] if self.timestamps else None
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        """Timestamp of the newest measurement, if any."""
+        return self.timestamps[-1] if self.timestamps else None
+
+    def add(self, timestamp: int, usage: float, power: float) -> float:
+        """Add a measurement, replacing any with the same timestamp. Returns the change in total usage."""
+        timestamps = self.timestamps
+        if not timestamps or timestamp > timestamps[-1]:
+            timestamps.append(timestamp)
+            self.usage.append(usage)
+            self.power.append(power)
+            self.total_wh += usage
+            return usage
+
+        index = bisect_left(timestamps, timestamp)
+        if timestamps[index] == timestamp:
+            # Revised minute, so correct the running total by the difference
+            change = usage - self.usage[index]
+            self.usage[index] = usage
+            self.power[index] = power
+        else:
+            timestamps.insert(index, timestamp)
+            self.usage.insert(index, usage)
+            self.power.insert(index, power)
+            change = usage
+        self.total_wh += change
+        return change
+
+    def index(self, timestamp: int) -> int:
+        """Get the index of the first measurement at or after the timestamp."""
+        return bisect_left(self.timestamps, timestamp)
+
+    def sum(self, start: int = None, end: int = None) -> float:
+        """Get the total usage (Wh) of the measurements in [start, end), or of all of them."""
+        if start is None and end is None:
+            return self.total_wh
+        start_index = 0 if start is None else self.index(start)
+        end_index = len(self.timestamps) if end is None else self.index(end)
+        return sum(self.usage[start_index:end_index])
+
+    def count(self, start: int, end: int) -> int:
+        """Get the number of measurements in [start, end)."""
+        return self.index(end) - self.index(start)
+
+    def discard_before(self, timestamp: int):
+        """Discard the measurements before the timestamp."""
+        index = self.index(timestamp)
+        if index:
+            del self.timestamps[:index]
+            del self.usage[:index]
+            del self.power[:index]
+            # Recalculate rather than subtract, so float error doesn't build up
+            self.total_wh = sum(self.usage)
+
+    def as_dict(self) -> dict:
+        """Serialize the series for storage, as one list per array."""
+        return {
+            "timestamps": self.timestamps.tolist(),
+            "usage": self.usage.tolist(),
+            "power": self.power.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "UsageSeries":
+        """Deserialize a stored series."""
+        series = cls()
+        series.timestamps = array("q", data.get("timestamps", []))
+        series.usage = array("d", data.get("usage", []))
+        series.power = array("d", data.get("power", []))
+        if not len(series.timestamps) == len(series.usage) == len(series.power):
+            raise ValueError("Stored usage arrays have different lengths")
+        series.total_wh = sum(series.usage)
+        return series
+
+
+class DailyUsage:
+    """Total usage (Wh) of each local day, so usage over longer periods doesn't need the API.
+
+    Open days (yesterday and today) are kept up to date from the minute series as it grows. Earlier
+    days are closed once their whole day has been fetched, and never change after that. A day that
+    stopped being open before all of its minutes were collected keeps its partial total until then.
+    """
+
+    __slots__ = ("days", "closed")
+
+    def __init__(self):
+        self.days: dict[date, float] = {}
+        self.closed: set[date] = set()
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def get(self, day: date) -> Optional[float]:
+        """Get the usage of a day, if known."""
+        return self.days.get(day)
+
+    def set(self, day: date, usage: float):
+        """Set the usage of an open day."""
+        self.days[day] = usage
+
+    def add(self, day: date, usage: float):
+        """Add to the usage of an open day, which becomes known if it wasn't."""
+        self.days[day] = self.days.get(day, 0.0) + usage
+
+    def close(self, day: date, usage: float):
+        """Set the final usage of a day, from all of its minutes."""
+        self.days[day] = usage
+        self.closed.add(day)
+
+    def is_closed(self, day: date) -> bool:
+        """Check if the usage of a day is final."""
+        return day in self.closed
+
+    def missing(self, start: date, end: date) -> "list[date]":
+        """Get the days in [start, end) whose usage isn't final, either unknown or only partly collected."""
+        return [
+            start + timedelta(days=i)
+            for i in range((end - start).days)
+            if start + timedelta(days=i) not in self.closed
+        ]
+
+    def total(self, start: date, end: date) -> Optional[float]:
+        """Get the total usage of the days in [start, end), or None if any of them are unknown."""
+        total = 0.0
+        day = start
+        while day < end:
+            usage = self.days.get(day)
+            if usage is None:
+                return None
+            total += usage
+            day += timedelta(days=1)
+        return total
+
+    def discard_before(self, day: date):
+        """Discard the days before a day."""
+        for old_day in [d for d in self.days if d < day]:
+            del self.days[old_day]
+        self.closed = {d for d in self.closed if d >= day}
+
+    def as_dict(self) -> dict:
+        """Serialize the daily usage for storage."""
+        return {
+            "days": {day.isoformat(): usage for day, usage in self.days.items()},
+            "closed": sorted(day.isoformat() for day in self.closed),
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "DailyUsage":
+        """Deserialize stored daily usage."""
+        daily = cls()
+        if "days" not in data:
+            # Stored before closed days were tracked, so none of them are known to be final
+            data = {"days": data, "closed": []}
+        daily.days = {
+            date.fromisoformat(day): float(usage)
+            for day, usage in data["days"].items()
+        }
+        daily.closed = {
+            date.fromisoformat(day) for day in data["closed"] if day in data["days"]
+        }
+        return daily
+
+
+def billing_cycle_start(today: date, billing_day: int) -> date:
+    """Get the first day of the billing cycle that today is in, for cycles starting on a day of the month.
+
+    Billing days past the end of a short month start the cycle on its last day.
+    """
+    start = _day_of_month(today.year, today.month, billing_day)
+    if start <= today:
+        return start
+    year, month = (
+        (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+    )
+    return _day_of_month(year, month, billing_day)
+
+
+def _day_of_month(year: int, month: int, day: int) -> date:
+    next_month = date(year + month // 12, month % 12 + 1, 1)
+    return date(year, month, min(day, (next_month - timedelta(days=1)).day))
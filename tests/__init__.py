@@ -0,0 +1 @@
+"""Tests for the Duke Energy Gateway integration."""
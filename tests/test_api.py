@@ -0,0 +1,197 @@
+"""Tests for the sharing of Duke Energy API requests, and the circuit breaker."""
+import asyncio
+
+import pytest
+from custom_components.duke_energy_gateway import api
+from custom_components.duke_energy_gateway.api import BREAKER_CLOSED
+from custom_components.duke_energy_gateway.api import BREAKER_FAILURE_THRESHOLD
+from custom_components.duke_energy_gateway.api import BREAKER_HALF_OPEN
+from custom_components.duke_energy_gateway.api import BREAKER_OPEN
+from custom_components.duke_energy_gateway.api import BREAKER_OPEN_MIN_SEC
+from custom_components.duke_energy_gateway.api import CircuitBreaker
+from custom_components.duke_energy_gateway.api import CircuitOpenError
+from custom_components.duke_energy_gateway.api import ResponseCache
+from custom_components.duke_energy_gateway.api import SingleFlight
+
+
+class _Clock:
+    """Monotonic clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+
+@pytest.fixture(name="clock")
+def clock_fixture(monkeypatch) -> _Clock:
+    """Replace the API module's clock, and take the jitter out of the backoff."""
+    clock = _Clock()
+    monkeypatch.setattr(api, "time", clock)
+    monkeypatch.setattr(api.random, "uniform", lambda _low, high: high)
+    return clock
+
+
+async def _fail():
+    raise RuntimeError("API is down")
+
+
+async def _succeed():
+    return "ok"
+
+
+async def _call(breaker: CircuitBreaker, func, record: bool = True):
+    try:
+        return await breaker.call(func, record)
+    except (RuntimeError, CircuitOpenError) as exception:
+        return exception
+
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    """The breaker opens after the threshold of failures, and rejects requests while open."""
+    breaker = CircuitBreaker()
+
+    async def run():
+        for _ in range(BREAKER_FAILURE_THRESHOLD - 1):
+            await _call(breaker, _fail)
+        assert breaker.state == BREAKER_CLOSED
+        await _call(breaker, _fail)
+        assert breaker.state == BREAKER_OPEN
+        assert breaker.retry_in_sec == BREAKER_OPEN_MIN_SEC
+        assert isinstance(await _call(breaker, _succeed), CircuitOpenError)
+        assert breaker.rejected == 1
+
+    asyncio.run(run())
+
+
+def test_breaker_probe_closes_or_reopens_for_longer(clock):
+    """Once the backoff has passed one probe is let through, and failing doubles the backoff."""
+    breaker = CircuitBreaker()
+
+    async def run():
+        for _ in range(BREAKER_FAILURE_THRESHOLD):
+            await _call(breaker, _fail)
+
+        clock.now += BREAKER_OPEN_MIN_SEC
+        await _call(breaker, _fail)
+        assert breaker.state == BREAKER_OPEN
+        assert breaker.retry_in_sec == BREAKER_OPEN_MIN_SEC * 2
+
+        clock.now += BREAKER_OPEN_MIN_SEC * 2
+        assert await _call(breaker, _succeed) == "ok"
+        assert breaker.state == BREAKER_CLOSED
+        assert breaker.failures == 0
+        assert breaker.trips == 0
+
+    asyncio.run(run())
+
+
+def test_breaker_only_lets_one_probe_through(clock):
+    """While the probe is in flight, other requests are rejected."""
+    breaker = CircuitBreaker()
+    probe_started = None
+
+    async def slow_probe():
+        assert breaker.state == BREAKER_HALF_OPEN
+        probe_started.set()
+        await asyncio.sleep(0)
+        return "ok"
+
+    async def run():
+        nonlocal probe_started
+        probe_started = asyncio.Event()
+        for _ in range(BREAKER_FAILURE_THRESHOLD):
+            await _call(breaker, _fail)
+        clock.now += BREAKER_OPEN_MIN_SEC
+        probe = asyncio.ensure_future(breaker.call(slow_probe))
+        await probe_started.wait()
+        assert isinstance(await _call(breaker, _succeed), CircuitOpenError)
+        assert await probe == "ok"
+        assert breaker.state == BREAKER_CLOSED
+
+    asyncio.run(run())
+
+
+def test_breaker_ignores_failures_in_flight_when_it_opened(clock):
+    """Requests that were already in flight when the breaker opened don't trip it again."""
+    breaker = CircuitBreaker()
+
+    async def slow_fail():
+        await asyncio.sleep(0)
+        raise RuntimeError("API is down")
+
+    async def run():
+        await asyncio.gather(
+            *[_call(breaker, slow_fail) for _ in range(BREAKER_FAILURE_THRESHOLD + 2)]
+        )
+        assert breaker.state == BREAKER_OPEN
+        assert breaker.trips == 1
+        assert breaker.retry_in_sec == BREAKER_OPEN_MIN_SEC
+
+    asyncio.run(run())
+
+
+def test_breaker_does_not_count_background_failures(clock):
+    """Requests that aren't recorded never open the breaker, and aren't made while it is open."""
+    breaker = CircuitBreaker()
+
+    async def run():
+        for _ in range(BREAKER_FAILURE_THRESHOLD * 2):
+            assert isinstance(
+                await _call(breaker, _fail, record=False), RuntimeError
+            )
+        assert breaker.state == BREAKER_CLOSED
+        assert breaker.failures == 0
+
+        for _ in range(BREAKER_FAILURE_THRESHOLD):
+            await _call(breaker, _fail)
+        clock.now += BREAKER_OPEN_MIN_SEC
+        # Not even as a probe
+        assert isinstance(
+            await _call(breaker, _succeed, record=False), CircuitOpenError
+        )
+        assert breaker.state == BREAKER_OPEN
+
+    asyncio.run(run())
+
+
+def test_single_flight_shares_result_of_call_in_flight():
+    """Callers of a key already in flight wait for its result instead of calling again."""
+    requests = SingleFlight()
+    calls = 0
+
+    def fetch(key: str):
+        async def async_fetch():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0)
+            return key
+
+        return async_fetch
+
+    async def run():
+        results = await asyncio.gather(
+            requests.run("key", fetch("first")),
+            requests.run("key", fetch("second")),
+            requests.run("other", fetch("other")),
+        )
+        assert results == ["first", "first", "other"]
+        assert calls == 2
+        assert requests.coalesced == 1
+        # Done, so the next call for the key is made again
+        assert await requests.run("key", fetch("third")) == "third"
+        assert calls == 3
+
+    asyncio.run(run())
+
+
+def test_response_cache_expires(clock):
+    """Responses are re-used until they are older than the TTL."""
+    cache = ResponseCache(60)
+    assert cache.get("key") is None
+    cache.set("key", "response")
+    assert cache.get("key") == "response"
+    assert cache.hits == 1
+    clock.now += 60
+    assert cache.get("key") is None
@@ -0,0 +1,70 @@
+"""Tests for rolling demand statistics."""
+import random
+
+from custom_components.duke_energy_gateway.demand import DemandTracker
+from custom_components.duke_energy_gateway.demand import RollingWindow
+
+START = 1_700_000_000 // 86400 * 86400
+
+
+def test_rolling_window_matches_scan():
+    """The sum, minimum and maximum match a scan of the samples still in the window."""
+    rng = random.Random(1)
+    window = RollingWindow(300)
+    samples = []
+    timestamp = START
+    for _ in range(2000):
+        timestamp += rng.randint(1, 30)
+        value = rng.uniform(0, 5000)
+        window.add(timestamp, value)
+        samples.append((timestamp, value))
+        in_window = [v for t, v in samples if t > timestamp - 300]
+        assert len(window) == len(in_window)
+        assert abs(window.sum - sum(in_window)) < 1e-6
+        assert window.min == min(in_window)
+        assert window.max == max(in_window)
+
+
+def test_rolling_window_maximum_leaves_with_its_sample():
+    """Once the largest sample leaves the window, the next largest is the maximum."""
+    window = RollingWindow(60)
+    window.add(START, 100.0)
+    window.add(START + 30, 50.0)
+    window.add(START + 45, 70.0)
+    assert window.max == 100.0
+    window.evict(START + 60)
+    assert window.max == 70.0
+    assert window.min == 50.0
+    window.evict(START + 200)
+    assert len(window) == 0
+    assert window.max is None
+    assert window.mean is None
+    assert window.sum == 0.0
+
+
+def test_demand_tracker_peaks_and_base_load():
+    """Peaks are the highest window averages, and the base load the lowest full hour in the night."""
+    base_load_end = START + 6 * 3600
+    tracker = DemandTracker(START, base_load_end)
+    for minute in range(8 * 60):
+        # 10 Wh a minute (600 W), 5 Wh (300 W) from 02:00 to 03:00, and 50 Wh (3 kW) from 07:00 to 07:15
+        usage = 10.0
+        if 120 <= minute < 180:
+            usage = 5.0
+        elif 420 <= minute < 435:
+            usage = 50.0
+        tracker.add(START + minute * 60, usage)
+
+    assert tracker.peaks[15] == (3000.0, START + 435 * 60)
+    assert tracker.peaks[60][0] == (15 * 50 + 45 * 10) / 60 * 60
+    assert tracker.base_load == (300.0, START + 180 * 60)
+
+
+def test_demand_tracker_ignores_old_and_repeated_minutes():
+    """Minutes before the day or not after the last one are skipped."""
+    tracker = DemandTracker(START, START + 6 * 3600)
+    tracker.add(START - 60, 100.0)
+    tracker.add(START, 10.0)
+    tracker.add(START, 100.0)
+    assert tracker.last_timestamp == START
+    assert tracker.peaks[15] == (40.0, START + 60)
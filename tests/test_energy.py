@@ -0,0 +1,33 @@
+"""Tests for the real-time energy estimate."""
+import pytest
+from custom_components.duke_energy_gateway.energy import RealtimeEnergyIntegrator
+
+START = 1_700_000_000 // 60 * 60
+
+
+def test_integrates_power_between_readings():
+    """Energy between readings is the trapezoid under them, split at minute boundaries."""
+    integrator = RealtimeEnergyIntegrator()
+    integrator.add(START + 30, 3600.0)
+    integrator.add(START + 90, 3600.0)
+    # 3600 W for 60 seconds is 60 Wh, half of it in each minute
+    assert integrator.pending_wh == pytest.approx(60.0)
+
+    integrator.discard_before(START + 60)
+    assert integrator.pending_wh == pytest.approx(30.0)
+
+
+def test_gaps_and_covered_minutes_are_not_integrated():
+    """Readings too far apart, or in minutes the gateway data covers, add nothing."""
+    integrator = RealtimeEnergyIntegrator(max_gap=60)
+    integrator.add(START, 1000.0)
+    integrator.add(START + 120, 1000.0)
+    assert integrator.pending_wh == 0.0
+
+    integrator.discard_before(START + 180)
+    integrator.add(START + 150, 1000.0)
+    integrator.add(START + 170, 1000.0)
+    assert integrator.pending_wh == 0.0
+    integrator.discard_before(START + 120)  # already covered, so nothing changes
+    integrator.add(START + 200, 1000.0)
+    assert integrator.pending_wh == pytest.approx(1000.0 * 20 / 3600)
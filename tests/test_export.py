@@ -0,0 +1,58 @@
+"""Tests for the CSV export of usage."""
+import os
+
+from custom_components.duke_energy_gateway.export import _read_last_timestamp
+from custom_components.duke_energy_gateway.export import EXPORT_HEADERS
+from custom_components.duke_energy_gateway.export import EXPORT_REALTIME
+from custom_components.duke_energy_gateway.export import EXPORT_USAGE
+from custom_components.duke_energy_gateway.export import UsageExporter
+
+
+def test_read_last_timestamp_truncates_partial_row(tmp_path):
+    """A row cut off by a restart is dropped, and the last complete row's timestamp is returned."""
+    path = tmp_path / "realtime-2026-10-17.csv"
+    path.write_bytes(b"timestamp,power_w\n1700000000,1200\n1700000001,1300\n17000000")
+
+    assert _read_last_timestamp(str(path)) == 1700000001
+    assert path.read_bytes() == b"timestamp,power_w\n1700000000,1200\n1700000001,1300\n"
+
+
+def test_read_last_timestamp_of_complete_file(tmp_path):
+    """A file that ends with a complete row is left as it is."""
+    path = tmp_path / "usage-2026-10-17.csv"
+    content = b"timestamp,usage_wh,power_w\n1700000000,10.5,0.0\n"
+    path.write_bytes(content)
+
+    assert _read_last_timestamp(str(path)) == 1700000000
+    assert path.read_bytes() == content
+
+
+def test_read_last_timestamp_of_header_only(tmp_path):
+    """A file with no rows has no last timestamp."""
+    path = tmp_path / "usage-2026-10-17.csv"
+    path.write_bytes(EXPORT_HEADERS[EXPORT_USAGE].encode("utf8"))
+
+    assert _read_last_timestamp(str(path)) is None
+
+
+def test_load_last_timestamps_uses_newest_file_of_each_kind(tmp_path):
+    """Exports resume after the last row of each kind's newest file."""
+    (tmp_path / "realtime-2026-10-16.csv").write_text("timestamp,power_w\n100,1\n")
+    (tmp_path / "realtime-2026-10-17.csv").write_text("timestamp,power_w\n200,1\n30")
+    (tmp_path / "unrelated.txt").write_text("300\n")
+
+    exporter = UsageExporter(None, str(tmp_path))
+    assert exporter._load_last_timestamps() == {  # pylint: disable=protected-access
+        EXPORT_REALTIME: 200,
+        EXPORT_USAGE: None,
+    }
+    assert (tmp_path / "realtime-2026-10-17.csv").read_text().endswith("200,1\n")
+
+
+def test_load_last_timestamps_without_directory(tmp_path):
+    """Nothing has been exported before if the directory doesn't exist yet."""
+    exporter = UsageExporter(None, os.path.join(str(tmp_path), "missing"))
+    assert exporter._load_last_timestamps() == {  # pylint: disable=protected-access
+        EXPORT_REALTIME: None,
+        EXPORT_USAGE: None,
+    }
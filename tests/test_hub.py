@@ -0,0 +1,73 @@
+"""Tests for the fan-out of real-time measurements to subscribers."""
+from custom_components.duke_energy_gateway.const import REALTIME_MODE_AGGREGATE
+from custom_components.duke_energy_gateway.const import REALTIME_MODE_RAW
+from custom_components.duke_energy_gateway.const import REALTIME_MODE_SAMPLE
+from custom_components.duke_energy_gateway.hub import RealtimeHub
+from custom_components.duke_energy_gateway.hub import RealtimeUsageAggregate
+
+TIMESTAMP = 1_700_000_000
+
+
+def _data(usage: float) -> dict:
+    return {"gw": "gateway", "t": TIMESTAMP * 1000, "da": {"i": usage}}
+
+
+def _target(_measurement):
+    pass
+
+
+def test_each_subscriber_at_its_own_rate():
+    """Raw subscribers get every measurement, and sampled ones one per interval."""
+    hub = RealtimeHub("gateway", REALTIME_MODE_SAMPLE, 10)
+    raw = hub.add("raw", _target, mode=REALTIME_MODE_RAW)
+    sampled = hub.add("sampled", _target)
+
+    deliveries = hub.offer(0.0, TIMESTAMP, 100.0, _data(100.0))
+    assert [target for target, _ in deliveries] == [raw.target, sampled.target]
+    # One measurement object, shared by both
+    assert deliveries[0][1] is deliveries[1][1]
+
+    deliveries = hub.offer(5.0, TIMESTAMP + 5, 110.0, _data(110.0))
+    assert [target for target, _ in deliveries] == [raw.target]
+    assert len(hub.offer(10.0, TIMESTAMP + 10, 120.0, _data(120.0))) == 2
+
+
+def test_nothing_due_returns_none():
+    """Nothing is allocated for a measurement that no subscriber is due."""
+    hub = RealtimeHub("gateway", REALTIME_MODE_SAMPLE, 10)
+    hub.add("sampled", _target)
+    assert hub.offer(0.0, TIMESTAMP, 100.0, _data(100.0))
+    assert hub.offer(1.0, TIMESTAMP + 1, 100.0, _data(100.0)) is None
+
+
+def test_aggregate_summarizes_interval():
+    """Aggregate subscribers get a summary of every measurement since the last one."""
+    hub = RealtimeHub("gateway", REALTIME_MODE_AGGREGATE, 10)
+    hub.add("aggregate", _target)
+    hub.offer(0.0, TIMESTAMP, 100.0, _data(100.0))
+    for i, usage in enumerate((200.0, 50.0, 150.0), start=1):
+        assert hub.offer(float(i), TIMESTAMP + i, usage, _data(usage)) is None
+
+    ((_, summary),) = hub.offer(10.0, TIMESTAMP + 10, 400.0, _data(400.0))
+    assert isinstance(summary, RealtimeUsageAggregate)
+    assert summary.count == 4
+    assert summary.usage == 200.0
+    assert summary.usage_min == 50.0
+    assert summary.usage_max == 400.0
+    assert summary.usage_last == 400.0
+    assert summary.timestamp == TIMESTAMP + 10
+
+
+def test_options_apply_to_subscribers_that_follow_them():
+    """New options change the rate of subscribers that didn't ask for their own."""
+    hub = RealtimeHub("gateway", REALTIME_MODE_SAMPLE, 0)
+    following = hub.add("following", _target)
+    fixed = hub.add("fixed", _target, mode=REALTIME_MODE_SAMPLE, interval_sec=60)
+
+    hub.set_options(REALTIME_MODE_AGGREGATE, 5)
+    assert (following.mode, following.interval_sec) == (REALTIME_MODE_AGGREGATE, 5)
+    assert (fixed.mode, fixed.interval_sec) == (REALTIME_MODE_SAMPLE, 60)
+
+    assert hub.remove(following)
+    assert not hub.remove(following)
+    assert len(hub) == 1
@@ -0,0 +1,68 @@
+"""Tests for the adaptive usage poll interval."""
+from custom_components.duke_energy_gateway.polling import AdaptivePollInterval
+
+START = 1_700_000_000
+CADENCE_SEC = 300
+LAG_SEC = 120
+
+
+def _latest_published(now: float):
+    """Data up to the start of each burst is published LAG_SEC after it, every CADENCE_SEC."""
+    bursts = int((now - START - LAG_SEC) // CADENCE_SEC)
+    return None if bursts < 0 else START - 60 + bursts * CADENCE_SEC
+
+
+def test_learns_cadence_and_polls_around_bursts():
+    """Once the cadence is learned, a day takes far fewer polls than polling every minute."""
+    polling = AdaptivePollInterval(60, 600)
+    now = float(START)
+    polls = 0
+    while now < START + 86400:
+        interval = polling.record_poll(now, _latest_published(now))
+        assert 60 <= interval <= 600
+        polls += 1
+        now += interval
+
+    assert polling.cadence_sec == CADENCE_SEC
+    assert 0 < polling.lag_sec < CADENCE_SEC
+    bursts = 86400 // CADENCE_SEC
+    assert bursts <= polls < 2 * bursts
+
+
+def test_polls_at_minimum_until_cadence_is_known():
+    """Without two bursts seen, polls are at the minimum interval."""
+    polling = AdaptivePollInterval(60, 600)
+    assert polling.record_poll(START, None) == 60
+    assert polling.record_poll(START + 60, START - 60) == 60
+    assert polling.cadence_sec is None
+
+
+def test_failures_back_off_up_to_maximum():
+    """Failed polls double the interval from the minimum, up to the maximum."""
+    polling = AdaptivePollInterval(60, 600)
+    assert [polling.record_failure() for _ in range(6)] == [60, 120, 240, 480, 600, 600]
+    polling.record_poll(START, START - 60)
+    assert polling.misses == 0
+
+
+def test_offset_delays_expected_poll():
+    """The offset keeps meters on the same account from polling at the same time."""
+    polling = AdaptivePollInterval(60, 600)
+    polling.record_poll(START, START - 60)
+    without_offset = polling.record_poll(START + CADENCE_SEC, START + CADENCE_SEC - 60)
+
+    offset = AdaptivePollInterval(60, 600)
+    offset.offset_sec = 30
+    offset.record_poll(START, START - 60)
+    assert (
+        offset.record_poll(START + CADENCE_SEC, START + CADENCE_SEC - 60)
+        == without_offset + 30
+    )
+
+
+def test_bounds_clamp_interval():
+    """Setting both bounds to the same value polls at a fixed interval."""
+    polling = AdaptivePollInterval(60, 600)
+    polling.set_bounds(120, 120)
+    assert polling.record_poll(START, None) == 120
+    assert polling.record_failure() == 120
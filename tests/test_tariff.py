@@ -0,0 +1,125 @@
+"""Tests for time-of-use tariffs."""
+from datetime import datetime
+from datetime import timedelta
+from zoneinfo import ZoneInfo
+
+import pytest
+from custom_components.duke_energy_gateway.tariff import Tariff
+from custom_components.duke_energy_gateway.tariff import TariffDay
+
+TZ = ZoneInfo("America/New_York")
+
+
+def _day_bounds(year: int, month: int, day: int) -> "tuple[datetime, datetime]":
+    start = datetime(year, month, day, tzinfo=TZ)
+    end = datetime.combine(start.date() + timedelta(days=1), start.time(), TZ)
+    return start, end
+
+
+def _tariff(start: str, end: str) -> Tariff:
+    return Tariff.from_config(
+        {
+            "default_period": "off_peak",
+            "default_rate": 0.1,
+            "periods": [{"name": "on_peak", "rate": 0.3, "start": start, "end": end}],
+        }
+    )
+
+
+def test_get_period_by_time_and_weekday():
+    """The first period that applies to a minute is used, and the default otherwise."""
+    tariff = Tariff.from_config(
+        {
+            "default_rate": 0.1,
+            "periods": [
+                {
+                    "name": "on_peak",
+                    "rate": 0.3,
+                    "days": "weekdays",
+                    "start": "16:00",
+                    "end": "21:00",
+                },
+                {"name": "overnight", "rate": 0.05, "start": "23:00", "end": "06:00"},
+            ],
+        }
+    )
+    assert tariff.period_names == ["standard", "on_peak", "overnight"]
+    # Friday and Saturday afternoons
+    assert tariff.get_period(datetime(2026, 10, 16, 17, 0)).name == "on_peak"
+    assert tariff.get_period(datetime(2026, 10, 17, 17, 0)).name == "standard"
+    # Wraps past midnight
+    assert tariff.get_period(datetime(2026, 10, 17, 23, 30)).name == "overnight"
+    assert tariff.get_period(datetime(2026, 10, 17, 5, 59)).name == "overnight"
+    assert tariff.get_period(datetime(2026, 10, 17, 6, 0)).name == "standard"
+
+
+def test_get_day_periods_normal_day():
+    """A 24 hour day has a period for every minute."""
+    periods = _tariff("03:00", "04:00").get_day_periods(*_day_bounds(2026, 10, 17))
+    assert len(periods) == 24 * 60
+    assert set(periods[180:240]) == {1}
+    assert set(periods[:180]) == set(periods[240:]) == {0}
+
+
+def test_get_day_periods_spring_forward():
+    """On a 23 hour day, the hour after the skipped one is at its local time."""
+    periods = _tariff("03:00", "04:00").get_day_periods(*_day_bounds(2026, 3, 8))
+    assert len(periods) == 23 * 60
+    # 00:00, 01:00, then 03:00 local
+    assert set(periods[120:180]) == {1}
+    assert set(periods[:120]) == set(periods[180:]) == {0}
+
+
+def test_get_day_periods_fall_back():
+    """On a 25 hour day, both of the repeated hours are in the period of their local time."""
+    periods = _tariff("01:00", "02:00").get_day_periods(*_day_bounds(2026, 11, 1))
+    assert len(periods) == 25 * 60
+    assert set(periods[60:180]) == {1}
+    assert set(periods[:60]) == set(periods[180:]) == {0}
+
+
+def test_tariff_day_prices_usage():
+    """Usage is added to its minute's period and priced at its rate, with fixed charges in the total."""
+    tariff = Tariff.from_config(
+        {
+            "default_period": "off_peak",
+            "default_rate": 0.1,
+            "fixed_per_day": 0.5,
+            "periods": [
+                {"name": "on_peak", "rate": 0.3, "start": "03:00", "end": "04:00"}
+            ],
+        }
+    )
+    day_start, day_end = _day_bounds(2026, 10, 17)
+    tariff_day = TariffDay(tariff, day_start, day_end)
+    start = int(day_start.timestamp())
+    tariff_day.add(start, 1000.0)
+    tariff_day.add(start + 3 * 3600, 2000.0)
+    tariff_day.add(int(day_end.timestamp()), 5000.0)  # the next day
+    assert tariff_day.get_usage_wh("off_peak") == 1000.0
+    assert tariff_day.get_usage_wh("on_peak") == 2000.0
+    assert tariff_day.get_cost("on_peak") == pytest.approx(0.6)
+    assert tariff_day.get_cost() == pytest.approx(0.1 + 0.6 + 0.5)
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "not json",
+        "[]",
+        '{"periods": []}',
+        '{"default_rate": 0.1, "periods": [{"name": "a", "rate": 1, "start": "25:00"}]}',
+        '{"default_rate": 0.1, "periods": [{"name": "a", "rate": 1, "start": "01:00", "end": "01:00"}]}',
+        '{"default_rate": 0.1, "periods": [{"name": "a", "rate": 1, "days": "someday"}]}',
+    ],
+)
+def test_parse_rejects_invalid_tariffs(text):
+    """Invalid configurations raise ValueError."""
+    with pytest.raises(ValueError):
+        Tariff.parse(text)
+
+
+def test_parse_empty_is_no_tariff():
+    """An empty configuration means no tariff."""
+    assert Tariff.parse("") is None
+    assert Tariff.parse("  ") is None
@@ -0,0 +1,143 @@
+"""Tests for the usage series and daily usage."""
+from datetime import date
+
+import pytest
+
+from custom_components.duke_energy_gateway.usage import billing_cycle_start
+from custom_components.duke_energy_gateway.usage import DailyUsage
+from custom_components.duke_energy_gateway.usage import UsageSeries
+
+START = 1_700_000_000 // 3600 * 3600
+
+
+def test_series_appends_in_order():
+    """Newer minutes are appended and added to the running total."""
+    series = UsageSeries()
+    assert series.add(START, 10.0, 600.0) == 10.0
+    assert series.add(START + 60, 12.0, 720.0) == 12.0
+    assert len(series) == 2
+    assert series.first_timestamp == START
+    assert series.last_timestamp == START + 60
+    assert series.sum() == 22.0
+    assert list(series) == [(START, 10.0, 600.0), (START + 60, 12.0, 720.0)]
+
+
+def test_series_revision_replaces_minute_and_corrects_total():
+    """A minute that is fetched again replaces the old one, changing the total by the difference."""
+    series = UsageSeries()
+    for i in range(5):
+        series.add(START + i * 60, 10.0, 0.0)
+    assert series.add(START + 120, 15.0, 900.0) == 5.0
+    assert series.add(START + 180, 4.0, 0.0) == -6.0
+    assert len(series) == 5
+    assert series.sum() == 49.0
+    assert series.sum(START, None) == series.sum()
+    assert series.usage[2] == 15.0
+    assert series.power[2] == 900.0
+
+
+def test_series_late_minute_is_inserted_in_order():
+    """A minute older than the newest is inserted where it belongs."""
+    series = UsageSeries()
+    series.add(START, 1.0, 0.0)
+    series.add(START + 120, 3.0, 0.0)
+    assert series.add(START + 60, 2.0, 0.0) == 2.0
+    assert list(series.timestamps) == [START, START + 60, START + 120]
+    assert series.sum(START + 60, START + 120) == 2.0
+    assert series.count(START, START + 120) == 2
+
+
+def test_series_discard_before_and_round_trip():
+    """Discarding old minutes recalculates the total, and the series survives storage."""
+    series = UsageSeries()
+    for i in range(10):
+        series.add(START + i * 60, float(i), 0.0)
+    series.discard_before(START + 300)
+    assert series.first_timestamp == START + 300
+    assert series.sum() == sum(range(5, 10))
+
+    restored = UsageSeries.from_dict(series.as_dict())
+    assert list(restored) == list(series)
+    assert restored.sum() == series.sum()
+
+
+def test_series_from_dict_rejects_mismatched_arrays():
+    """Stored arrays of different lengths aren't restored."""
+    with pytest.raises(ValueError):
+        UsageSeries.from_dict({"timestamps": [START], "usage": [], "power": []})
+
+
+def test_daily_usage_partial_day_is_refetched_after_leaving_open_window():
+    """A day only partly collected while it was open is still missing once it closes."""
+    daily = DailyUsage()
+    # Only part of the day was merged before the updates stopped
+    daily.add(date(2026, 10, 15), 7950.0)
+    assert daily.get(date(2026, 10, 15)) == 7950.0
+
+    # Two days later it is no longer open, but its usage isn't final so it is fetched
+    assert daily.missing(date(2026, 10, 14), date(2026, 10, 16)) == [
+        date(2026, 10, 14),
+        date(2026, 10, 15),
+    ]
+
+    daily.close(date(2026, 10, 15), 14400.0)
+    assert daily.is_closed(date(2026, 10, 15))
+    assert daily.get(date(2026, 10, 15)) == 14400.0
+    assert daily.missing(date(2026, 10, 14), date(2026, 10, 16)) == [
+        date(2026, 10, 14)
+    ]
+
+
+def test_daily_usage_open_days_are_not_closed():
+    """Setting or adding to a day's usage doesn't make it final."""
+    daily = DailyUsage()
+    daily.set(date(2026, 10, 16), 100.0)
+    daily.add(date(2026, 10, 16), 50.0)
+    assert daily.get(date(2026, 10, 16)) == 150.0
+    assert not daily.is_closed(date(2026, 10, 16))
+    assert daily.total(date(2026, 10, 16), date(2026, 10, 17)) == 150.0
+    assert daily.total(date(2026, 10, 15), date(2026, 10, 17)) is None
+
+
+def test_daily_usage_round_trip_keeps_closed_days():
+    """Closed days survive storage, and days that weren't closed are still refetched."""
+    daily = DailyUsage()
+    daily.close(date(2026, 10, 14), 12000.0)
+    daily.add(date(2026, 10, 15), 7950.0)
+
+    restored = DailyUsage.from_dict(daily.as_dict())
+    assert restored.get(date(2026, 10, 14)) == 12000.0
+    assert restored.is_closed(date(2026, 10, 14))
+    assert restored.get(date(2026, 10, 15)) == 7950.0
+    assert restored.missing(date(2026, 10, 14), date(2026, 10, 16)) == [
+        date(2026, 10, 15)
+    ]
+
+
+def test_daily_usage_from_legacy_dict_refetches_every_day():
+    """Usage stored before closed days were tracked may be partial, so none of it is final."""
+    restored = DailyUsage.from_dict({"2026-10-14": 12000.0, "2026-10-15": 7950.0})
+    assert restored.get(date(2026, 10, 14)) == 12000.0
+    assert restored.missing(date(2026, 10, 14), date(2026, 10, 16)) == [
+        date(2026, 10, 14),
+        date(2026, 10, 15),
+    ]
+
+
+def test_daily_usage_discard_before_drops_closed_days():
+    """Discarded days are forgotten, including whether they were closed."""
+    daily = DailyUsage()
+    daily.close(date(2026, 9, 1), 1.0)
+    daily.close(date(2026, 10, 1), 2.0)
+    daily.discard_before(date(2026, 9, 15))
+    assert len(daily) == 1
+    assert not daily.is_closed(date(2026, 9, 1))
+    assert daily.is_closed(date(2026, 10, 1))
+
+
+def test_billing_cycle_start():
+    """Cycles start on the billing day, or the last day of a short month."""
+    assert billing_cycle_start(date(2026, 10, 17), 15) == date(2026, 10, 15)
+    assert billing_cycle_start(date(2026, 10, 10), 15) == date(2026, 9, 15)
+    assert billing_cycle_start(date(2026, 1, 10), 15) == date(2025, 12, 15)
+    assert billing_cycle_start(date(2026, 3, 10), 31) == date(2026, 2, 28)